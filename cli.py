@@ -0,0 +1,360 @@
+import os
+import sys
+import argparse
+from scoring_service import SERVICE_HOST, SERVICE_PORT
+import scoring_client
+from profiler import profile_run, PROFILE_MODES
+
+DEFAULT_SERVICE_URL = f"http://{SERVICE_HOST}:{SERVICE_PORT}"
+
+def _read_jd(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+def _resume_args(paths):
+    return [{"name": os.path.basename(path), "path": os.path.abspath(path)} for path in paths]
+
+def cmd_serve(args):
+    from scoring_service import serve
+    serve(args.port)
+
+def _print_scores(results):
+    results.sort(key=lambda row: row["scores"]["final_score"], reverse=True)
+    print(f"{'Resume':40} {'Final':>7} {'BERT':>7} {'LLaMA':>7} {'Keyword':>8} {'Skills':>7}")
+    for row in results:
+        scores = row["scores"]
+        llama = scores["llama_score"] if scores["llama_score"] is not None else float("nan")
+        skills = scores.get("skill_overlap") if scores.get("skill_overlap") is not None else float("nan")
+        flag = "  (provisional)" if scores.get("degraded") else ""
+        print(f"{row['name'][:40]:40} {scores['final_score']:7.2f} {scores['bert_score']:7.2f} "
+              f"{llama:7.2f} {scores['keyword_overlap']:8.2f} {skills:7.2f}{flag}")
+
+def cmd_score(args):
+    jd_text = _read_jd(args.jd)
+    resumes = _resume_args(args.resumes)
+    results = scoring_client.score_resumes(
+        jd_text, resumes, use_llm=not args.no_llm,
+        service_url=args.service_url, time_budget=args.budget
+    )
+    _print_scores(results)
+
+    provisional = {row["name"] for row in results if row["scores"].get("degraded")}
+    if provisional and args.finish:
+        print(f"\nFinishing {len(provisional)} provisional score(s)...\n")
+        finished = scoring_client.score_resumes(
+            jd_text, [resume for resume in resumes if resume["name"] in provisional],
+            service_url=args.service_url
+        )
+        finished_by_name = {row["name"]: row for row in finished}
+        _print_scores([finished_by_name.get(row["name"], row) for row in results])
+
+    if not args.service_url:
+        from llm_client import timing_report
+        timings = timing_report()
+        if timings["calls"]:
+            print(f"\nLLM: {timings['calls']} call(s), {timings['mean_prompt_tokens']} prompt tokens evaluated "
+                  f"per call, prompt eval {timings['prompt_eval_seconds']:.1f}s, eval {timings['eval_seconds']:.1f}s, "
+                  f"load {timings['load_seconds']:.1f}s")
+
+def cmd_summarize(args):
+    summaries = scoring_client.summarize_resumes(
+        _read_jd(args.jd), _resume_args(args.resumes),
+        os.path.basename(args.jd), service_url=args.service_url
+    )
+    for name, summary in summaries:
+        print(f"=== {name} ===\n{summary}\n")
+
+def cmd_rankings(args):
+    rows = scoring_client.get_rankings(args.jd, args.limit, args.offset, service_url=args.service_url)
+    for rank, row in enumerate(rows, start=args.offset + 1):
+        print(f"{rank:4}. {row['resume'][:40]:40} {row['score']:7.2f}  {row['email'] or ''}")
+
+def cmd_backfill(args):
+    done = scoring_client.backfill_degraded(args.jd, args.limit, service_url=args.service_url)
+    print(f"Backfilled {done} degraded score(s)")
+
+def cmd_rescore(args):
+    from db_utils import init_db
+
+    init_db()
+    if args.status:
+        from scorer import component_versions, pipeline_fingerprint
+        from db_utils import pipeline_versions_summary
+
+        versions = component_versions()
+        print(f"Current pipeline {pipeline_fingerprint(versions)}: "
+              + ", ".join(f"{part}={version}" for part, version in versions.items()))
+        for row in pipeline_versions_summary().itertuples():
+            print(f"  {row.fingerprint or '(unstamped)':14} {row.rows:6} row(s), last scored {row.last_scored}")
+        return
+    done = scoring_client.rescore_stale(args.jd, args.limit, use_llm=not args.no_llm, service_url=args.service_url)
+    print(f"Re-scored {done} stale row(s)")
+
+def cmd_edit_jd(args):
+    from db_utils import init_db, load_jd_versions
+
+    init_db()
+    if args.history:
+        for row in load_jd_versions(args.jd).itertuples():
+            print(f"v{row.version:<4} {row.saved_at}  {row.processed_hash}  {row.job_role}")
+        return
+    from jd_versions import save_jd
+
+    with open(args.file, 'r', encoding='utf-8') as f:
+        text = f.read()
+    version, parts, updated = save_jd(args.jd, text, use_llm=not args.no_llm)
+    if version is None:
+        print(f"{args.jd} is unchanged")
+    elif parts:
+        print(f"Saved {args.jd} v{version}; re-scored {', '.join(sorted(parts))} for {updated} row(s)")
+    else:
+        print(f"Saved {args.jd} v{version}; scores carried over")
+
+def cmd_search(args):
+    import time
+
+    start = time.perf_counter()
+    rows = scoring_client.search_resumes(args.query, args.limit, args.all, service_url=args.service_url)
+    for rank, row in enumerate(rows, start=1):
+        print(f"{rank:4}. {row['resume'][:40]:40} {row['score']:7.2f}  {' '.join(row['matched'])}")
+    print(f"{len(rows)} result(s) in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+def cmd_index(args):
+    from search_index import reindex
+    from upload_store import list_resumes, resume_path, resume_hash
+    from db_utils import init_db
+
+    init_db()
+    indexed = reindex((name, resume_path(name), resume_hash(name)) for name in list_resumes())
+    print(f"Indexed {indexed} resume(s)")
+
+def cmd_watch(args):
+    from watcher import watch
+
+    scored = watch(use_llm=not args.no_llm, poll_seconds=args.poll, once=args.once)
+    print(f"Pre-scored {scored} resume/JD pair(s)")
+
+def cmd_loadtest(args):
+    import json
+    from loadtest import run_load_test, format_report, ACTION_MIX
+
+    mix = dict(ACTION_MIX)
+    for entry in filter(None, (args.mix or "").split(",")):
+        action, _, weight = entry.partition("=")
+        mix[action.strip()] = float(weight or 1)
+    try:
+        report = run_load_test(args.sessions, args.duration, mix, use_llm=not args.no_llm,
+                               llm_latency=args.llm_latency, llm_slots=args.llm_slots,
+                               service=args.service, seed=args.seed)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return
+    print(format_report(report))
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.json}")
+
+def cmd_skills(args):
+    from skill_matcher import extract_skills
+    from resume_parser import analyze_pdf
+
+    for path in args.files:
+        text = analyze_pdf(path).text if path.lower().endswith(".pdf") else _read_jd(path)
+        skills = extract_skills(text)
+        print(f"=== {os.path.basename(path)} ({len(skills)} skill(s)) ===")
+        print(", ".join(f"{skill} x{count}" for skill, count in skills.most_common()))
+
+def _stored_resumes():
+    from upload_store import list_resumes, stored_resumes
+    return stored_resumes(list_resumes())
+
+def cmd_analyze(args):
+    import time
+    from pipeline import run_pipeline
+    from scoring_service import JD_DIR
+    from db_utils import init_db
+
+    init_db()
+    jd_text = _read_jd(os.path.join(JD_DIR, args.jd))
+    resumes = _resume_args(args.resumes) if args.resumes else _stored_resumes()
+    if args.prefilter:
+        from search_index import prefilter
+
+        resumes = list(resumes)
+        keep = set(prefilter(jd_text, [resume["name"] for resume in resumes], args.prefilter))
+        resumes = [resume for resume in resumes if resume["name"] in keep]
+        print(f"Prefilter kept {len(resumes)} resume(s) by keyword match")
+    start = time.perf_counter()
+    try:
+        scored = run_pipeline(
+            args.jd, jd_text, resumes,
+            use_llm=not args.no_llm, batch_size=args.batch_size,
+            commit_every=args.commit_every, service_url=args.service_url
+        )
+    except KeyboardInterrupt:
+        print("Interrupted; committed scores are kept and the next run resumes from there")
+        raise
+    print(f"Scored {scored} new resume(s) for {args.jd} in {time.perf_counter() - start:.1f}s")
+
+def cmd_compaction(args):
+    from compaction import evaluate_compaction
+    from resume_parser import analyze_pdf
+
+    analyses = {os.path.basename(path): analyze_pdf(path) for path in args.resumes}
+    df, summary = evaluate_compaction(_read_jd(args.jd), analyses, args.budget)
+    print(f"{'Resume':40} {'Tokens':>13} {'Seconds':>13} {'LLaMA':>11}")
+    for row in df.itertuples():
+        print(f"{row.resume[:40]:40} {row.full_tokens:6}->{row.compact_tokens:<6} "
+              f"{row.full_seconds:6.2f}->{row.compact_seconds:<6.2f} {row.full_score}->{row.compact_score}")
+    print()
+    for key, value in summary.items():
+        print(f"{key}: {value}")
+
+def cmd_workers(args):
+    from worker_pool import enqueue_work, run_workers, queue_status
+    from db_utils import init_db
+
+    init_db()
+    for jd_name in args.jd or []:
+        resumes = _resume_args(args.resumes) if args.resumes else _stored_resumes()
+        print(f"Queued {enqueue_work(jd_name, resumes)} item(s) for {jd_name}")
+
+    scored, elapsed = run_workers(args.workers, wait=args.wait)
+    rate = scored / elapsed if elapsed else 0.0
+    print(f"Scored {scored} item(s) in {elapsed:.1f}s ({rate:.2f}/s) with {args.workers or os.cpu_count()} worker(s)")
+    print(f"Queue: {queue_status()}")
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="HR Smart Screener command line")
+    parser.add_argument("--service-url", default=DEFAULT_SERVICE_URL,
+                        help="Scoring service URL (default: %(default)s)")
+    parser.add_argument("--local", action="store_true",
+                        help="Run in this process instead of calling the scoring service")
+    parser.add_argument("--profile", choices=PROFILE_MODES, default=None,
+                        help="Profile the command and write reports to uploaded_data/profiles")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve = commands.add_parser("serve", help="Run the local scoring service")
+    serve.add_argument("--port", type=int, default=SERVICE_PORT)
+    serve.set_defaults(func=cmd_serve)
+
+    score = commands.add_parser("score", help="Score resumes against a JD")
+    score.add_argument("--jd", required=True, help="Job description .txt file")
+    score.add_argument("--no-llm", action="store_true", help="Skip the LLaMA evaluation")
+    score.add_argument("--budget", type=float, default=None,
+                       help="Time budget in seconds; LLaMA refines the top resumes until it runs out")
+    score.add_argument("--finish", action="store_true",
+                       help="After printing the budgeted ranking, finish the provisional scores")
+    score.add_argument("resumes", nargs="+", help="Resume PDF files")
+    score.set_defaults(func=cmd_score)
+
+    summarize = commands.add_parser("summarize", help="Generate fit summaries")
+    summarize.add_argument("--jd", required=True, help="Job description .txt file")
+    summarize.add_argument("resumes", nargs="+", help="Resume PDF files")
+    summarize.set_defaults(func=cmd_summarize)
+
+    analyze = commands.add_parser("analyze", help="Score resumes into the database in a resumable stream")
+    analyze.add_argument("--jd", required=True, help="Saved JD name (in uploaded_data/jds)")
+    analyze.add_argument("--no-llm", action="store_true", help="Skip the LLaMA evaluation")
+    analyze.add_argument("--batch-size", type=int, default=16, help="Resumes embedded per micro-batch")
+    analyze.add_argument("--commit-every", type=int, default=64, help="Rows per database commit")
+    analyze.add_argument("--prefilter", type=int, default=None, metavar="N",
+                         help="Only score the N resumes with the best keyword (BM25) match")
+    analyze.add_argument("resumes", nargs="*", help="Resume PDFs (default: all stored resumes)")
+    analyze.set_defaults(func=cmd_analyze)
+
+    compaction = commands.add_parser("compaction", help="Measure prompt compaction against full prompts")
+    compaction.add_argument("--jd", required=True, help="Job description .txt file")
+    compaction.add_argument("--budget", type=int, default=350, help="Resume token budget per prompt")
+    compaction.add_argument("resumes", nargs="+", help="Resume PDF files")
+    compaction.set_defaults(func=cmd_compaction)
+
+    workers = commands.add_parser("workers", help="Score queued work with a multi-process worker pool")
+    workers.add_argument("--jd", action="append", help="Saved JD name to queue work for (repeatable)")
+    workers.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    workers.add_argument("--wait", action="store_true", help="Keep polling for new work instead of exiting")
+    workers.add_argument("resumes", nargs="*", help="Resume PDFs to queue (default: all stored resumes)")
+    workers.set_defaults(func=cmd_workers)
+
+    backfill = commands.add_parser("backfill", help="Re-run the LLM for degraded scores")
+    backfill.add_argument("--jd", default=None, help="Only this JD name")
+    backfill.add_argument("--limit", type=int, default=None)
+    backfill.set_defaults(func=cmd_backfill)
+
+    rescore = commands.add_parser("rescore-stale", help="Recompute only the components a pipeline change affected")
+    rescore.add_argument("--jd", default=None, help="Only this JD name")
+    rescore.add_argument("--limit", type=int, default=None)
+    rescore.add_argument("--no-llm", action="store_true", help="Refresh everything except LLaMA scores")
+    rescore.add_argument("--status", action="store_true", help="Show rows per pipeline fingerprint instead")
+    rescore.set_defaults(func=cmd_rescore)
+
+    edit_jd = commands.add_parser("edit-jd", help="Save a new version of a JD, re-scoring only what changed")
+    edit_jd.add_argument("--jd", required=True, help="JD name, e.g. data_scientist.txt")
+    edit_jd.add_argument("file", nargs="?", help="File with the new JD text")
+    edit_jd.add_argument("--no-llm", action="store_true", help="Clear invalidated LLaMA scores instead of re-asking")
+    edit_jd.add_argument("--history", action="store_true", help="List the saved versions instead")
+    edit_jd.set_defaults(func=cmd_edit_jd)
+
+    search = commands.add_parser("search", help="Keyword search over indexed resumes")
+    search.add_argument("query", help="Search terms, e.g. 'spark airflow'")
+    search.add_argument("--limit", type=int, default=20)
+    search.add_argument("--all", action="store_true", help="Only resumes containing every term")
+    search.set_defaults(func=cmd_search)
+
+    index = commands.add_parser("index", help="Add stored resumes to the search index")
+    index.set_defaults(func=cmd_index)
+
+    loadtest = commands.add_parser("loadtest", help="Simulate concurrent recruiters with a stubbed LLM")
+    loadtest.add_argument("--sessions", type=int, default=10)
+    loadtest.add_argument("--duration", type=float, default=60.0, help="Seconds to run")
+    loadtest.add_argument("--mix", default=None,
+                          help="Action weights, e.g. browse=6,analyze=2,summarize=0 "
+                               "(actions: browse, analyze, search, upload, summarize)")
+    loadtest.add_argument("--llm-latency", type=float, default=0.5, help="Seconds per stubbed LLM call")
+    loadtest.add_argument("--llm-slots", type=int, default=1, help="Stubbed LLM calls served at once")
+    loadtest.add_argument("--no-llm", action="store_true", help="Analyze without the LLaMA evaluation")
+    loadtest.add_argument("--service", action="store_true",
+                          help="Route scoring, summaries and search through an in-process scoring service")
+    loadtest.add_argument("--seed", type=int, default=None)
+    loadtest.add_argument("--json", default=None, help="Also write the report to this file")
+    loadtest.set_defaults(func=cmd_loadtest)
+
+    watch = commands.add_parser("watch", help="Ingest and pre-score new resumes in the background")
+    watch.add_argument("--no-llm", action="store_true", help="Pre-score without the LLaMA evaluation")
+    watch.add_argument("--poll", type=float, default=5.0, help="Seconds between folder scans")
+    watch.add_argument("--once", action="store_true", help="Process the current files and exit")
+    watch.set_defaults(func=cmd_watch)
+
+    skills = commands.add_parser("skills", help="List the taxonomy skills found in JDs or resumes")
+    skills.add_argument("files", nargs="+", help="JD .txt or resume PDF files")
+    skills.set_defaults(func=cmd_skills)
+
+    ranking = commands.add_parser("rankings", help="Show stored rankings for a JD")
+    ranking.add_argument("--jd", required=True, help="JD name as stored in the database")
+    ranking.add_argument("--limit", type=int, default=20)
+    ranking.add_argument("--offset", type=int, default=0)
+    ranking.set_defaults(func=cmd_rankings)
+    return parser
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command == "edit-jd" and not args.history and args.file is None:
+        parser.error("edit-jd: the file with the new JD text is required unless --history is given")
+    if args.local:
+        # Also override SCORING_SERVICE_URL, which the client falls back to
+        args.service_url = None
+        scoring_client.SERVICE_URL = ""
+    try:
+        with profile_run(args.command, args.profile) as profile_outputs:
+            args.func(args)
+    except scoring_client.ScoringServiceError as e:
+        print(f"Error: {e}\nStart the service with 'python cli.py serve' or pass --local.", file=sys.stderr)
+        return 1
+    for path in profile_outputs:
+        print(f"Profile written to {path}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
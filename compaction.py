@@ -0,0 +1,142 @@
+import re
+import time
+import threading
+from functools import lru_cache
+import numpy as np
+
+# Resume tokens sent to the LLM per prompt; None sends the full text
+LLM_RESUME_TOKEN_BUDGET = 350
+SUMMARY_RESUME_TOKEN_BUDGET = 500
+
+SENTENCE_SPLIT = re.compile(r"(?<=[.!?;])\s+|\n+")
+
+# Running totals for the report: calls, tokens_before, tokens_after
+COMPACTION_STATS = {"calls": 0, "tokens_before": 0, "tokens_after": 0}
+# Compaction runs in LLM executor threads and service handlers at once
+_stats_lock = threading.Lock()
+
+def estimate_tokens(text):
+    """Rough LLaMA token count (about 4 tokens per 3 words)."""
+    return (len(text.split()) * 4 + 2) // 3
+
+def split_sentences(text):
+    return [s.strip() for s in SENTENCE_SPLIT.split(text) if s and s.strip()]
+
+@lru_cache(maxsize=32)
+def _requirement_embeddings(jd_text):
+    # One embedding per JD requirement line, reused for every resume in a run
+    from scorer import get_bert_model
+    requirements = split_sentences(jd_text) or [jd_text]
+    return get_bert_model().encode(requirements, normalize_embeddings=True)
+
+def _select(sentences, jd_text, budget):
+    """Indices of the sentences to keep, in their original order.
+
+    Requirements take turns picking their most similar remaining sentence,
+    so every requirement is covered before any gets a second pick.
+    """
+    from scorer import get_bert_model
+    costs = [estimate_tokens(s) for s in sentences]
+    sims = get_bert_model().encode(sentences, normalize_embeddings=True) @ _requirement_embeddings(jd_text).T
+    ranked = np.argsort(-sims, axis=0)
+
+    kept = set()
+    used = 0
+    for rank in range(len(sentences)):
+        for column in ranked[rank]:
+            idx = int(column)
+            if idx in kept or used + costs[idx] > budget:
+                continue
+            kept.add(idx)
+            used += costs[idx]
+        if used >= budget:
+            break
+    return sorted(kept)
+
+def _record(before, after):
+    with _stats_lock:
+        COMPACTION_STATS["calls"] += 1
+        COMPACTION_STATS["tokens_before"] += before
+        COMPACTION_STATS["tokens_after"] += after
+
+def compact_text(text, jd_text, budget=SUMMARY_RESUME_TOKEN_BUDGET):
+    """Keep the sentences of `text` most relevant to the JD, within `budget` tokens."""
+    before = estimate_tokens(text)
+    if not budget or before <= budget:
+        return text
+    sentences = split_sentences(text)
+    compacted = "\n".join(sentences[i] for i in _select(sentences, jd_text, budget))
+    _record(before, estimate_tokens(compacted))
+    return compacted
+
+def compact_sections(sections, jd_text, budget=LLM_RESUME_TOKEN_BUDGET, keys=("skills", "experience", "projects")):
+    """Compact the given resume sections jointly within `budget` tokens.
+
+    Sentences compete across sections, and the survivors are returned under
+    their original section in their original order.
+    """
+    before = sum(estimate_tokens(sections.get(key, "")) for key in keys)
+    if not budget or before <= budget:
+        return sections
+    owners = []
+    sentences = []
+    for key in keys:
+        for sentence in split_sentences(sections.get(key, "")):
+            owners.append(key)
+            sentences.append(sentence)
+
+    kept = {key: [] for key in keys}
+    for idx in _select(sentences, jd_text, budget):
+        kept[owners[idx]].append(sentences[idx])
+    compacted = {**sections, **{key: "\n".join(lines) for key, lines in kept.items()}}
+    _record(before, sum(estimate_tokens(compacted[key]) for key in keys))
+    return compacted
+
+def compaction_report():
+    """Tokens saved so far by compaction."""
+    with _stats_lock:
+        stats = dict(COMPACTION_STATS)
+    before = stats["tokens_before"]
+    after = stats["tokens_after"]
+    return {
+        **stats,
+        "tokens_saved": before - after,
+        "saved_pct": round(100 * (before - after) / before, 1) if before else 0.0
+    }
+
+def evaluate_compaction(jd_text, analyses, budget=LLM_RESUME_TOKEN_BUDGET):
+    """Compare LLaMA scores and latency with and without compaction.
+
+    `analyses` maps resume names to DocumentAnalysis. Returns a DataFrame with
+    one row per resume plus a summary dict (tokens saved, latency reduction,
+    mean absolute score difference and rank correlation).
+    """
+    import pandas as pd
+    from scorer import llama_similarity, preprocess_jd, extract_job_role
+
+    processed_jd = preprocess_jd(jd_text)
+    job_role = extract_job_role(jd_text)
+    keys = ("skills", "experience", "projects")
+    rows = []
+    for name, analysis in analyses.items():
+        row = {"resume": name}
+        for label, token_budget in (("full", None), ("compact", budget)):
+            sections = compact_sections(analysis.sections, processed_jd, token_budget)
+            started = time.perf_counter()
+            row[f"{label}_score"] = llama_similarity(processed_jd, sections, job_role, token_budget=None)
+            row[f"{label}_seconds"] = time.perf_counter() - started
+            row[f"{label}_tokens"] = sum(estimate_tokens(sections.get(key, "")) for key in keys)
+        rows.append(row)
+
+    df = pd.DataFrame(rows)
+    full_seconds = df["full_seconds"].sum()
+    summary = {
+        "resumes": len(df),
+        "tokens_saved": int(df["full_tokens"].sum() - df["compact_tokens"].sum()),
+        "tokens_saved_pct": round(100 * (1 - df["compact_tokens"].sum() / max(df["full_tokens"].sum(), 1)), 1),
+        "latency_reduction_pct": round(100 * (1 - df["compact_seconds"].sum() / full_seconds), 1) if full_seconds else 0.0,
+        "mean_abs_score_diff": round(float((df["full_score"] - df["compact_score"]).abs().mean()), 3),
+        "rank_correlation": round(float(df["full_score"].corr(df["compact_score"], method="spearman")), 3)
+        if len(df) > 1 else None
+    }
+    return df, summary
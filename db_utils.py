@@ -1,7 +1,10 @@
 import os
 import sqlite3
+import numpy as np
 import pandas as pd
 import glob
+import json
+from datetime import datetime
 
 UPLOAD_DIR = "uploaded_data"
 DB_PATH = os.path.join(UPLOAD_DIR, "scores.db")
@@ -9,6 +12,8 @@ DB_PATH = os.path.join(UPLOAD_DIR, "scores.db")
 def init_db():
     os.makedirs(UPLOAD_DIR, exist_ok=True)
     conn = sqlite3.connect(DB_PATH)
+    # WAL lets readers and worker processes use the database concurrently
+    conn.execute("PRAGMA journal_mode=WAL")
     c = conn.cursor()
     c.execute('''CREATE TABLE IF NOT EXISTS scores (
                     jd TEXT,
@@ -17,18 +22,501 @@ def init_db():
                     score REAL,
                     timestamp TEXT
                 )''')
+    c.execute('''CREATE TABLE IF NOT EXISTS score_components (
+                    jd TEXT,
+                    resume TEXT,
+                    sim_skills REAL,
+                    sim_experience REAL,
+                    sim_projects REAL,
+                    sim_other REAL,
+                    llama_score REAL,
+                    keyword_overlap REAL,
+                    timestamp TEXT,
+                    PRIMARY KEY (jd, resume)
+                )''')
+    c.execute('''CREATE TABLE IF NOT EXISTS resume_fingerprints (
+                    resume TEXT PRIMARY KEY,
+                    signature BLOB,
+                    created_at TEXT
+                )''')
+    c.execute('''CREATE TABLE IF NOT EXISTS lsh_buckets (
+                    bucket TEXT,
+                    resume TEXT
+                )''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_lsh_buckets_bucket ON lsh_buckets (bucket)")
+    # Inverted index for BM25 search over resumes
+    c.execute('''CREATE TABLE IF NOT EXISTS search_docs (
+                    resume TEXT PRIMARY KEY,
+                    resume_hash TEXT,
+                    length REAL,
+                    indexed_at TEXT
+                )''')
+    c.execute('''CREATE TABLE IF NOT EXISTS search_postings (
+                    term TEXT,
+                    resume TEXT,
+                    tf REAL,
+                    PRIMARY KEY (term, resume)
+                ) WITHOUT ROWID''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_search_postings_resume ON search_postings (resume)")
+    # Sentence embeddings by text digest, so unchanged resume sections are never re-encoded
+    c.execute('''CREATE TABLE IF NOT EXISTS embedding_cache (
+                    text_hash TEXT,
+                    model TEXT,
+                    vector BLOB,
+                    PRIMARY KEY (text_hash, model)
+                ) WITHOUT ROWID''')
+    # Every saved text of a JD; processed_hash covers what preprocess_jd keeps
+    c.execute('''CREATE TABLE IF NOT EXISTS jd_versions (
+                    jd TEXT,
+                    version INTEGER,
+                    text TEXT,
+                    processed_hash TEXT,
+                    job_role TEXT,
+                    saved_at TEXT,
+                    PRIMARY KEY (jd, version)
+                )''')
+    c.execute('''CREATE TABLE IF NOT EXISTS resume_blobs (
+                    hash TEXT PRIMARY KEY,
+                    size INTEGER,
+                    created_at TEXT
+                )''')
+    c.execute('''CREATE TABLE IF NOT EXISTS resume_names (
+                    name TEXT PRIMARY KEY,
+                    hash TEXT,
+                    uploaded_at TEXT
+                )''')
+    c.execute('''CREATE TABLE IF NOT EXISTS work_items (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    jd TEXT,
+                    resume TEXT,
+                    resume_hash TEXT,
+                    path TEXT,
+                    status TEXT DEFAULT 'pending',
+                    lease_owner TEXT,
+                    lease_expires REAL,
+                    attempts INTEGER DEFAULT 0,
+                    error TEXT,
+                    created_at TEXT,
+                    finished_at TEXT,
+                    UNIQUE (jd, resume)
+                )''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_work_items_status ON work_items (status, lease_expires)")
+    c.execute('''CREATE TABLE IF NOT EXISTS weight_profiles (
+                    name TEXT PRIMARY KEY,
+                    profile TEXT,
+                    updated_at TEXT
+                )''')
+    # Columns added after the original schema
+    _add_column(c, "scores", "resume_hash", "TEXT")
+    _add_column(c, "score_components", "resume_hash", "TEXT")
+    _add_column(c, "resume_fingerprints", "candidate", "TEXT")
+    # Scored without the LLM because it was unavailable; eligible for backfill
+    _add_column(c, "scores", "degraded", "INTEGER DEFAULT 0")
+    # Weighted skill-taxonomy overlap; NULL for rows scored before it existed
+    _add_column(c, "score_components", "skill_overlap", "REAL")
+    # Pipeline version stamps: JSON of per-component versions, and their digest
+    _add_column(c, "score_components", "versions", "TEXT")
+    _add_column(c, "scores", "fingerprint", "TEXT")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_scores_jd ON scores (jd, score)")
+    conn.commit()
+    conn.close()
+
+def _add_column(cursor, table, column, column_type):
+    """Add a column to an existing table if it is missing."""
+    columns = {row[1] for row in cursor.execute(f"PRAGMA table_info({table})")}
+    if column not in columns:
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+
+def load_scores(jd_name=None):
+    conn = sqlite3.connect(DB_PATH)
+    if jd_name is None:
+        df = pd.read_sql_query("SELECT * FROM scores", conn)
+    else:
+        df = pd.read_sql_query("SELECT * FROM scores WHERE jd = ?", conn, params=[jd_name])
+    conn.close()
+    return df
+
+SORTABLE_COLUMNS = ["score", "resume", "email", "timestamp"]
+
+def profile_score_sql(weights, mix):
+    """SQL expression recomputing the final score from score_components (alias c).
+
+    Mirrors scorer.rescore_components so results can be re-ranked, filtered
+    and paginated by SQLite. The expression is checked against it and None
+    (rank by stored scores) is returned if the two disagree.
+    """
+    w_total = sum(weights.values()) or 1.0
+    m_total = sum(mix.values()) or 1.0
+    w = {k: float(v) / w_total for k, v in weights.items()}
+    m = {k: float(v) / m_total for k, v in mix.items()}
+    w_exp = (f"(CASE WHEN c.sim_experience IS NULL THEN 0 "
+             f"WHEN c.sim_projects IS NULL THEN {w['experience'] + w['projects']!r} ELSE {w['experience']!r} END)")
+    w_prj = (f"(CASE WHEN c.sim_projects IS NULL THEN 0 "
+             f"WHEN c.sim_experience IS NULL THEN {w['projects'] + w['experience']!r} ELSE {w['projects']!r} END)")
+    bert = (f"({w['skills']!r} * COALESCE(c.sim_skills, 0) + {w_exp} * COALESCE(c.sim_experience, 0) + "
+            f"{w_prj} * COALESCE(c.sim_projects, 0) + {w['other']!r} * COALESCE(c.sim_other, 0))")
+    m_skill = m.get("skill", 0.0)
+    no_llm = max(m["bert"] + m["keyword"] + m_skill, 1e-9)
+    lexical = (f"{m['keyword']!r} * c.keyword_overlap + "
+               f"{m_skill!r} * COALESCE(c.skill_overlap, c.keyword_overlap)")
+    score_sql = (f"(CASE WHEN c.jd IS NULL THEN s.score "
+                 f"WHEN c.llama_score IS NULL THEN ROUND(100 * ({m['bert']!r} * {bert} + {lexical}) / {no_llm!r}, 2) "
+                 f"ELSE ROUND(100 * ({m['bert']!r} * {bert} + {m['llama']!r} * c.llama_score + "
+                 f"{lexical}), 2) END)")
+    if not _score_sql_matches(score_sql, weights, mix):
+        print("ERROR - Profile score SQL disagrees with scorer.rescore_components; ranking by stored scores")
+        return None
+    return score_sql
+
+def _score_sql_matches(score_sql, weights, mix):
+    """True if `score_sql` gives the scores scorer.rescore_components does.
+
+    Compared on rows covering every combination of missing components.
+    """
+    from itertools import product
+    from scorer import rescore_components
+
+    optional = ["sim_experience", "sim_projects", "sim_other", "llama_score", "skill_overlap"]
+    base = dict(zip(COMPONENT_COLUMNS, [0.61, 0.47, 0.83, 0.29, 0.72, 0.35, 0.54]))
+    samples = pd.DataFrame(
+        [
+            {**base, **{col: None for col, missing in zip(optional, mask) if missing}}
+            for mask in product([False, True], repeat=len(optional))
+        ],
+        columns=COMPONENT_COLUMNS, dtype=float
+    )
+    samples["jd"] = "check"
+    conn = sqlite3.connect(":memory:")
+    try:
+        samples.to_sql("c", conn, index=False)
+        from_sql = [row[0] for row in conn.execute(f"SELECT {score_sql} FROM c, (SELECT NULL AS score) s")]
+    finally:
+        conn.close()
+    # Both round to 2 decimals, which may differ by one step on ties
+    return bool(np.allclose(from_sql, rescore_components(samples, weights, mix), atol=0.011))
+
+def _results_query(select, jd_name, min_score=None, search=None, score_sql=None, group_variants=False):
+    """Build the SQL and params for a JD's (optionally grouped) result rows."""
+    filters = ["1 = 1"]
+    params = [jd_name]
+    if min_score is not None:
+        filters.append("score >= ?")
+        params.append(min_score)
+    if search:
+        filters.append("(resume LIKE ? OR email LIKE ?)")
+        params += [f"%{search}%", f"%{search}%"]
+    if group_variants:
+        filters.append("variant_rank = 1")
+
+    sql = f"""
+        WITH ranked AS (
+            SELECT s.jd, s.resume, s.email, {score_sql or "s.score"} AS score, s.timestamp, s.resume_hash, s.degraded,
+                   COALESCE(f.candidate, s.resume) AS candidate
+            FROM scores s
+            LEFT JOIN score_components c ON c.jd = s.jd AND c.resume = s.resume
+            LEFT JOIN resume_fingerprints f ON f.resume = s.resume
+            WHERE s.jd = ?
+        ), grouped AS (
+            SELECT *,
+                   ROW_NUMBER() OVER (PARTITION BY candidate ORDER BY score DESC) AS variant_rank,
+                   COUNT(*) OVER (PARTITION BY candidate) AS variants
+            FROM ranked
+        )
+        SELECT {select} FROM grouped WHERE {' AND '.join(filters)}"""
+    return sql, params
+
+def count_scores(jd_name, min_score=None, search=None, score_sql=None, group_variants=False):
+    """Number of result rows matching the filters."""
+    sql, params = _results_query("COUNT(*)", jd_name, min_score, search, score_sql, group_variants)
+    conn = sqlite3.connect(DB_PATH)
+    total = conn.execute(sql, params).fetchone()[0]
+    conn.close()
+    return total
+
+def query_scores(jd_name, order_by="score", ascending=False, min_score=None, search=None,
+                 limit=50, offset=0, score_sql=None, group_variants=False):
+    """Fetch one page of a JD's results, with sorting and filtering done in SQL."""
+    if order_by not in SORTABLE_COLUMNS:
+        raise ValueError(f"Cannot sort by {order_by}")
+    columns = "jd, resume, email, score, timestamp, resume_hash, degraded"
+    if group_variants:
+        columns += ", candidate, variants"
+    sql, params = _results_query(columns, jd_name, min_score, search, score_sql, group_variants)
+    sql += f" ORDER BY {order_by} {'ASC' if ascending else 'DESC'}, resume LIMIT ? OFFSET ?"
+    conn = sqlite3.connect(DB_PATH)
+    df = pd.read_sql_query(sql, conn, params=params + [limit, offset])
+    conn.close()
+    return df
+
+def export_scores(file_path, fmt="csv", batch_size=1000):
+    """Write the full scores table to disk from cursor batches.
+
+    Memory stays bounded by `batch_size` rows. Parquet output needs pyarrow.
+    """
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        cursor = conn.execute("SELECT * FROM scores ORDER BY jd, score DESC")
+        columns = [d[0] for d in cursor.description]
+        if fmt == "parquet":
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            # Schema from the declared column types: a batch of legacy rows that
+            # are all NULL in a column must not decide that column's type
+            arrow_types = {"TEXT": pa.string(), "REAL": pa.float64(), "INTEGER": pa.int64()}
+            declared = {row[1]: row[2].split()[0].upper() if row[2] else ""
+                        for row in conn.execute("PRAGMA table_info(scores)")}
+            schema = pa.schema([(column, arrow_types.get(declared.get(column), pa.string())) for column in columns])
+            with pq.ParquetWriter(file_path, schema) as writer:
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    writer.write_table(pa.Table.from_pydict(
+                        {column: [row[i] for row in rows] for i, column in enumerate(columns)}, schema=schema
+                    ))
+        else:
+            with open(file_path, 'w', encoding='utf-8', newline='') as f:
+                pd.DataFrame(columns=columns).to_csv(f, index=False)
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    pd.DataFrame(rows, columns=columns).to_csv(f, header=False, index=False)
+    finally:
+        conn.close()
+    return file_path
+
+COMPONENT_COLUMNS = [
+    "sim_skills", "sim_experience", "sim_projects", "sim_other",
+    "llama_score", "keyword_overlap", "skill_overlap"
+]
+
+def write_score_results(conn, jd_name, results):
+    """Insert scores and components for scored resumes on an open connection.
+
+    `results` are dicts with name, email, scores and optional resume_hash.
+    The caller owns the transaction, so several writes can commit atomically.
+    """
+    now = datetime.now().isoformat()
+    conn.executemany(
+        "INSERT INTO scores (jd, resume, email, score, timestamp, resume_hash, degraded, fingerprint) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        [
+            (jd_name, r["name"], r["email"], r["scores"]["final_score"], now, r.get("resume_hash"),
+             int(r["scores"].get("degraded", False)), r["scores"].get("fingerprint"))
+            for r in results
+        ]
+    )
+    conn.executemany(
+        f"INSERT OR REPLACE INTO score_components (jd, resume, resume_hash, {', '.join(COMPONENT_COLUMNS)}, versions, timestamp) "
+        f"VALUES (?, ?, ?, {', '.join('?' for _ in COMPONENT_COLUMNS)}, ?, ?)",
+        [
+            [jd_name, r["name"], r.get("resume_hash")]
+            + [r["scores"]["components"].get(col) for col in COMPONENT_COLUMNS]
+            + [json.dumps(r["scores"]["versions"]) if r["scores"].get("versions") else None, now]
+            for r in results
+        ]
+    )
+
+def load_score_components(jd_name=None):
+    """Load stored scoring components, optionally for a single JD."""
+    conn = sqlite3.connect(DB_PATH)
+    if jd_name is None:
+        df = pd.read_sql_query("SELECT * FROM score_components", conn)
+    else:
+        df = pd.read_sql_query("SELECT * FROM score_components WHERE jd = ?", conn, params=[jd_name])
+    conn.close()
+    return df
+
+def update_scores(df):
+    """Overwrite the final score of existing rows from a jd/resume/score DataFrame."""
+    conn = sqlite3.connect(DB_PATH)
+    conn.executemany(
+        "UPDATE scores SET score = ? WHERE jd = ? AND resume = ?",
+        zip(df["score"].astype(float), df["jd"], df["resume"])
+    )
     conn.commit()
     conn.close()
 
-def load_scores():
+def load_degraded_scores(jd_name=None, limit=None):
+    """Degraded score rows joined with their stored components."""
+    sql = """SELECT s.jd, s.resume, s.resume_hash, c.sim_skills, c.sim_experience, c.sim_projects,
+                    c.sim_other, c.llama_score, c.keyword_overlap, c.skill_overlap
+             FROM scores s JOIN score_components c ON c.jd = s.jd AND c.resume = s.resume
+             WHERE s.degraded = 1"""
+    params = []
+    if jd_name is not None:
+        sql += " AND s.jd = ?"
+        params.append(jd_name)
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(limit)
     conn = sqlite3.connect(DB_PATH)
-    df = pd.read_sql_query("SELECT * FROM scores", conn)
+    df = pd.read_sql_query(sql, conn, params=params)
     conn.close()
     return df
 
-def save_scores_to_db(df):
+def complete_backfill(jd_name, resume_name, llama_score, final_score):
+    """Store a backfilled LLaMA score and clear the degraded flag."""
     conn = sqlite3.connect(DB_PATH)
-    df.to_sql("scores", conn, if_exists='append', index=False)
+    conn.execute("UPDATE score_components SET llama_score = ? WHERE jd = ? AND resume = ?",
+                 (llama_score, jd_name, resume_name))
+    conn.execute("UPDATE scores SET score = ?, degraded = 0 WHERE jd = ? AND resume = ?",
+                 (final_score, jd_name, resume_name))
+    conn.commit()
+    conn.close()
+
+def _load_components(where, params, jd_name=None, limit=None):
+    sql = f"""SELECT s.jd, s.resume, s.resume_hash, s.degraded, {', '.join('c.' + col for col in COMPONENT_COLUMNS)},
+                     c.versions
+              FROM scores s JOIN score_components c ON c.jd = s.jd AND c.resume = s.resume
+              WHERE {where}"""
+    params = list(params)
+    if jd_name is not None:
+        sql += " AND s.jd = ?"
+        params.append(jd_name)
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(limit)
+    conn = sqlite3.connect(DB_PATH)
+    df = pd.read_sql_query(sql, conn, params=params)
+    conn.close()
+    return df
+
+def load_stale_components(fingerprint, jd_name=None, limit=None):
+    """Score rows not stamped with `fingerprint`, joined with their stored components."""
+    return _load_components("(s.fingerprint IS NULL OR s.fingerprint != ?)", [fingerprint], jd_name, limit)
+
+def count_stale_components(fingerprint):
+    """Number of rows load_stale_components can re-score.
+
+    Rows scored before components were stored have nothing to recompute
+    from, so they are not counted.
+    """
+    conn = sqlite3.connect(DB_PATH)
+    count = conn.execute(
+        """SELECT COUNT(*) FROM scores s JOIN score_components c ON c.jd = s.jd AND c.resume = s.resume
+           WHERE s.fingerprint IS NULL OR s.fingerprint != ?""",
+        (fingerprint,)
+    ).fetchone()[0]
+    conn.close()
+    return count
+
+def load_jd_components(jd_name):
+    """All score rows of a JD joined with their stored components."""
+    return _load_components("1 = 1", [], jd_name)
+
+def save_rescored(df):
+    """Write re-scored components, versions and final scores back in one transaction.
+
+    `df` has jd, resume, the COMPONENT_COLUMNS, versions (JSON), fingerprint,
+    score and degraded columns.
+    """
+    conn = sqlite3.connect(DB_PATH, timeout=30)
+    try:
+        conn.executemany(
+            f"UPDATE score_components SET {', '.join(col + ' = ?' for col in COMPONENT_COLUMNS)}, versions = ? "
+            f"WHERE jd = ? AND resume = ?",
+            [
+                [None if pd.isna(row[col]) else float(row[col]) for col in COMPONENT_COLUMNS]
+                + [row["versions"], row["jd"], row["resume"]]
+                for _, row in df.iterrows()
+            ]
+        )
+        conn.executemany(
+            "UPDATE scores SET score = ?, degraded = ?, fingerprint = ? WHERE jd = ? AND resume = ?",
+            [
+                (float(row["score"]), int(row["degraded"]), row["fingerprint"], row["jd"], row["resume"])
+                for _, row in df.iterrows()
+            ]
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+def load_embeddings(model, text_hashes):
+    """{text_hash: float32 vector} for the cached embeddings among `text_hashes`."""
+    text_hashes = list(text_hashes)
+    vectors = {}
+    conn = sqlite3.connect(DB_PATH, timeout=30)
+    try:
+        for start in range(0, len(text_hashes), 500):
+            chunk = text_hashes[start:start + 500]
+            rows = conn.execute(
+                f"SELECT text_hash, vector FROM embedding_cache WHERE model = ? "
+                f"AND text_hash IN ({','.join('?' for _ in chunk)})",
+                [model] + chunk
+            )
+            vectors.update((text_hash, np.frombuffer(vector, dtype=np.float32)) for text_hash, vector in rows)
+    finally:
+        conn.close()
+    return vectors
+
+def save_embeddings(model, vectors):
+    """Cache {text_hash: vector} embeddings for `model`."""
+    conn = sqlite3.connect(DB_PATH, timeout=30)
+    try:
+        conn.executemany(
+            "INSERT OR IGNORE INTO embedding_cache (text_hash, model, vector) VALUES (?, ?, ?)",
+            [(text_hash, model, np.asarray(vector, dtype=np.float32).tobytes()) for text_hash, vector in vectors.items()]
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+def save_jd_version(jd_name, text, processed_hash, job_role):
+    """Record a new saved text of a JD; returns its version number."""
+    conn = sqlite3.connect(DB_PATH, timeout=30)
+    try:
+        row = conn.execute("SELECT MAX(version) FROM jd_versions WHERE jd = ?", (jd_name,)).fetchone()
+        version = (row[0] or 0) + 1
+        conn.execute(
+            "INSERT INTO jd_versions (jd, version, text, processed_hash, job_role, saved_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (jd_name, version, text, processed_hash, job_role, datetime.now().isoformat())
+        )
+        conn.commit()
+    finally:
+        conn.close()
+    return version
+
+def load_jd_versions(jd_name):
+    """Saved versions of a JD, newest first."""
+    conn = sqlite3.connect(DB_PATH)
+    df = pd.read_sql_query(
+        "SELECT version, saved_at, job_role, processed_hash, text FROM jd_versions WHERE jd = ? ORDER BY version DESC",
+        conn, params=[jd_name])
+    conn.close()
+    return df
+
+def pipeline_versions_summary():
+    """Score rows per pipeline fingerprint, most recent first."""
+    conn = sqlite3.connect(DB_PATH)
+    df = pd.read_sql_query(
+        "SELECT fingerprint, COUNT(*) AS rows, MAX(timestamp) AS last_scored FROM scores "
+        "GROUP BY fingerprint ORDER BY last_scored DESC", conn)
+    conn.close()
+    return df
+
+def save_weight_profile(name, profile):
+    """Save a named weight profile ({"weights": {...}, "mix": {...}})."""
+    conn = sqlite3.connect(DB_PATH)
+    conn.execute(
+        "INSERT OR REPLACE INTO weight_profiles (name, profile, updated_at) VALUES (?, ?, ?)",
+        (name, json.dumps(profile), datetime.now().isoformat())
+    )
+    conn.commit()
+    conn.close()
+
+def load_weight_profiles():
+    """Return all saved weight profiles as a name -> profile dict."""
+    conn = sqlite3.connect(DB_PATH)
+    rows = conn.execute("SELECT name, profile FROM weight_profiles ORDER BY name").fetchall()
+    conn.close()
+    return {name: json.loads(profile) for name, profile in rows}
+
+def delete_weight_profile(name):
+    conn = sqlite3.connect(DB_PATH)
+    conn.execute("DELETE FROM weight_profiles WHERE name = ?", (name,))
     conn.commit()
     conn.close()
 
@@ -44,6 +532,9 @@ def delete_jds(jd_files):
         # Delete from database
         placeholders = ','.join(['?' for _ in jd_files])
         c.execute(f"DELETE FROM scores WHERE jd IN ({placeholders})", jd_files)
+        c.execute(f"DELETE FROM score_components WHERE jd IN ({placeholders})", jd_files)
+        c.execute(f"DELETE FROM jd_versions WHERE jd IN ({placeholders})", jd_files)
+        c.execute(f"DELETE FROM work_items WHERE jd IN ({placeholders})", jd_files)
         conn.commit()
 
         # Delete files
@@ -76,6 +567,10 @@ def delete_resumes(jd_name, resume_names):
         placeholders = ','.join(['?' for _ in resume_names])
         c.execute(f"DELETE FROM scores WHERE jd = ? AND resume IN ({placeholders})", 
                  [jd_name] + resume_names)
+        c.execute(f"DELETE FROM score_components WHERE jd = ? AND resume IN ({placeholders})",
+                 [jd_name] + resume_names)
+        c.execute(f"DELETE FROM work_items WHERE jd = ? AND resume IN ({placeholders})",
+                 [jd_name] + resume_names)
         conn.commit()
         
         # Delete associated summaries
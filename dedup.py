@@ -0,0 +1,130 @@
+import re
+import sqlite3
+import zlib
+from datetime import datetime
+import numpy as np
+from db_utils import DB_PATH
+
+# MinHash / LSH parameters: 16 bands x 8 rows puts the LSH threshold near 0.7 Jaccard
+NUM_PERM = 128
+LSH_BANDS = 16
+LSH_ROWS = NUM_PERM // LSH_BANDS
+SHINGLE_SIZE = 5
+
+# Variants at or above this estimated Jaccard similarity are treated as the same candidate
+DUPLICATE_THRESHOLD = 0.85
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_rng = np.random.RandomState(42)
+_PERM_A = _rng.randint(1, 1 << 32, size=NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.randint(0, 1 << 32, size=NUM_PERM, dtype=np.uint64)
+# Signature older versions stored for documents without text
+_EMPTY_HASH = np.iinfo(np.uint64).max
+
+def shingles(text, k=SHINGLE_SIZE):
+    """Word k-shingles of a document, hashed to 32-bit integers."""
+    words = re.findall(r'\w+', text.lower())
+    if len(words) < k:
+        return {zlib.crc32(" ".join(words).encode())} if words else set()
+    return {zlib.crc32(" ".join(words[i:i + k]).encode()) for i in range(len(words) - k + 1)}
+
+def minhash_signature(text):
+    """Compute the MinHash signature of a document, or None if it has no words.
+
+    Image-only or scanned PDFs yield no text; giving them all the same
+    signature would make every such resume a "duplicate" of every other.
+    """
+    hashes = np.fromiter(shingles(text), dtype=np.uint64)
+    if hashes.size == 0:
+        return None
+    # (a * x + b) mod p for every permutation and shingle at once
+    permuted = (np.outer(hashes, _PERM_A) + _PERM_B) % _MERSENNE_PRIME
+    return permuted.min(axis=0).astype(np.uint64)
+
+def estimate_similarity(sig_a, sig_b):
+    """Estimated Jaccard similarity of two MinHash signatures."""
+    return float(np.mean(sig_a == sig_b))
+
+def _band_buckets(signature):
+    return [
+        f"{band}:{zlib.crc32(signature[band * LSH_ROWS:(band + 1) * LSH_ROWS].tobytes()):08x}"
+        for band in range(LSH_BANDS)
+    ]
+
+def has_fingerprint(resume_name):
+    conn = sqlite3.connect(DB_PATH)
+    row = conn.execute("SELECT 1 FROM resume_fingerprints WHERE resume = ?", (resume_name,)).fetchone()
+    conn.close()
+    return row is not None
+
+def register_resume(resume_name, resume_text):
+    """Fingerprint a resume, add it to the LSH index and assign its candidate group.
+
+    The group (candidate) is taken from the most similar already indexed
+    near-duplicate, so grouping can be done in SQL. Resumes without text
+    are not fingerprinted (and an older fingerprint is dropped), so they never
+    match anything. Returns the signature, or None.
+    """
+    signature = minhash_signature(resume_text)
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        conn.execute("DELETE FROM lsh_buckets WHERE resume = ?", (resume_name,))
+        if signature is None:
+            conn.execute("DELETE FROM resume_fingerprints WHERE resume = ?", (resume_name,))
+            conn.commit()
+            return None
+        conn.execute(
+            "INSERT OR REPLACE INTO resume_fingerprints (resume, signature, created_at, candidate) VALUES (?, ?, ?, ?)",
+            (resume_name, signature.tobytes(), datetime.now().isoformat(), resume_name)
+        )
+        conn.executemany(
+            "INSERT INTO lsh_buckets (bucket, resume) VALUES (?, ?)",
+            [(bucket, resume_name) for bucket in _band_buckets(signature)]
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+    duplicates = find_near_duplicates(resume_name)
+    if duplicates:
+        conn = sqlite3.connect(DB_PATH)
+        conn.execute(
+            """UPDATE resume_fingerprints SET candidate = (
+                   SELECT COALESCE(candidate, resume) FROM resume_fingerprints WHERE resume = ?)
+               WHERE resume = ?""",
+            (duplicates[0][0], resume_name)
+        )
+        conn.commit()
+        conn.close()
+    return signature
+
+def find_near_duplicates(resume_name, threshold=DUPLICATE_THRESHOLD):
+    """Return [(resume, similarity)] of indexed near-duplicates, most similar first."""
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        row = conn.execute("SELECT signature FROM resume_fingerprints WHERE resume = ?", (resume_name,)).fetchone()
+        if row is None:
+            return []
+        signature = np.frombuffer(row[0], dtype=np.uint64)
+        if (signature == _EMPTY_HASH).all():
+            return []
+        buckets = _band_buckets(signature)
+        placeholders = ','.join('?' for _ in buckets)
+        candidates = conn.execute(
+            f"""SELECT f.resume, f.signature FROM resume_fingerprints f
+                WHERE f.resume != ? AND f.resume IN (
+                    SELECT resume FROM lsh_buckets WHERE bucket IN ({placeholders}))""",
+            [resume_name] + buckets
+        ).fetchall()
+    finally:
+        conn.close()
+
+    matches = []
+    for other, other_sig in candidates:
+        other_sig = np.frombuffer(other_sig, dtype=np.uint64)
+        if (other_sig == _EMPTY_HASH).all():
+            continue
+        similarity = estimate_similarity(signature, other_sig)
+        if similarity >= threshold:
+            matches.append((other, similarity))
+    return sorted(matches, key=lambda m: m[1], reverse=True)
@@ -0,0 +1,81 @@
+import os
+import glob
+import difflib
+import hashlib
+from db_utils import UPLOAD_DIR, save_jd_version, load_jd_versions
+
+JD_DIR = os.path.join(UPLOAD_DIR, "jds")
+SUMMARY_DIR = os.path.join(UPLOAD_DIR, "summaries")
+
+# Edits to the kept requirements at least this similar (difflib ratio), e.g.
+# typo fixes, keep their LLaMA scores; larger edits re-ask the LLM
+JD_MINOR_EDIT_RATIO = 0.97
+
+def _processed_hash(processed_jd):
+    return hashlib.sha1(processed_jd.encode("utf-8")).hexdigest()[:12]
+
+def plan_jd_edit(old_text, new_text):
+    """Score components an edit of a JD invalidates.
+
+    Only the part of a JD that preprocess_jd keeps (and the job role, which
+    goes into the LLaMA prompt) is used for scoring, so edits elsewhere
+    invalidate nothing.
+    """
+    from scorer import preprocess_jd, extract_job_role
+
+    old_processed, new_processed = preprocess_jd(old_text), preprocess_jd(new_text)
+    parts = set()
+    if old_processed != new_processed:
+        parts.update(("bert", "keyword", "skill"))
+        if difflib.SequenceMatcher(None, old_processed, new_processed).ratio() < JD_MINOR_EDIT_RATIO:
+            parts.add("llama")
+    if extract_job_role(old_text) != extract_job_role(new_text):
+        parts.add("llama")
+    return parts
+
+def _record(jd_name, text):
+    from scorer import preprocess_jd, extract_job_role
+
+    return save_jd_version(jd_name, text, _processed_hash(preprocess_jd(text)), extract_job_role(text))
+
+def save_jd(jd_name, text, use_llm=True):
+    """Save a JD's text as a new version and bring its stored scores up to date.
+
+    Scores carry over when the edit leaves the scored parts unchanged;
+    otherwise only the invalidated components are recomputed (see
+    scoring_service.rescore_jd) and the JD's cached summaries are dropped.
+    The new text is only saved once re-scoring succeeded. Returns (version,
+    recomputed components, rows updated); version is None when the text is
+    unchanged.
+    """
+    from scoring_service import rescore_jd
+
+    path = os.path.join(JD_DIR, jd_name)
+    old_text = None
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            old_text = f.read()
+    if old_text == text:
+        return None, set(), 0
+    if old_text is not None and load_jd_versions(jd_name).empty:
+        # JDs saved before versioning: keep their original text as version 1
+        _record(jd_name, old_text)
+
+    parts = plan_jd_edit(old_text, text) if old_text is not None else set()
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    # Re-score before the new text replaces the old one, so a failure leaves
+    # the file, its versions and its scores all on the old text
+    try:
+        updated = rescore_jd(jd_name, text, parts, use_llm) if parts else 0
+    except Exception:
+        os.remove(tmp_path)
+        raise
+    os.replace(tmp_path, path)
+    version = _record(jd_name, text)
+    if parts:
+        # Summaries were written against the old requirements or job role
+        for summary_file in glob.glob(os.path.join(SUMMARY_DIR, f"{jd_name}_*.txt".replace(" ", "_"))):
+            os.remove(summary_file)
+    return version, parts, updated
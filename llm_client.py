@@ -0,0 +1,235 @@
+import os
+import time
+import random
+import threading
+import ollama
+
+OLLAMA_MODEL = "llama3.2"
+
+def _configured_hosts():
+    # OLLAMA_HOSTS is a comma-separated pool of runners; OLLAMA_HOST a single one
+    hosts = os.environ.get("OLLAMA_HOSTS") or os.environ.get("OLLAMA_HOST", "http://localhost:11434")
+    return [host.strip() for host in hosts.split(",") if host.strip()]
+
+OLLAMA_HOSTS = _configured_hosts()
+# Requests in flight per endpoint; match the runner's OLLAMA_NUM_PARALLEL
+ENDPOINT_CONCURRENCY = int(os.environ.get("OLLAMA_ENDPOINT_CONCURRENCY", "1"))
+HEALTH_CHECK_SECONDS = 15.0
+HEALTH_CHECK_TIMEOUT = 3.0
+
+# Per-call timeout and bounded retries with jittered exponential backoff
+LLM_TIMEOUT = 30.0
+LLM_MAX_RETRIES = 2
+LLM_BACKOFF = 0.5
+
+# Keep the model resident between calls, and use one fixed context size:
+# a different num_ctx makes Ollama reload the model and drop its prompt cache
+KEEP_ALIVE = os.environ.get("OLLAMA_KEEP_ALIVE", "30m")
+NUM_CTX = 4096
+
+# Each endpoint's breaker opens after this many consecutive failures and lets
+# one trial call through once BREAKER_RESET_SECONDS have passed
+BREAKER_FAILURE_THRESHOLD = 5
+BREAKER_RESET_SECONDS = 60.0
+
+class LLMUnavailable(Exception):
+    """No Ollama endpoint could serve the call (failures or open circuit breakers)."""
+
+class _Endpoint:
+    """One Ollama runner with its own concurrency limit and circuit breaker."""
+
+    def __init__(self, host, limit):
+        self.host = host
+        self.limit = limit
+        self.outstanding = 0
+        self.calls = 0
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+        self.clients = {}
+
+    def client(self, timeout):
+        if timeout not in self.clients:
+            self.clients[timeout] = ollama.Client(host=self.host, timeout=timeout)
+        return self.clients[timeout]
+
+    def available(self, now):
+        if self.opened_at is None:
+            return True
+        return now - self.opened_at >= BREAKER_RESET_SECONDS and not self.trial_running
+
+_endpoints = [_Endpoint(host, ENDPOINT_CONCURRENCY) for host in OLLAMA_HOSTS]
+_timings = {"calls": 0, "prompt_tokens": 0, "prompt_eval_seconds": 0.0,
+            "eval_tokens": 0, "eval_seconds": 0.0, "load_seconds": 0.0}
+_lock = threading.Lock()
+_slot_freed = threading.Condition(_lock)
+_health_thread = None
+
+def breaker_open():
+    """True while every endpoint is being short-circuited."""
+    with _lock:
+        now = time.monotonic()
+        return all(
+            endpoint.opened_at is not None and now - endpoint.opened_at < BREAKER_RESET_SECONDS
+            for endpoint in _endpoints
+        )
+
+def pool_capacity():
+    """Concurrent requests the currently healthy endpoints can take (at least 1)."""
+    with _lock:
+        now = time.monotonic()
+        return max(1, sum(endpoint.limit for endpoint in _endpoints if endpoint.available(now)))
+
+def pool_status():
+    """Per-endpoint routing and health state."""
+    with _lock:
+        now = time.monotonic()
+        return [
+            {"host": endpoint.host, "healthy": endpoint.available(now), "outstanding": endpoint.outstanding,
+             "limit": endpoint.limit, "calls": endpoint.calls, "failures": endpoint.failures}
+            for endpoint in _endpoints
+        ]
+
+def _open_breaker(endpoint, reason):
+    if endpoint.opened_at is None or endpoint.trial_running:
+        print(f"WARNING - Ollama endpoint {endpoint.host} circuit breaker open: {reason}")
+    endpoint.opened_at = time.monotonic()
+    endpoint.trial_running = False
+
+def _acquire(timeout):
+    """Reserve the healthy endpoint with the fewest outstanding requests."""
+    _ensure_health_checks()
+    deadline = time.monotonic() + timeout
+    with _slot_freed:
+        while True:
+            now = time.monotonic()
+            healthy = [endpoint for endpoint in _endpoints if endpoint.available(now)]
+            if not healthy:
+                raise LLMUnavailable("LLM circuit breaker is open on every Ollama endpoint")
+            free = [endpoint for endpoint in healthy if endpoint.outstanding < endpoint.limit]
+            if free:
+                endpoint = min(free, key=lambda e: e.outstanding / e.limit)
+                if endpoint.opened_at is not None:
+                    # Half-open: this call is the endpoint's single trial
+                    endpoint.trial_running = True
+                endpoint.outstanding += 1
+                return endpoint
+            if now >= deadline:
+                raise LLMUnavailable("Timed out waiting for a free Ollama endpoint")
+            _slot_freed.wait(deadline - now)
+
+def _release(endpoint, error=None):
+    with _slot_freed:
+        endpoint.outstanding -= 1
+        if error is None:
+            endpoint.calls += 1
+            endpoint.failures = 0
+            endpoint.opened_at = None
+            endpoint.trial_running = False
+        else:
+            endpoint.failures += 1
+            if endpoint.trial_running or endpoint.failures >= BREAKER_FAILURE_THRESHOLD:
+                _open_breaker(endpoint, f"{endpoint.failures} consecutive failure(s), last: {error}")
+        _slot_freed.notify_all()
+
+def _health_loop():
+    """Probe every endpoint periodically, closing or opening its breaker."""
+    while True:
+        for endpoint in _endpoints:
+            try:
+                ollama.Client(host=endpoint.host, timeout=HEALTH_CHECK_TIMEOUT).list()
+                healthy = True
+            except Exception as e:
+                healthy = False
+                reason = f"health check failed: {e}"
+            with _slot_freed:
+                if healthy and endpoint.opened_at is not None and not endpoint.trial_running:
+                    print(f"DEBUG - Ollama endpoint {endpoint.host} is healthy again")
+                    endpoint.opened_at = None
+                    endpoint.failures = 0
+                    _slot_freed.notify_all()
+                elif not healthy and endpoint.opened_at is None:
+                    _open_breaker(endpoint, reason)
+        time.sleep(HEALTH_CHECK_SECONDS)
+
+def _ensure_health_checks():
+    global _health_thread
+    with _lock:
+        if _health_thread is None:
+            _health_thread = threading.Thread(target=_health_loop, daemon=True)
+            _health_thread.start()
+
+def _record_timings(response):
+    # Ollama reports durations in nanoseconds; a reused prompt prefix shows up
+    # as fewer prompt tokens evaluated
+    prompt_tokens = response.get("prompt_eval_count") or 0
+    prompt_seconds = (response.get("prompt_eval_duration") or 0) / 1e9
+    eval_tokens = response.get("eval_count") or 0
+    eval_seconds = (response.get("eval_duration") or 0) / 1e9
+    load_seconds = (response.get("load_duration") or 0) / 1e9
+    with _lock:
+        _timings["calls"] += 1
+        _timings["prompt_tokens"] += prompt_tokens
+        _timings["prompt_eval_seconds"] += prompt_seconds
+        _timings["eval_tokens"] += eval_tokens
+        _timings["eval_seconds"] += eval_seconds
+        _timings["load_seconds"] += load_seconds
+    print(f"DEBUG - LLM prompt eval {prompt_tokens} tokens in {prompt_seconds:.2f}s, "
+          f"eval {eval_tokens} tokens in {eval_seconds:.2f}s, load {load_seconds:.2f}s")
+
+def timing_report():
+    """Totals and per-call means of Ollama's prompt-eval and eval timings."""
+    with _lock:
+        report = dict(_timings)
+    calls = report["calls"] or 1
+    report["mean_prompt_tokens"] = round(report["prompt_tokens"] / calls, 1)
+    report["mean_prompt_eval_seconds"] = round(report["prompt_eval_seconds"] / calls, 3)
+    report["mean_eval_seconds"] = round(report["eval_seconds"] / calls, 3)
+    return report
+
+def preload(model=OLLAMA_MODEL):
+    """Load the model into memory on every endpoint ahead of the first request."""
+    for endpoint in _endpoints:
+        try:
+            # An empty chat loads the model without generating anything
+            endpoint.client(LLM_TIMEOUT).chat(model=model, messages=[], keep_alive=KEEP_ALIVE,
+                                              options={"num_ctx": NUM_CTX})
+        except Exception as e:
+            print(f"WARNING - Could not preload {model} on {endpoint.host}: {e}")
+
+def _retryable(error):
+    # Client errors such as a missing model will not go away by retrying
+    status = getattr(error, "status_code", None)
+    return not (isinstance(error, ollama.ResponseError) and status is not None and status < 500)
+
+def chat(prompt, timeout=LLM_TIMEOUT, retries=LLM_MAX_RETRIES, model=OLLAMA_MODEL, format=None):
+    """Send a single-message chat to Ollama and return the reply text.
+
+    `format` is passed through to Ollama ("json" or a JSON schema dict) to
+    constrain the reply. Each attempt is routed to the healthy endpoint with
+    the fewest requests in flight, so a retry can land on another runner.
+    Raises LLMUnavailable when no endpoint is available or every attempt failed.
+    """
+    last_error = None
+    for attempt in range(retries + 1):
+        endpoint = _acquire(timeout)
+        try:
+            response = endpoint.client(timeout).chat(
+                model=model,
+                messages=[{"role": "user", "content": prompt}],
+                keep_alive=KEEP_ALIVE,
+                options={"num_ctx": NUM_CTX},
+                format=format
+            )
+        except Exception as e:
+            _release(endpoint, e)
+            last_error = e
+            if not _retryable(e) or attempt == retries:
+                break
+            time.sleep(LLM_BACKOFF * (2 ** attempt) * random.uniform(0.5, 1.5))
+            continue
+        _release(endpoint)
+        _record_timings(response)
+        return response["message"]["content"].strip()
+
+    raise LLMUnavailable(f"LLM call failed after {attempt + 1} attempt(s): {last_error}") from last_error
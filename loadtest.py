@@ -0,0 +1,338 @@
+import os
+import re
+import json
+import time
+import random
+import sqlite3
+import threading
+from collections import defaultdict
+import numpy as np
+from db_utils import DB_PATH, UPLOAD_DIR, init_db, delete_jds, delete_resumes
+
+JD_DIR = os.path.join(UPLOAD_DIR, "jds")
+SUMMARY_DIR = os.path.join(UPLOAD_DIR, "summaries")
+
+# Relative frequency of each session action; recruiters mostly browse
+ACTION_MIX = {"browse": 6, "analyze": 2, "search": 2, "upload": 1, "summarize": 1}
+# Mean pause between a session's actions, in seconds (exponentially distributed)
+THINK_SECONDS = 0.5
+RESUMES_PER_ANALYZE = 8
+RESUMES_PER_SUMMARY = 2
+# Stubbed LLM: seconds per call, and calls it serves at once (one Ollama runner)
+STUB_LLM_LATENCY = 0.5
+STUB_LLM_SLOTS = 1
+# How often the lock probe tries to take the SQLite write lock
+LOCK_PROBE_SECONDS = 0.05
+# Scores written by a run go under these JD names and are deleted afterwards
+LOADTEST_PREFIX = "loadtest_"
+SEARCH_TERMS = ["python", "sql", "machine learning", "aws", "spark", "java", "react",
+                "docker", "tableau", "statistics", "kubernetes", "pandas"]
+
+class StubLLM:
+    """Stand-in for llm_client.chat.
+
+    Replies after `latency` seconds, serving at most `slots` calls at once
+    like a single Ollama runner, and follows the structured-output schemas so
+    scoring and summaries take their normal code paths. Time spent queueing
+    for a slot is recorded as LLM contention.
+    """
+
+    def __init__(self, latency=STUB_LLM_LATENCY, slots=STUB_LLM_SLOTS):
+        self.latency = latency
+        self.slots = threading.BoundedSemaphore(slots)
+        self.waits = []
+        self._lock = threading.Lock()
+
+    def __call__(self, prompt, timeout=None, retries=None, model=None, format=None):
+        start = time.perf_counter()
+        with self.slots:
+            waited = time.perf_counter() - start
+            time.sleep(self.latency)
+        with self._lock:
+            self.waits.append(waited)
+        if format is None:
+            return f"{random.uniform(0.2, 0.9):.2f}"
+        if "summaries" in format.get("properties", {}):
+            ids = [int(i) for i in re.findall(r'<resume id="(\d+)"', prompt)]
+            return json.dumps({"summaries": [
+                {"id": i, "relevance": "Relevant experience for the role.",
+                 "skills": [{"skill": "Python", "explanation": "Matches the required programming skills."}]}
+                for i in ids
+            ]})
+        ids = [int(i) for i in re.findall(r'<candidate id="(\d+)"', prompt)]
+        return json.dumps({"scores": [{"id": i, "score": round(random.uniform(0.2, 0.9), 2)} for i in ids]})
+
+class _Recorder:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def add(self, action, seconds, error=None):
+        with self._lock:
+            if error is None:
+                self.latencies[action].append(seconds)
+            else:
+                self.errors[action].append(error)
+
+def _probe_locks(stop, counts):
+    """Sample how often the SQLite write lock is held by someone else."""
+    conn = sqlite3.connect(DB_PATH, timeout=0, isolation_level=None)
+    try:
+        while not stop.wait(LOCK_PROBE_SECONDS):
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                conn.execute("ROLLBACK")
+                counts["free"] += 1
+            except sqlite3.OperationalError:
+                counts["busy"] += 1
+    finally:
+        conn.close()
+
+def _percentiles(values):
+    if not values:
+        return {"p50": None, "p95": None, "p99": None, "max": None}
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {"p50": float(p50), "p95": float(p95), "p99": float(p99), "max": float(max(values))}
+
+class _Session:
+    """One simulated recruiter working against its own JD."""
+
+    def __init__(self, jd_name, jd_text, resumes, uploads, browse_jds, use_llm):
+        self.jd_name = jd_name
+        self.jd_text = jd_text
+        self.resumes = resumes
+        self.uploads = uploads
+        self.browse_jds = browse_jds + [jd_name]
+        self.use_llm = use_llm
+
+    def upload(self):
+        """Re-upload a stored resume with its own bytes.
+
+        This writes to the real database, but only rewrites the fingerprint
+        and index entries of a resume already in the content store with the
+        same content; legacy files are not uploaded, which would add them to
+        the store.
+        """
+        from upload_store import store_upload, blob_path, resume_path
+        from resume_parser import analyze_pdf
+        from dedup import register_resume
+        from search_index import index_resume
+
+        name = random.choice(self.uploads)
+        with open(resume_path(name), 'rb') as f:
+            file_hash, _ = store_upload(name, f.read())
+        analysis = analyze_pdf(blob_path(file_hash))
+        # Re-uploads normally skip these when unchanged; always writing makes this the write-heavy case
+        register_resume(name, analysis.text)
+        index_resume(name, analysis.text, analysis.sections, file_hash)
+
+    def analyze(self):
+        from pipeline import run_pipeline
+        from upload_store import stored_resumes
+
+        names = random.sample(self.resumes, min(RESUMES_PER_ANALYZE, len(self.resumes)))
+        # Drop earlier scores so every analyze does the full parse/embed/score/commit work
+        delete_resumes(self.jd_name, names)
+        run_pipeline(self.jd_name, self.jd_text, stored_resumes(names), use_llm=self.use_llm)
+
+    def browse(self):
+        from db_utils import load_scores, count_scores, query_scores
+
+        jd_name = random.choice(self.browse_jds)
+        total = count_scores(jd_name)
+        query_scores(jd_name, limit=50, offset=random.randrange(0, max(total, 1), 50))
+        # The dashboard still loads a JD's full score table on Analyze
+        load_scores(jd_name)
+
+    def search(self):
+        from scoring_client import search_resumes
+
+        search_resumes(" ".join(random.sample(SEARCH_TERMS, 2)))
+
+    def summarize(self):
+        from scoring_client import summarize_resumes
+        from scorer import preprocess_jd
+        from upload_store import stored_resumes
+
+        names = random.sample(self.resumes, min(RESUMES_PER_SUMMARY, len(self.resumes)))
+        for name in names:
+            # Cached summaries would skip the LLM
+            cached = os.path.join(SUMMARY_DIR, f"{self.jd_name}_{name}.txt".replace(" ", "_"))
+            if os.path.exists(cached):
+                os.remove(cached)
+        summarize_resumes(preprocess_jd(self.jd_text), stored_resumes(names), self.jd_name)
+
+def _run_session(session, mix, deadline, recorder):
+    actions, weights = zip(*mix.items())
+    while time.monotonic() < deadline:
+        action = random.choices(actions, weights)[0]
+        start = time.perf_counter()
+        try:
+            getattr(session, action)()
+        except Exception as e:
+            recorder.add(action, None, f"{type(e).__name__}: {e}")
+        else:
+            recorder.add(action, time.perf_counter() - start)
+        time.sleep(min(random.expovariate(1 / THINK_SECONDS), max(0, deadline - time.monotonic())))
+
+def _start_service():
+    """Run the scoring service in this process (so it shares the stub) on a free port."""
+    from http.server import ThreadingHTTPServer
+    from scoring_service import ScoringRequestHandler, SERVICE_HOST, _batch_loop
+
+    server = ThreadingHTTPServer((SERVICE_HOST, 0), ScoringRequestHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    threading.Thread(target=_batch_loop, daemon=True).start()
+    return server, f"http://{SERVICE_HOST}:{server.server_address[1]}"
+
+def run_load_test(sessions=10, duration=60.0, mix=None, use_llm=True, llm_latency=STUB_LLM_LATENCY,
+                  llm_slots=STUB_LLM_SLOTS, service=False, seed=None):
+    """Simulate `sessions` concurrent recruiters for `duration` seconds.
+
+    Each session repeatedly picks an action from `mix` (upload, analyze,
+    browse, search, summarize) against the stored resumes and JDs, using the
+    same functions as the dashboard. The LLM is replaced by StubLLM so runs
+    measure this app rather than Ollama. With `service`, scoring, summaries
+    and search go through an in-process scoring service over HTTP. Scores
+    written during the run are deleted afterwards. The run uses the real
+    database: uploads rewrite the fingerprints and index entries of stored
+    resumes (with unchanged content). Returns a report dict.
+    """
+    import scorer
+    import summarizer
+    import llm_client
+    import scoring_client
+    from upload_store import list_resumes, resume_hash
+
+    if seed is not None:
+        random.seed(seed)
+    mix = {action: weight for action, weight in (mix or ACTION_MIX).items() if weight > 0}
+    unknown = set(mix) - set(ACTION_MIX)
+    if unknown:
+        raise ValueError(f"Unknown action(s): {', '.join(sorted(unknown))}")
+    init_db()
+    resumes = list_resumes()
+    jd_files = sorted(name for name in os.listdir(JD_DIR) if not name.startswith(LOADTEST_PREFIX)) \
+        if os.path.isdir(JD_DIR) else []
+    if not resumes or not jd_files:
+        raise ValueError("Load testing needs at least one stored resume and one saved JD")
+    uploads = [name for name in resumes if resume_hash(name) is not None]
+    if "upload" in mix and not uploads:
+        print("WARNING - No resumes in the content store; skipping the upload action")
+        del mix["upload"]
+    if not mix:
+        raise ValueError("No actions left to run")
+
+    stub = StubLLM(llm_latency, llm_slots)
+    patched = {module: module.chat for module in (scorer, summarizer, llm_client)}
+    model = scorer.get_bert_model()
+    own_encode = "encode" in vars(model)
+    original_encode = model.encode
+    encode_seconds = []
+
+    def timed_encode(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return original_encode(*args, **kwargs)
+        finally:
+            encode_seconds.append(time.perf_counter() - start)
+
+    run_id = time.strftime("%Y%m%d%H%M%S")
+    session_jds = [f"{LOADTEST_PREFIX}{run_id}_{i}.txt" for i in range(sessions)]
+    recorder = _Recorder()
+    lock_counts = {"free": 0, "busy": 0}
+    stop_probe = threading.Event()
+    server = None
+    service_url = scoring_client.SERVICE_URL
+    try:
+        for module in patched:
+            module.chat = stub
+        model.encode = timed_encode
+        # Local unless asked otherwise: an external service would not use the stub
+        scoring_client.SERVICE_URL = ""
+        if service:
+            server, scoring_client.SERVICE_URL = _start_service()
+        probe = threading.Thread(target=_probe_locks, args=(stop_probe, lock_counts), daemon=True)
+        probe.start()
+
+        session_list = []
+        for jd_name in session_jds:
+            with open(os.path.join(JD_DIR, random.choice(jd_files)), 'r', encoding='utf-8') as f:
+                session_list.append(_Session(jd_name, f.read(), resumes, uploads, jd_files, use_llm))
+        start = time.monotonic()
+        deadline = start + duration
+        workers = [
+            threading.Thread(target=_run_session, args=(session, mix, deadline, recorder))
+            for session in session_list
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.monotonic() - start
+    finally:
+        stop_probe.set()
+        for module, chat in patched.items():
+            module.chat = chat
+        if own_encode:
+            model.encode = original_encode
+        else:
+            del model.encode
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+        scoring_client.SERVICE_URL = service_url
+        delete_jds(session_jds)
+
+    completed = sum(len(values) for values in recorder.latencies.values())
+    errors = {action: len(messages) for action, messages in recorder.errors.items()}
+    all_errors = [message for messages in recorder.errors.values() for message in messages]
+    probes = lock_counts["free"] + lock_counts["busy"]
+    return {
+        "sessions": sessions,
+        "seconds": elapsed,
+        "service": bool(service),
+        "completed": completed,
+        "throughput": completed / elapsed if elapsed else 0.0,
+        "actions": {
+            action: {"count": len(recorder.latencies[action]), "errors": errors.get(action, 0),
+                     **_percentiles(recorder.latencies[action])}
+            for action in mix
+        },
+        "contention": {
+            "sqlite_write_lock_busy": lock_counts["busy"] / probes if probes else 0.0,
+            "sqlite_locked_errors": sum("locked" in message for message in all_errors),
+            "llm_calls": len(stub.waits),
+            "llm_wait": _percentiles(stub.waits),
+            "encode_calls": len(encode_seconds),
+            "encode": _percentiles(encode_seconds),
+        },
+        "error_samples": sorted(set(all_errors))[:5],
+    }
+
+def format_report(report):
+    """Plain-text summary of a run_load_test report."""
+    def ms(value):
+        return "-" if value is None else f"{value * 1000:.0f}"
+
+    lines = [
+        f"{report['sessions']} session(s) for {report['seconds']:.1f}s"
+        f"{' via the scoring service' if report['service'] else ''}: "
+        f"{report['completed']} action(s), {report['throughput']:.2f}/s",
+        f"{'action':10} {'count':>6} {'errors':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}",
+    ]
+    for action, stats in report["actions"].items():
+        lines.append(f"{action:10} {stats['count']:6} {stats['errors']:6} {ms(stats['p50']):>8} "
+                     f"{ms(stats['p95']):>8} {ms(stats['p99']):>8} {ms(stats['max']):>8}")
+    contention = report["contention"]
+    lines.append(f"SQLite write lock busy in {contention['sqlite_write_lock_busy']:.0%} of probes, "
+                 f"{contention['sqlite_locked_errors']} 'database is locked' error(s)")
+    lines.append(f"LLM: {contention['llm_calls']} call(s), queue wait p50 {ms(contention['llm_wait']['p50'])} ms, "
+                 f"p95 {ms(contention['llm_wait']['p95'])} ms")
+    lines.append(f"BERT: {contention['encode_calls']} encode call(s), p50 {ms(contention['encode']['p50'])} ms, "
+                 f"p95 {ms(contention['encode']['p95'])} ms")
+    for message in report["error_samples"]:
+        lines.append(f"  error: {message}")
+    return "\n".join(lines)
@@ -1,16 +1,33 @@
 import os
+import tempfile
+import threading
+from math import ceil
 import pandas as pd
 from datetime import datetime
 import streamlit as st
-from resume_parser import extract_text_from_pdf, extract_sections, extract_email
-from scorer import weighted_score, save_detailed_scores, preprocess_jd
-from summarizer import summarize_resume_with_jd, summarize_resumes_with_jd, clear_summaries
-from db_utils import init_db, load_scores, save_scores_to_db, delete_jds, delete_resumes
+from resume_parser import analyze_pdf
+from scorer import save_detailed_scores, preprocess_jd, rescore_components, pipeline_fingerprint, BASE_WEIGHTS, SCORE_MIX
+from scoring_client import score_resumes, match_resumes, summarize_resumes, backfill_degraded, rescore_stale
+from summarizer import clear_summaries
+from profiler import profile_run
+from pipeline import run_pipeline, commit_results, reuse_variant_llama, Leaderboard
+from upload_store import store_upload, blob_path, resume_path, list_resumes
+from upload_store import resume_hash as stored_resume_hash
+from dedup import has_fingerprint, register_resume
+from search_index import index_resume, indexed_hash, search, reindex
+from jd_versions import save_jd
+from db_utils import (
+    init_db, load_scores, delete_jds, delete_resumes, load_score_components, update_scores,
+    save_weight_profile, load_weight_profiles, delete_weight_profile,
+    count_scores, query_scores, export_scores, profile_score_sql, SORTABLE_COLUMNS,
+    load_degraded_scores, count_stale_components, load_jd_versions
+)
 
 UPLOAD_DIR = "uploaded_data"
 JD_DIR = os.path.join(UPLOAD_DIR, "jds")
 RESUME_DIR = os.path.join(UPLOAD_DIR, "resumes")
 SUMMARY_DIR = os.path.join(UPLOAD_DIR, "summaries")
+EXPORT_DIR = os.path.join(UPLOAD_DIR, "exports")
 
 os.makedirs(JD_DIR, exist_ok=True)
 os.makedirs(RESUME_DIR, exist_ok=True)
@@ -450,6 +467,54 @@ st.markdown("""
 <h1 class="main-heading">🎯 <span>Smart Resume Analyzer</span></h1>
 """, unsafe_allow_html=True)
 
+# Weight profile controls
+DEFAULT_PROFILE = {"weights": dict(BASE_WEIGHTS), "mix": dict(SCORE_MIX)}
+saved_profiles = load_weight_profiles()
+
+with st.sidebar:
+    st.markdown("### ⚖️ Weight Profile")
+    profile_names = ["Default"] + list(saved_profiles)
+    profile_name = st.selectbox("Profile", profile_names, help="Re-rank stored results without re-scoring")
+    base_profile = saved_profiles.get(profile_name, DEFAULT_PROFILE)
+
+    st.caption("Section weights (BERT)")
+    profile_weights = {
+        sec: st.slider(sec.title(), 0.0, 1.0, float(base_profile["weights"].get(sec, 0.0)), 0.05,
+                       key=f"w_{profile_name}_{sec}")
+        for sec in BASE_WEIGHTS
+    }
+    st.caption("Score mix")
+    profile_mix = {
+        part: st.slider(label, 0.0, 1.0, float(base_profile["mix"].get(part, 0.0)), 0.05,
+                        key=f"m_{profile_name}_{part}")
+        for part, label in [("bert", "BERT"), ("llama", "LLaMA"), ("keyword", "Keywords"), ("skill", "Skills")]
+    }
+    active_profile = {"weights": profile_weights, "mix": profile_mix}
+
+    new_profile_name = st.text_input("Save as", value="" if profile_name == "Default" else profile_name)
+    if st.button("💾 Save Profile") and new_profile_name.strip() and new_profile_name.strip() != "Default":
+        save_weight_profile(new_profile_name.strip(), active_profile)
+        st.rerun()
+    if profile_name != "Default" and st.button("🗑️ Delete Profile"):
+        delete_weight_profile(profile_name)
+        st.rerun()
+    if st.button("✅ Apply to All Scores", help="Rewrite every stored score using this profile"):
+        components_df = load_score_components()
+        if not components_df.empty:
+            components_df["score"] = rescore_components(components_df, profile_weights, profile_mix)
+            update_scores(components_df)
+            st.success(f"Re-scored {len(components_df)} stored result(s).")
+
+    # Rows scored by an older model, prompt or taxonomy than the current pipeline
+    stale_rows = count_stale_components(pipeline_fingerprint())
+    if stale_rows:
+        st.caption(f"{stale_rows} stored score(s) come from an older scoring pipeline")
+        if st.button("♻️ Rescore Stale", help="Recompute only the components whose model, prompt or inputs changed"):
+            with st.spinner("♻️ Re-scoring stale results..."):
+                rescored = rescore_stale()
+            st.success(f"Re-scored {rescored} stale result(s).")
+            st.rerun()
+
 # Main content area with two columns
 left_col, right_col = st.columns([3, 2])
 
@@ -517,79 +582,183 @@ if selected_jd:
         jd_text = f.read()
     st.text_area("", jd_text, height=200, disabled=True)
 
+    # Expanders are hidden by the global CSS, so the editor sits behind a checkbox
+    if st.checkbox("✏️ Edit JD", key=f"show_edit_jd_{selected_jd}"):
+        edited_jd = st.text_area("Job description", jd_text, height=250, key=f"edit_jd_{selected_jd}")
+        if st.button("💾 Save New Version", help="Re-scores only the components this edit affects"):
+            with st.spinner("♻️ Updating scores..."):
+                version, changed_parts, rescored = save_jd(selected_jd, edited_jd)
+            if version is None:
+                st.info("No changes to save")
+            else:
+                st.success(f"✅ Saved version {version}; "
+                           + (f"re-scored {', '.join(sorted(changed_parts))} for {rescored} row(s)"
+                              if changed_parts else "scores carried over"))
+                if changed_parts:
+                    st.session_state.summaries = []
+        versions = load_jd_versions(selected_jd)
+        if not versions.empty:
+            st.caption("Version history")
+            st.dataframe(versions[["version", "saved_at", "job_role"]], hide_index=True)
+
 st.markdown("</div>", unsafe_allow_html=True)
 
-# Process uploaded files
+# Process uploaded files: each distinct file is stored once, keyed by content hash
+if "upload_hashes" not in st.session_state:
+    st.session_state.upload_hashes = {}
+
 uploaded_resume_names = []
+uploaded_resume_hashes = {}
 if uploaded_resumes:
     for file in uploaded_resumes:
-        resume_path = os.path.join(RESUME_DIR, file.name)
+        upload_key = getattr(file, "file_id", None) or f"{file.name}:{file.size}"
         uploaded_resume_names.append(file.name)
-        with open(resume_path, 'wb') as f:
-            f.write(file.read())
+        if upload_key not in st.session_state.upload_hashes:
+            file_hash, changed = store_upload(file.name, file.getvalue())
+            st.session_state.upload_hashes[upload_key] = file_hash
+            # Fingerprint and index at ingest for near-duplicate detection and search
+            if changed or not has_fingerprint(file.name):
+                register_resume(file.name, analyze_pdf(blob_path(file_hash)).text)
+            if changed or indexed_hash(file.name) != file_hash:
+                analysis = analyze_pdf(blob_path(file_hash))
+                index_resume(file.name, analysis.text, analysis.sections, file_hash)
+        uploaded_resume_hashes[file.name] = st.session_state.upload_hashes[upload_key]
 
 # Analysis Button
 st.markdown('<div class="primary-button">', unsafe_allow_html=True)
+time_budget = st.number_input(
+    "Time Budget (seconds)",
+    min_value=0, max_value=3600, value=0, step=10,
+    help="0 = no limit. With a budget, every resume gets a quick score and LLaMA refines "
+         "the top candidates until time runs out; the rest are marked provisional and "
+         "finished in the background."
+)
+profile_mode = st.selectbox(
+    "Profiling",
+    ["off", "cprofile", "sample"],
+    help="Record where time goes during Analyze; reports are written to uploaded_data/profiles"
+)
 if st.button("🔍 Analyze Resumes", help="Start analyzing the selected resumes"):
-    jd_name = ""
-    jd_text = ""
-    
-    # Determine JD source
-    if uploaded_jd:
-        jd_text = uploaded_jd.read().decode("utf-8")
-        jd_name = uploaded_jd.name
-    elif jd_text_input.strip() and jd_name_input.strip():
-        jd_text = jd_text_input.strip()
-        jd_name = jd_name_input.strip() + ".txt"
-    elif selected_jd:
-        jd_name = selected_jd
-        with open(os.path.join(JD_DIR, jd_name), 'r', encoding='utf-8') as f:
-            jd_text = f.read()
-
-    if jd_text and jd_name:
-        # Save JD if new
-        jd_path = os.path.join(JD_DIR, jd_name)
-        if not os.path.exists(jd_path):
-            with open(jd_path, 'w', encoding='utf-8') as f:
-                f.write(jd_text)
-            jd_files = sorted(os.listdir(JD_DIR))
-
-        # Process resumes
-        db_df = load_scores()
-        processed_resumes = set(db_df.query(f'jd == "{jd_name}"')['resume'])
-        current_scores = []
-
-        with st.spinner("📊 Analyzing resumes..."):
-            progress = st.progress(0)
-            for i, resume_file in enumerate(uploaded_resume_names):
-                if resume_file in processed_resumes:
-                    continue
-                    
-                resume_path = os.path.join(RESUME_DIR, resume_file)
-                resume_text = extract_text_from_pdf(resume_path)
-                sections = extract_sections(resume_text)
-                scores = weighted_score(sections, jd_text)
-                email = extract_email(resume_text)
-                
-                save_detailed_scores(jd_name, resume_file, scores)
-                
-                current_scores.append({
-                    "jd": jd_name,
-                    "resume": resume_file,
-                    "email": email,
-                    "score": scores["final_score"],
-                    "timestamp": datetime.now().isoformat()
-                })
-                
-                progress.progress((i + 1) / len(uploaded_resume_names))
-            progress.empty()
-
-        if current_scores:
-            new_df = pd.DataFrame(current_scores)
-            save_scores_to_db(new_df)
-            st.success(f"✅ Successfully scored {len(current_scores)} new resume(s)!")
-            st.session_state.selected_jd = jd_name
-            st.rerun()
+    with profile_run("analyze", None if profile_mode == "off" else profile_mode) as profile_outputs:
+        # Filled in with the report paths when the block exits (including via st.rerun)
+        st.session_state.profile_outputs = profile_outputs
+        jd_name = ""
+        jd_text = ""
+
+        # Determine JD source
+        if uploaded_jd:
+            jd_text = uploaded_jd.read().decode("utf-8")
+            jd_name = uploaded_jd.name
+        elif jd_text_input.strip() and jd_name_input.strip():
+            jd_text = jd_text_input.strip()
+            jd_name = jd_name_input.strip() + ".txt"
+        elif selected_jd:
+            jd_name = selected_jd
+            with open(os.path.join(JD_DIR, jd_name), 'r', encoding='utf-8') as f:
+                jd_text = f.read()
+
+        if jd_text and jd_name:
+            # Save JD if new or edited; an edit re-scores only what it changes
+            jd_path = os.path.join(JD_DIR, jd_name)
+            is_new_jd = not os.path.exists(jd_path)
+            version, changed_parts, rescored = save_jd(jd_name, jd_text)
+            if is_new_jd:
+                jd_files = sorted(os.listdir(JD_DIR))
+            elif version is not None:
+                st.info(f"📝 Saved {jd_name} as version {version}; "
+                        + (f"re-scored {', '.join(sorted(changed_parts))} for {rescored} row(s)"
+                           if changed_parts else "scores carried over"))
+
+            # Process resumes
+            jd_scores = load_scores(jd_name)
+            scored_hashes = set(jd_scores["resume_hash"].dropna())
+            scored_names = set(jd_scores["resume"])
+            jd_components = load_score_components(jd_name)
+            known_llama = {
+                name: score for name, score in zip(jd_components["resume"], jd_components["llama_score"])
+                if pd.notna(score)
+            }
+
+            with st.spinner("📊 Analyzing resumes..."):
+                to_score = []
+                for resume_file in uploaded_resume_names:
+                    resume_hash = uploaded_resume_hashes[resume_file]
+                    if resume_hash in scored_hashes:
+                        continue
+                    if resume_file in scored_names:
+                        # Same name, new content: the old scores no longer apply. Rows scored
+                        # before content hashing cannot be matched, so they are re-scored too
+                        delete_resumes(jd_name, [resume_file])
+                        known_llama.pop(resume_file, None)
+                    scored_hashes.add(resume_hash)
+                    to_score.append(resume_file)
+
+                def pending_resumes():
+                    for resume_file in to_score:
+                        resume_hash = uploaded_resume_hashes[resume_file]
+                        yield {
+                            "name": resume_file,
+                            "path": os.path.abspath(blob_path(resume_hash)),
+                            "resume_hash": resume_hash
+                        }
+
+                provisional = 0
+                if time_budget and to_score:
+                    # One deadline-scheduled run: cheap scores for all, LLaMA for the leaders
+                    # Near-duplicates of already scored variants reuse their LLaMA score
+                    resumes = [reuse_variant_llama(resume, known_llama) for resume in pending_resumes()]
+                    results = score_resumes(jd_text, resumes, time_budget=time_budget)
+                    for result in results:
+                        result["resume_hash"] = uploaded_resume_hashes[result["name"]]
+                        save_detailed_scores(jd_name, result["name"], result["scores"])
+                    commit_results(jd_name, results)
+                    scored_count = len(results)
+                    provisional = sum(bool(result["scores"].get("degraded")) for result in results)
+                else:
+                    # Streamed: parse, embed and score in micro-batches, committing every few rows
+                    progress = st.progress(0)
+                    # Live top-k of this run, so the leaders can be reviewed before it finishes
+                    leaderboard = Leaderboard()
+                    leaderboard_view = st.empty()
+                    committed = []
+
+                    def show_leaderboard():
+                        leaderboard_view.dataframe(pd.DataFrame(
+                            [
+                                {"Rank": rank, "Resume": name, "Score": score,
+                                 "Status": "⏳ Provisional" if provisional else "✅ Final"}
+                                for rank, (name, score, provisional) in enumerate(leaderboard.rows(), start=1)
+                            ]
+                        ), hide_index=True, use_container_width=True)
+
+                    def on_scored(results):
+                        for result in results:
+                            leaderboard.push(result)
+                        progress.progress(leaderboard.seen / len(to_score),
+                                          text=f"Scored {leaderboard.seen}/{len(to_score)}")
+                        show_leaderboard()
+
+                    def on_result(result):
+                        save_detailed_scores(jd_name, result["name"], result["scores"])
+                        committed.append(result["name"])
+                        leaderboard.commit(result)
+                        if len(committed) == leaderboard.seen:
+                            show_leaderboard()
+
+                    # Variants reuse LLaMA scores from the DB and from earlier batches of this run
+                    scored_count = run_pipeline(jd_name, jd_text, pending_resumes(), on_result=on_result,
+                                                on_scored=on_scored, known_llama=known_llama)
+                    progress.empty()
+
+            if scored_count:
+                st.success(f"✅ Successfully scored {scored_count} new resume(s)!")
+                if provisional:
+                    # Finish the provisional rows in the background; results update on the next rerun
+                    threading.Thread(target=backfill_degraded, args=(jd_name,), daemon=True).start()
+                st.session_state.selected_jd = jd_name
+                st.rerun()
+if st.session_state.get("profile_outputs"):
+    st.info("🔬 Profile of the last run:\n" + "\n".join(f"- `{path}`" for path in st.session_state.profile_outputs))
 st.markdown('</div>', unsafe_allow_html=True)
 
 # Results Display
@@ -598,12 +767,67 @@ st.markdown("""
     <h3>📈 Analysis Results</h3>
 """, unsafe_allow_html=True)
 
-scores_df = load_scores()
-filtered = scores_df[scores_df["jd"] == selected_jd].sort_values("score", ascending=False).reset_index(drop=True)
+# Sorting, filtering, re-ranking and paging all happen in SQL
+score_sql = profile_score_sql(profile_weights, profile_mix) if active_profile != DEFAULT_PROFILE else None
+filtered = pd.DataFrame()
+has_results = bool(selected_jd) and count_scores(selected_jd) > 0
 
-if not filtered.empty:
+if has_results:
     delete_button = st.button("🗑️ Delete Resume", help="Delete selected resumes")
-    
+
+    degraded_count = len(load_degraded_scores(selected_jd))
+    if degraded_count:
+        st.warning(f"⚠️ {degraded_count} score(s) are provisional: computed without LLaMA because it was "
+                   "unavailable or the time budget ran out.")
+        if st.button("🔁 Backfill LLaMA Scores", help="Re-run LLaMA for degraded scores"):
+            with st.spinner("Re-running LLaMA..."):
+                # Waits for a background backfill of this run, if one is going
+                backfill_degraded(selected_jd)
+            remaining = len(load_degraded_scores(selected_jd))
+            if remaining:
+                st.warning(f"⚠️ Backfilled {degraded_count - remaining} of {degraded_count}; "
+                           "LLaMA is still unavailable.")
+            else:
+                st.rerun()
+
+    filter_cols = st.columns([3, 1, 1, 1])
+    with filter_cols[0]:
+        name_filter = st.text_input("Search", help="Filter by resume name or email")
+    with filter_cols[1]:
+        min_score = st.number_input("Min Score", min_value=0.0, max_value=100.0, value=0.0, step=5.0)
+    with filter_cols[2]:
+        sort_by = st.selectbox("Sort By", SORTABLE_COLUMNS)
+    with filter_cols[3]:
+        page_size = st.selectbox("Rows per Page", [25, 50, 100], index=1)
+
+    option_cols = st.columns([1, 1, 2])
+    with option_cols[0]:
+        sort_ascending = st.checkbox("Ascending", value=False)
+    with option_cols[1]:
+        group_variants = st.checkbox(
+            "Group near-duplicate resumes",
+            value=False,
+            help="Show tailored variants of the same CV as one candidate (best-scoring variant)"
+        )
+
+    query_filters = {
+        "min_score": min_score or None,
+        "search": name_filter.strip() or None,
+        "score_sql": score_sql,
+        "group_variants": group_variants
+    }
+    matching = count_scores(selected_jd, **query_filters)
+    page_count = max(1, ceil(matching / page_size))
+    with option_cols[2]:
+        page = st.number_input(f"Page (of {page_count}, {matching} rows)", min_value=1, max_value=page_count, value=1)
+
+    filtered = query_scores(
+        selected_jd, sort_by, sort_ascending,
+        limit=page_size, offset=(page - 1) * page_size,
+        **query_filters
+    )
+
+if not filtered.empty:
     # Create selection column
     filtered_display = filtered.copy()
     filtered_display.insert(0, 'Select', False)
@@ -611,7 +835,7 @@ if not filtered.empty:
     # Enhanced data editor
     edited_df = st.data_editor(
         filtered_display,
-        disabled=["resume", "email", "score", "timestamp"],
+        disabled=["resume", "email", "score", "timestamp", "resume_hash", "degraded", "candidate", "variants"],
         hide_index=True,
         column_config={
             "Select": st.column_config.CheckboxColumn(
@@ -639,6 +863,19 @@ if not filtered.empty:
             "timestamp": st.column_config.DatetimeColumn(
                 "Analyzed At",
                 help="When the resume was analyzed"
+            ),
+            "resume_hash": None,  # internal key, hidden
+            "degraded": st.column_config.CheckboxColumn(
+                "Provisional",
+                help="Scored without LLaMA; use Backfill to complete it"
+            ),
+            "candidate": st.column_config.TextColumn(
+                "Candidate",
+                help="Representative resume of the near-duplicate group"
+            ),
+            "variants": st.column_config.NumberColumn(
+                "Variants",
+                help="Number of near-duplicate resumes in this group"
             )
         },
         use_container_width=True,
@@ -659,8 +896,130 @@ if not filtered.empty:
             st.rerun()
         else:
             st.warning("⚠️ Please select resumes to delete.")
-else:
+elif not has_results:
     st.info("ℹ️ No resumes analyzed yet for the selected job description.")
+else:
+    st.info("ℹ️ No results match the current filters.")
+
+st.markdown("</div>", unsafe_allow_html=True)
+
+# Best-Fit Roles Section
+st.markdown("""
+<div class="stCard">
+    <h3>🧭 Best-Fit Roles</h3>
+""", unsafe_allow_html=True)
+
+resume_files = list_resumes()
+fit_resumes = st.multiselect(
+    "Select Resume(s)",
+    resume_files,
+    default=[name for name in uploaded_resume_names if name in resume_files],
+    help="Score these resumes against every saved job description"
+)
+include_llm = st.checkbox(
+    "Include LLaMA evaluation",
+    value=False,
+    help="Slower: adds one LLM call per resume and role"
+)
+
+if st.button("🧭 Find Best-Fit Roles", help="Rank all open roles for the selected resumes"):
+    if not fit_resumes or not jd_files:
+        st.warning("⚠️ Please select at least one resume and save at least one job description.")
+    else:
+        with st.spinner(f"🧭 Matching {len(fit_resumes)} resume(s) against {len(jd_files)} role(s)..."):
+            jd_texts = []
+            for jd_file in jd_files:
+                with open(os.path.join(JD_DIR, jd_file), 'r', encoding='utf-8') as f:
+                    jd_texts.append(f.read())
+            matches = match_resumes(
+                jd_texts,
+                [{"name": name, "path": os.path.abspath(resume_path(name))} for name in fit_resumes],
+                use_llm=include_llm
+            )
+
+        best_fit_rows = []
+        for resume_name, match in zip(fit_resumes, matches):
+            for jd_file, scores in zip(jd_files, match["scores"]):
+                best_fit_rows.append({
+                    "resume": resume_name,
+                    "role": jd_file,
+                    "score": scores["final_score"],
+                    "bert_score": scores["bert_score"],
+                    "llama_score": scores["llama_score"],
+                    "keyword_overlap": scores["keyword_overlap"],
+                    "skill_overlap": scores["skill_overlap"]
+                })
+        st.session_state.best_fit = pd.DataFrame(best_fit_rows).sort_values(
+            ["resume", "score"], ascending=[True, False]).reset_index(drop=True)
+
+if st.session_state.get("best_fit") is not None:
+    st.dataframe(
+        st.session_state.best_fit,
+        hide_index=True,
+        column_config={
+            "resume": st.column_config.TextColumn("Resume"),
+            "role": st.column_config.TextColumn("Role"),
+            "score": st.column_config.ProgressColumn(
+                "Fit Score",
+                format="%.2f%%",
+                min_value=0,
+                max_value=100,
+                width="medium"
+            ),
+            "bert_score": st.column_config.NumberColumn("BERT", format="%.2f"),
+            "llama_score": st.column_config.NumberColumn("LLaMA", format="%.2f"),
+            "keyword_overlap": st.column_config.NumberColumn("Keywords", format="%.2f"),
+            "skill_overlap": st.column_config.NumberColumn("Skills", format="%.2f")
+        },
+        use_container_width=True
+    )
+
+st.markdown("</div>", unsafe_allow_html=True)
+
+# Talent Search Section
+st.markdown("""
+<div class="stCard">
+    <h3>🔎 Talent Search</h3>
+""", unsafe_allow_html=True)
+
+col1, col2 = st.columns([4, 1])
+with col1:
+    search_query = st.text_input(
+        "Search Resumes",
+        placeholder="e.g. spark airflow kubernetes",
+        help="Keyword search over every stored resume, ranked with BM25"
+    )
+with col2:
+    match_all_terms = st.checkbox("Match all terms", value=False)
+
+if search_query:
+    started = datetime.now()
+    hits = search(search_query, limit=50, match_all=match_all_terms)
+    elapsed_ms = (datetime.now() - started).total_seconds() * 1000
+    if hits:
+        st.caption(f"{len(hits)} resume(s) in {elapsed_ms:.0f} ms")
+        st.dataframe(
+            pd.DataFrame(
+                [(resume, score, ", ".join(matched)) for resume, score, matched in hits],
+                columns=["resume", "score", "matched"]
+            ),
+            hide_index=True,
+            column_config={
+                "resume": st.column_config.TextColumn("Resume"),
+                "score": st.column_config.NumberColumn("BM25", format="%.2f"),
+                "matched": st.column_config.TextColumn("Matched Terms")
+            },
+            use_container_width=True
+        )
+    else:
+        st.info("ℹ️ No resumes match this search.")
+
+if st.button("🗂️ Index Stored Resumes", help="Add resumes uploaded before search existed to the index"):
+    with st.spinner("🗂️ Indexing stored resumes..."):
+        indexed = reindex(
+            (name, resume_path(name), stored_resume_hash(name)) for name in list_resumes()
+        )
+    st.success(f"✅ Indexed {indexed} resume(s).")
 
 st.markdown("</div>", unsafe_allow_html=True)
 
@@ -702,16 +1061,15 @@ if generate_button:
         st.warning("⚠️ Please select at least one resume to analyze.")
     else:
         with st.spinner(f"🤖 Generating analysis for {len(selected_resumes)} resume(s)..."):
-            resume_texts = []
-            for resume_name in selected_resumes:
-                resume_path = os.path.join(RESUME_DIR, resume_name)
-                resume_text = extract_text_from_pdf(resume_path)
-                resume_texts.append(resume_text)
+            resumes = [
+                {"name": resume_name, "path": os.path.abspath(resume_path(resume_name))}
+                for resume_name in selected_resumes
+            ]
             
             raw_jd_text = open(os.path.join(JD_DIR, selected_jd), 'r', encoding='utf-8').read()
             processed_jd = preprocess_jd(raw_jd_text)
             
-            st.session_state.summaries = summarize_resumes_with_jd(resume_texts, processed_jd, selected_resumes, selected_jd)
+            st.session_state.summaries = summarize_resumes(processed_jd, resumes, selected_jd)
             st.session_state.current_summary_jd = selected_jd
 
 # Display summaries
@@ -733,14 +1091,37 @@ st.markdown("</div>", unsafe_allow_html=True)
 
 # Footer with export option
 st.divider()
-csv_all = scores_df.to_csv(index=False).encode('utf-8')
-st.download_button(
-    "⬇️ Export All Scores",
-    csv_all,
-    "resume_analysis_scores.csv",
-    "text/csv",
-    help="Download all analysis scores as CSV"
-)
+export_cols = st.columns([1, 3])
+with export_cols[0]:
+    export_format = st.radio("Export Format", ["CSV", "Parquet"], horizontal=True)
+with export_cols[1]:
+    if st.button("📦 Prepare Export", help="Build an export of all analysis scores"):
+        os.makedirs(EXPORT_DIR, exist_ok=True)
+        # A file per export, so concurrent sessions don't overwrite each other's download
+        previous_export = st.session_state.get("export_path")
+        if previous_export and os.path.exists(previous_export):
+            os.remove(previous_export)
+        fd, export_path = tempfile.mkstemp(prefix="resume_analysis_scores_",
+                                           suffix=f".{export_format.lower()}", dir=EXPORT_DIR)
+        os.close(fd)
+        try:
+            export_scores(export_path, export_format.lower())
+            st.session_state.export_path = export_path
+        except ImportError:
+            os.remove(export_path)
+            st.session_state.export_path = None
+            st.error("❌ Parquet export requires the pyarrow package.")
+
+    export_path = st.session_state.get("export_path")
+    if export_path and os.path.exists(export_path):
+        with open(export_path, 'rb') as f:
+            st.download_button(
+                "⬇️ Export All Scores",
+                f,
+                f"resume_analysis_scores{os.path.splitext(export_path)[1]}",
+                "text/csv" if export_path.endswith(".csv") else "application/octet-stream",
+                help="Download all analysis scores"
+            )
 
 # Admin section for JD management
 st.markdown("""
@@ -0,0 +1,221 @@
+import heapq
+import queue
+import sqlite3
+import threading
+from db_utils import DB_PATH, write_score_results
+
+# Bounded hand-off between stages keeps memory flat regardless of batch size
+STAGE_QUEUE_SIZE = 32
+EMBED_BATCH_SIZE = 16
+COMMIT_EVERY = 64
+LEADERBOARD_SIZE = 20
+
+_END = object()
+
+class _StageError:
+    def __init__(self, error):
+        self.error = error
+
+def _prefetch(items, maxsize):
+    """Iterate `items` in a background thread, buffering at most `maxsize` of them."""
+    buffer = queue.Queue(maxsize)
+    stop = threading.Event()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in items:
+                if not put(item):
+                    return
+        except Exception as e:
+            put(_StageError(e))
+            return
+        put(_END)
+
+    threading.Thread(target=produce, daemon=True).start()
+    try:
+        while True:
+            item = buffer.get()
+            if item is _END:
+                return
+            if isinstance(item, _StageError):
+                raise item.error
+            yield item
+    finally:
+        # Unblock the producer if the consumer stops early
+        stop.set()
+
+def _batched(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def _parse(resumes, analyze):
+    for resume in resumes:
+        try:
+            yield resume, analyze(resume)
+        except Exception as e:
+            print(f"ERROR - Skipping {resume['name']}, could not parse it: {e}")
+
+def _scored(conn, jd_name):
+    rows = conn.execute("SELECT resume, resume_hash FROM scores WHERE jd = ?", (jd_name,)).fetchall()
+    return {name for name, _ in rows}, {file_hash for _, file_hash in rows if file_hash}
+
+def _commit(conn, jd_name, results):
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        write_score_results(conn, jd_name, results)
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+class Leaderboard:
+    """Top-k results of a run in progress, kept in a min-heap.
+
+    Each push is O(log k), so the board can be refreshed after every scored
+    micro-batch however many resumes the run holds. Rows stay provisional
+    until they are committed and while their LLaMA score is missing.
+    """
+
+    def __init__(self, k=LEADERBOARD_SIZE):
+        self.k = k
+        self.heap = []
+        self.committed = set()
+        self.seen = 0
+
+    def push(self, result):
+        self.seen += 1
+        entry = (result["scores"]["final_score"], result["name"], result)
+        if len(self.heap) < self.k:
+            heapq.heappush(self.heap, entry)
+        elif entry[:2] > self.heap[0][:2]:
+            heapq.heapreplace(self.heap, entry)
+
+    def commit(self, result):
+        self.committed.add(result["name"])
+
+    def rows(self):
+        """(name, score, provisional) from best to worst."""
+        return [
+            (name, score, name not in self.committed or bool(result["scores"].get("degraded")))
+            for score, name, result in sorted(self.heap, key=lambda entry: entry[:2], reverse=True)
+        ]
+
+def reuse_variant_llama(resume, known_llama):
+    """Give `resume` the LLaMA score of an already scored near-duplicate, if any.
+
+    Delta-scores variants: only the cheap components are recomputed.
+    `known_llama` maps resume name -> LLaMA score for the JD.
+    """
+    from dedup import find_near_duplicates
+
+    if resume.get("llama_score") is None:
+        for variant, _ in find_near_duplicates(resume["name"]):
+            if known_llama.get(variant) is not None:
+                return {**resume, "llama_score": float(known_llama[variant])}
+    return resume
+
+def _remember_llama(results, known_llama):
+    for result in results:
+        llama_score = result["scores"]["components"].get("llama_score")
+        if llama_score is not None:
+            known_llama[result["name"]] = llama_score
+
+def commit_results(jd_name, results):
+    """Write already scored results in one transaction."""
+    conn = sqlite3.connect(DB_PATH, timeout=30, isolation_level=None)
+    try:
+        _commit(conn, jd_name, results)
+    finally:
+        conn.close()
+
+def run_pipeline(jd_name, jd_text, resumes, use_llm=True, batch_size=EMBED_BATCH_SIZE,
+                 commit_every=COMMIT_EVERY, service_url=None, on_result=None, on_scored=None,
+                 known_llama=None):
+    """Stream resumes through parse -> embed/score -> commit with bounded memory.
+
+    `resumes` is any iterable (ideally a generator) of dicts with name, path
+    and optional resume_hash / llama_score. Resumes already scored for the JD
+    are skipped, so re-running an interrupted batch resumes after the last
+    commit. Scores are committed every `commit_every` rows; `on_result` is
+    called for each committed result. `on_scored` is called with each scored
+    micro-batch as soon as it is ready, before it is committed, for progress
+    displays. With `known_llama` ({name: LLaMA score} for the JD), resumes
+    reuse the LLaMA score of a near-duplicate scored earlier, including in
+    previous micro-batches of this run; it is updated as batches are scored.
+    Returns the number of rows scored.
+    """
+    from scoring_client import SERVICE_URL, score_resumes
+    from scoring_service import score_batch, _analyze_resume
+
+    conn = sqlite3.connect(DB_PATH, timeout=30, isolation_level=None)
+    scored_names, scored_hashes = _scored(conn, jd_name)
+    todo = (
+        resume for resume in resumes
+        if resume["name"] not in scored_names and resume.get("resume_hash") not in scored_hashes
+    )
+
+    def score_stage(batches, score):
+        # Variant lookups happen here, in order, so they see every earlier batch's scores
+        for batch, analyses in batches:
+            if known_llama is not None:
+                batch = [reuse_variant_llama(resume, known_llama) for resume in batch]
+            results = score(batch, analyses)
+            if known_llama is not None:
+                _remember_llama(results, known_llama)
+            yield batch, results
+
+    if service_url or SERVICE_URL:
+        # The service parses and embeds; only micro-batching happens here
+        scored_batches = _prefetch(score_stage(
+            ((batch, None) for batch in _batched(todo, batch_size)),
+            lambda batch, _: score_resumes(jd_text, batch, use_llm, service_url)
+        ), 2)
+    else:
+        parsed = _prefetch(_parse(todo, _analyze_resume), STAGE_QUEUE_SIZE)
+        scored_batches = _prefetch(score_stage(
+            (([resume for resume, _ in batch], [analysis for _, analysis in batch])
+             for batch in _batched(parsed, batch_size)),
+            lambda batch, analyses: score_batch(jd_text, batch, use_llm, analyses=analyses)
+        ), 2)
+
+    pending = []
+    done = 0
+    try:
+        for batch, results in scored_batches:
+            for resume, result in zip(batch, results):
+                result["resume_hash"] = resume.get("resume_hash")
+                pending.append(result)
+            if on_scored:
+                on_scored(results)
+            if len(pending) >= commit_every:
+                done += _flush(conn, jd_name, pending, on_result)
+        done += _flush(conn, jd_name, pending, on_result)
+    finally:
+        conn.close()
+    return done
+
+def _flush(conn, jd_name, pending, on_result):
+    if not pending:
+        return 0
+    _commit(conn, jd_name, pending)
+    if on_result:
+        for result in pending:
+            on_result(result)
+    count = len(pending)
+    pending.clear()
+    return count
@@ -0,0 +1,114 @@
+import os
+import io
+import sys
+import pstats
+import cProfile
+import threading
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from db_utils import UPLOAD_DIR
+
+PROFILE_DIR = os.path.join(UPLOAD_DIR, "profiles")
+PROFILE_MODES = ("cprofile", "sample")
+SAMPLE_INTERVAL = 0.005
+TOP_N = 30
+
+def _frame_name(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+def _stack(frame):
+    """Outermost-first function names for a frame."""
+    names = []
+    while frame is not None:
+        names.append(_frame_name(frame))
+        frame = frame.f_back
+    return names[::-1]
+
+def _sample(thread_id, interval, stacks, stop):
+    """Record the target thread's stack every `interval` seconds until `stop` is set."""
+    while not stop.wait(interval):
+        frame = sys._current_frames().get(thread_id)
+        if frame is not None:
+            stacks[tuple(_stack(frame))] += 1
+
+def _run_path(label, suffix):
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    safe_label = "".join(ch if ch.isalnum() or ch in "-_." else "_" for ch in label)
+    return os.path.join(PROFILE_DIR, f"{datetime.now().strftime('%Y%m%d-%H%M%S')}_{safe_label}.{suffix}")
+
+def _write_cprofile(profile, label, top_n):
+    prof_path = _run_path(label, "prof")
+    profile.dump_stats(prof_path)
+
+    report = io.StringIO()
+    stats = pstats.Stats(profile, stream=report).strip_dirs()
+    stats.sort_stats("cumulative").print_stats(top_n)
+    stats.sort_stats("tottime").print_stats(top_n)
+    txt_path = prof_path[:-len(".prof")] + ".txt"
+    with open(txt_path, 'w', encoding='utf-8') as f:
+        f.write(report.getvalue())
+    return [prof_path, txt_path]
+
+def _write_samples(stacks, label, top_n, interval):
+    # Collapsed stacks ("a;b;c count"), the input format of flamegraph.pl and speedscope
+    folded_path = _run_path(label, "folded")
+    with open(folded_path, 'w', encoding='utf-8') as f:
+        for stack, count in stacks.most_common():
+            f.write(f"{';'.join(stack)} {count}\n")
+
+    total = sum(stacks.values())
+    self_counts = Counter()
+    inclusive_counts = Counter()
+    for stack, count in stacks.items():
+        self_counts[stack[-1]] += count
+        for name in set(stack):
+            inclusive_counts[name] += count
+
+    txt_path = folded_path[:-len(".folded")] + ".txt"
+    with open(txt_path, 'w', encoding='utf-8') as f:
+        f.write(f"{total} samples at {interval * 1000:.1f} ms intervals\n\n")
+        for title, counts in (("Self time", self_counts), ("Inclusive time", inclusive_counts)):
+            f.write(f"{title}:\n{'samples':>8} {'%':>6}  function\n")
+            for name, count in counts.most_common(top_n):
+                f.write(f"{count:8} {100 * count / max(total, 1):6.1f}  {name}\n")
+            f.write("\n")
+    return [folded_path, txt_path]
+
+@contextmanager
+def _profiled(label, mode, interval, top_n, outputs):
+    if mode == "cprofile":
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            yield outputs
+        finally:
+            profile.disable()
+            outputs.extend(_write_cprofile(profile, label, top_n))
+    elif mode == "sample":
+        stacks = Counter()
+        stop = threading.Event()
+        sampler = threading.Thread(
+            target=_sample, args=(threading.get_ident(), interval, stacks, stop), daemon=True
+        )
+        sampler.start()
+        try:
+            yield outputs
+        finally:
+            stop.set()
+            sampler.join()
+            outputs.extend(_write_samples(stacks, label, top_n, interval))
+    else:
+        raise ValueError(f"Unknown profile mode {mode!r}; expected one of {PROFILE_MODES}")
+
+def profile_run(label, mode=None, interval=SAMPLE_INTERVAL, top_n=TOP_N):
+    """Profile the enclosed block when `mode` is "cprofile" or "sample".
+
+    With mode None this is a no-op context. Otherwise the block yields a
+    list that is filled with the written file paths on exit: a .prof (or
+    collapsed-stack .folded) file plus a .txt table of the top-N functions.
+    """
+    if not mode:
+        return nullcontext([])
+    return _profiled(f"{label}_{mode}", mode, interval, top_n, [])
@@ -1,51 +1,176 @@
 import os
+import sys
+import time
+import tracemalloc
 import PyPDF2
 import re
+from collections import namedtuple
+from functools import lru_cache
+
+# PDF extraction limits; only the first pages of a resume matter for scoring
+PDF_MAX_PAGES = 10
+PDF_MAX_CHARS = 60000
+PDF_TIME_BUDGET = 5.0  # seconds per file, checked between pages
+# Pages still read after every key section header has been seen
+SECTION_GRACE_PAGES = 1
+
+# Section header keywords, checked in priority order on each lowercased line
+SECTION_KEYWORDS = [("skills", "skill"), ("experience", "experience"), ("projects", "project")]
+SECTION_NAMES = ["skills", "experience", "projects", "other"]
+
+_SECTION_RE = re.compile("|".join(keyword for _, keyword in SECTION_KEYWORDS))
+_TOKEN_RE = re.compile(r'\w+')
+_EMAIL_RE = re.compile(r'(?:^|[^\w@])([\w\.-]+(?:_[\w\.-]+)*@[\w\.-]+\.\w+)')
+# tamu.edu addresses have a special format, so they take precedence, then academic domains
+_TAMU_RE = re.compile(r'(?:^|[^\w@])([a-zA-Z]+_?\d+@tamu\.edu)')
+_ACADEMIC_RE = re.compile(r'(?:^|[^\w@])([\w\.-]+(?:_[\w\.-]+)*@(?:[\w-]+\.)+(?:edu|ac\.[\w]{2,}))')
+
+DocumentAnalysis = namedtuple("DocumentAnalysis", ["text", "sections", "email", "tokens"])
+DocumentAnalysis.__doc__ = "Text, sections, email and lowercased token set of a document."
+
+def iter_pdf_pages(file_path, max_pages=PDF_MAX_PAGES, max_chars=PDF_MAX_CHARS,
+                   time_budget=PDF_TIME_BUDGET, stats=None):
+    """Yield page texts lazily until the page, character or time limit is hit.
+
+    If a `stats` dict is given it is filled with pages_read, total_pages,
+    chars, elapsed and stop_reason.
+    """
+    stats = stats if stats is not None else {}
+    stats.update(pages_read=0, total_pages=0, chars=0, elapsed=0.0, stop_reason="end")
+    start = time.perf_counter()
 
-def extract_text_from_pdf(file_path):
     with open(file_path, 'rb') as f:
         reader = PyPDF2.PdfReader(f)
-        return " ".join(page.extract_text() or "" for page in reader.pages)
+        stats["total_pages"] = len(reader.pages)
+        for index in range(stats["total_pages"]):
+            if max_pages is not None and index >= max_pages:
+                stats["stop_reason"] = "max_pages"
+                break
+            # The first page is always read so slow files still yield some text
+            if index > 0 and time_budget is not None and time.perf_counter() - start > time_budget:
+                stats["stop_reason"] = "time_budget"
+                break
 
-def extract_sections(text):
-    sections = {"skills": "", "experience": "", "projects": "", "other": ""}
+            text = reader.pages[index].extract_text() or ""
+            if max_chars is not None and stats["chars"] + len(text) > max_chars:
+                text = text[:max_chars - stats["chars"]]
+                stats["stop_reason"] = "max_chars"
+
+            stats["pages_read"] += 1
+            stats["chars"] += len(text)
+            stats["elapsed"] = time.perf_counter() - start
+            yield text
+            if stats["stop_reason"] == "max_chars":
+                break
+
+    stats["elapsed"] = time.perf_counter() - start
+
+def extract_text_from_pdf(file_path, max_pages=PDF_MAX_PAGES, max_chars=PDF_MAX_CHARS,
+                          time_budget=PDF_TIME_BUDGET, stop_at_sections=True, stats=None):
+    """Extract text page by page, stopping early once the key sections are found."""
+    stats = stats if stats is not None else {}
+    pages = []
+    found = set()
+    grace = None
+
+    for text in iter_pdf_pages(file_path, max_pages, max_chars, time_budget, stats):
+        pages.append(text)
+        if not stop_at_sections:
+            continue
+        if grace is not None:
+            grace -= 1
+        else:
+            found.update(_SECTION_RE.findall(text.lower()))
+            if len(found) == len(SECTION_KEYWORDS):
+                grace = SECTION_GRACE_PAGES
+        if grace == 0:
+            stats["stop_reason"] = "sections_found"
+            break
+
+    return " ".join(pages)
+
+def profile_pdf_extraction(file_paths, **limits):
+    """Report latency and peak memory of extracting each PDF."""
+    report = []
+    for file_path in file_paths:
+        stats = {}
+        tracemalloc.start()
+        try:
+            extract_text_from_pdf(file_path, stats=stats, **limits)
+            _, peak = tracemalloc.get_traced_memory()
+        except Exception as e:
+            stats["error"] = str(e)
+            peak = 0
+        finally:
+            tracemalloc.stop()
+        stats.update(file=os.path.basename(file_path), peak_kb=round(peak / 1024, 1),
+                     elapsed=round(stats.get("elapsed", 0.0), 3))
+        report.append(stats)
+    return report
+
+def analyze_document(text):
+    """Produce sections, email and token set in a single walk over the text."""
+    parts = {name: [] for name in SECTION_NAMES}
+    tokens = set()
     current = "other"
+    tamu_email = academic_email = any_email = None
+
     for line in text.splitlines():
         line = line.strip()
         if not line:
             continue
-        l = line.lower()
-        if "skill" in l:
-            current = "skills"
-        elif "experience" in l:
-            current = "experience"
-        elif "project" in l:
-            current = "projects"
-        sections[current] += line + " "
-    return sections
+        lower = line.lower()
 
-def extract_email(text):
-    """Extract email from text using robust pattern matching"""
-    # First try to find email with domain tamu.edu specifically since it has special format
-    tamu_pattern = r'(?:^|[^\w@])([a-zA-Z]+_?\d+@tamu\.edu)'
-    tamu_match = re.search(tamu_pattern, text.lower())
-    if tamu_match:
-        return tamu_match.group(1)
-    
-    # Then try to find email with common academic domains
-    academic_pattern = r'(?:^|[^\w@])([\w\.-]+(?:_[\w\.-]+)*@(?:[\w-]+\.)+(?:edu|ac\.[\w]{2,}))'
-    academic_match = re.search(academic_pattern, text.lower())
-    if academic_match:
-        return academic_match.group(1)
-    
-    # Finally try to find any email
-    email_pattern = r'(?:^|[^\w@])([\w\.-]+(?:_[\w\.-]+)*@[\w\.-]+\.\w+)'
-    match = re.search(email_pattern, text.lower())
-    if match:
-        email = match.group(1)
+        headers = set(_SECTION_RE.findall(lower))
+        for name, keyword in SECTION_KEYWORDS:
+            if keyword in headers:
+                current = name
+                break
+        parts[current].append(line)
+        tokens.update(_TOKEN_RE.findall(lower))
+
+        if tamu_email is None and '@' in lower:
+            for match in _EMAIL_RE.finditer(lower):
+                candidate = match.group(0)
+                tamu = _TAMU_RE.search(candidate)
+                if tamu:
+                    tamu_email = tamu.group(1)
+                    break
+                academic = _ACADEMIC_RE.search(candidate)
+                if academic and academic_email is None:
+                    academic_email = academic.group(1)
+                if any_email is None:
+                    any_email = match.group(1)
+
+    email = tamu_email or academic_email or ""
+    if not email and any_email:
+        email = any_email
         # Remove any unwanted prefixes
         if email.startswith('t') and '@' in email[1:]:
             email = email[1:]
-        return email
-    
-    return ""
+
+    sections = {name: "".join(line + " " for line in lines) for name, lines in parts.items()}
+    return DocumentAnalysis(text, sections, email, tokens)
+
+@lru_cache(maxsize=256)
+def _analyze_pdf_cached(file_path, mtime_ns, size):
+    return analyze_document(extract_text_from_pdf(file_path))
+
+def analyze_pdf(file_path):
+    """Analyze a PDF, reusing the result while the file is unchanged."""
+    stat = os.stat(file_path)
+    return _analyze_pdf_cached(file_path, stat.st_mtime_ns, stat.st_size)
+
+def extract_sections(text):
+    return analyze_document(text).sections
+
+def extract_email(text):
+    """Extract email from text using robust pattern matching"""
+    return analyze_document(text).email
+
+if __name__ == "__main__":
+    # Usage: python resume_parser.py <pdf> [<pdf> ...]
+    for row in profile_pdf_extraction(sys.argv[1:]):
+        print(f"{row['file']}: {row.get('pages_read', 0)}/{row.get('total_pages', 0)} pages, "
+              f"{row.get('chars', 0)} chars, {row['elapsed']}s, peak {row['peak_kb']} KB, "
+              f"stopped: {row.get('error', row.get('stop_reason'))}")
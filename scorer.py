@@ -1,13 +1,77 @@
 import re
+import json
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import nltk
-from sentence_transformers import SentenceTransformer, util
-from langchain_ollama import ChatOllama
-from langchain_core.messages import HumanMessage
 from nltk.corpus import stopwords
 from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS
+import numpy as np
 import pandas as pd
 import os
 from datetime import datetime
+from resume_parser import SECTION_KEYWORDS, PDF_MAX_PAGES, PDF_MAX_CHARS
+from llm_client import chat, LLMUnavailable, pool_capacity, OLLAMA_MODEL, NUM_CTX
+from compaction import compact_sections, LLM_RESUME_TOKEN_BUDGET
+from skill_matcher import extract_skills, skill_overlap, get_automaton
+
+# Candidates packed into one structured-output LLaMA call (1 = one call per resume)
+LLM_BATCH_SIZE = 4
+# Extra batched rounds for entries missing from or malformed in the reply
+LLM_BATCH_RETRIES = 1
+
+BATCH_SCORE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "scores": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "id": {"type": "integer"},
+                    "score": {"type": "number", "minimum": 0, "maximum": 1}
+                },
+                "required": ["id", "score"]
+            }
+        }
+    },
+    "required": ["scores"]
+}
+
+# Scoring prompts. Static instructions and the JD come first so every resume
+# scored against a JD shares a byte-identical prompt prefix that Ollama can reuse.
+# Editing them changes the "llama" component version (see component_versions).
+LLAMA_PROMPT = """You are a technical hiring assistant.
+Based on the candidate's skills, experience, and projects, rate their relevance to the job requirements on a scale of 0-1.
+Focus on technical skills alignment and potential to learn required technologies.
+Respond with ONLY a number between 0 and 1.
+
+Position: {job_role}
+
+Job Requirements:
+{jd_text}
+
+Candidate Information:
+{resume_text}
+"""
+
+LLAMA_BATCH_PROMPT = """You are a technical hiring assistant.
+For each candidate below, rate their relevance to the job requirements on a scale of 0-1, based on their skills, experience, and projects.
+Focus on technical skills alignment and potential to learn required technologies.
+Respond with JSON of the form {{"scores": [{{"id": <candidate id>, "score": <number between 0 and 1>}}]}}, with one entry per candidate.
+
+Position: {job_role}
+
+Job Requirements:
+{jd_text}
+
+Candidates:
+{candidate_blocks}
+"""
+
+# Counters for batched scoring: requests, candidates sent, entries that had to be re-requested
+BATCH_STATS = {"requests": 0, "candidates": 0, "invalid_entries": 0, "fallbacks": 0}
+_stats_lock = threading.Lock()
 
 # Download required NLTK data
 try:
@@ -16,8 +80,38 @@ except LookupError:
     nltk.download('stopwords', quiet=True)
 
 # Initialize models
-bert_model = SentenceTransformer('all-MiniLM-L6-v2')
-llm = ChatOllama(model='llama3.2')
+EMBEDDING_MODEL = 'all-MiniLM-L6-v2'
+_bert_model = None
+
+def get_bert_model():
+    """Load the sentence-transformer on first use so importing scorer stays cheap."""
+    global _bert_model
+    if _bert_model is None:
+        from sentence_transformers import SentenceTransformer
+        _bert_model = SentenceTransformer(EMBEDDING_MODEL)
+    return _bert_model
+
+def _text_hash(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+def encode_cached(texts):
+    """Unit-length embeddings of `texts`, one row per text.
+
+    Embeddings are cached in SQLite by text digest and model, so a resume
+    section is encoded once no matter how many JDs (or JD edits) it is
+    scored against.
+    """
+    from db_utils import load_embeddings, save_embeddings
+
+    keys = [_text_hash(text) for text in texts]
+    vectors = load_embeddings(EMBEDDING_MODEL, set(keys))
+    missing = {key: text for key, text in zip(keys, texts) if key not in vectors}
+    if missing:
+        encoded = get_bert_model().encode(list(missing.values()), normalize_embeddings=True)
+        fresh = {key: np.asarray(vector, dtype=np.float32) for key, vector in zip(missing, encoded)}
+        save_embeddings(EMBEDDING_MODEL, fresh)
+        vectors.update(fresh)
+    return np.vstack([vectors[key] for key in keys])
 
 # Common JD section headers to identify relevant parts
 JD_HEADERS = [
@@ -28,13 +122,7 @@ JD_HEADERS = [
     "about the role", "your role", "essential skills", "desired skills"
 ]
 
-# Section headers & base weights (updated weights)
-SECTION_MAP = {
-    "skills": ["skills", "technical skills", "skill set"],
-    "experience": ["experience", "professional experience", "technical experience", "work experience"],
-    "projects": ["projects", "academic projects", "personal projects"]
-}
-
+# Section base weights (updated weights)
 BASE_WEIGHTS = {
     "skills": 0.10,
     "experience": 0.50,  # Reduced from 0.60
@@ -42,6 +130,14 @@ BASE_WEIGHTS = {
     "other": 0.10
 }
 
+# Final score mix between the scoring components
+SCORE_MIX = {
+    "bert": 0.60,     # BERT semantic similarity
+    "llama": 0.25,    # LLaMA evaluation
+    "keyword": 0.15,  # Keyword overlap
+    "skill": 0.0      # Skill-taxonomy overlap (off by default; shift weight from "keyword")
+}
+
 # Combined stopwords from NLTK and scikit-learn
 STOPWORDS = set(stopwords.words('english')).union(ENGLISH_STOP_WORDS)
 
@@ -89,30 +185,14 @@ def preprocess_jd(text):
     processed_text = "\n".join(relevant_sections)
     return processed_text if processed_text.strip() else text  # Return original if no sections found
 
-def clean_line(line):
-    """Clean and normalize text line."""
-    return re.sub(r'[^A-Za-z0-9\s]', '', line).strip().lower()
-
-def extract_sections(text):
-    """Extract sections from resume text with improved section detection."""
-    sections = {k: "" for k in BASE_WEIGHTS}
-    current = "other"
-    
-    for raw in text.splitlines():
-        line = clean_line(raw)
-        if not line:
-            continue
-        for key, aliases in SECTION_MAP.items():
-            if any(alias in line for alias in aliases):
-                current = key
-                break
-        sections[current] += raw + " "
-    return sections
+def extract_keywords(text):
+    """Lowercased word tokens of a text with stopwords removed."""
+    return {w for w in re.findall(r'\w+', text.lower()) if w not in STOPWORDS}
 
 def keyword_overlap(jd_text, resume_text):
     """Calculate keyword overlap score between JD and resume."""
-    jd_kw = {w for w in re.findall(r'\w+', jd_text.lower()) if w not in STOPWORDS}
-    resume_kw = {w for w in re.findall(r'\w+', resume_text.lower()) if w not in STOPWORDS}
+    jd_kw = extract_keywords(jd_text)
+    resume_kw = extract_keywords(resume_text)
     return len(jd_kw & resume_kw) / max(len(jd_kw), 1)
 
 def extract_job_role(jd_text):
@@ -134,33 +214,34 @@ def extract_job_role(jd_text):
     
     return "this position"  # Fallback if no role found
 
-def llama_similarity(jd_text, sections, job_role):
-    """Get LLaMA's evaluation of resume relevance."""
+def _candidate_text(sections):
     # Combine relevant sections with clear separation
-    resume_text = (
+    return (
         f"Skills:\n{sections.get('skills', '')}\n\n"
         f"Experience:\n{sections.get('experience', '')}\n\n"
         f"Projects:\n{sections.get('projects', '')}"
     )
+
+def llama_similarity(jd_text, sections, job_role, token_budget=LLM_RESUME_TOKEN_BUDGET):
+    """Get LLaMA's evaluation of resume relevance.
+
+    Sections are first compacted to the sentences most relevant to the JD
+    within `token_budget` tokens (None sends them whole). Returns None when
+    the LLM is unavailable (timeouts or open circuit breaker) so the caller
+    can fall back to a degraded score.
+    """
+    sections = compact_sections(sections, jd_text, token_budget)
+
+    resume_text = _candidate_text(sections)
     
     if not any(sections.get(k, '').strip() for k in ['skills', 'experience', 'projects']):
         print("Warning: All relevant sections are empty")
         return 0.1
         
-    prompt = f"""You are a technical hiring assistant evaluating a candidate for {job_role}.
-Based on the candidate's skills, experience, and projects, rate their relevance to the job requirements on a scale of 0-1.
-Focus on technical skills alignment and potential to learn required technologies.
-Respond with ONLY a number between 0 and 1.
-
-Job Requirements:
-{jd_text}
-
-Candidate Information:
-{resume_text}
-"""
+    prompt = LLAMA_PROMPT.format(job_role=job_role, jd_text=jd_text, resume_text=resume_text)
     
     try:
-        reply = llm.invoke([HumanMessage(content=prompt)]).content.strip()
+        reply = chat(prompt)
         print(f"DEBUG - Job Role: {job_role}")
         print(f"DEBUG - LLaMA raw response: {reply}")
         
@@ -218,12 +299,114 @@ Candidate Information:
         print(f"WARNING - Could not extract score from LLaMA response: {reply}")
         return 0.1  # Minimum score as fallback
         
+    except LLMUnavailable as e:
+        print(f"WARNING - LLaMA unavailable, scoring without it: {str(e)}")
+        return None
     except Exception as e:
         print(f"ERROR - LLaMA scoring error: {str(e)}")
-        if "connection" in str(e).lower():
-            print("WARNING - Possible connection issue with LLaMA")
         return 0.1  # Return minimum score instead of 0
 
+def _parse_batch_scores(reply, expected_ids):
+    """Valid {id: score} entries from a batched reply; anything else is dropped."""
+    try:
+        entries = json.loads(reply).get("scores", [])
+    except (ValueError, AttributeError):
+        return {}
+    scores = {}
+    if not isinstance(entries, list):
+        return scores
+    for entry in entries:
+        if not isinstance(entry, dict):
+            continue
+        candidate_id, score = entry.get("id"), entry.get("score")
+        if isinstance(score, bool) or not isinstance(score, (int, float)) or not 0 <= score <= 1:
+            continue
+        if candidate_id in expected_ids and candidate_id not in scores:
+            scores[candidate_id] = float(score)
+    return scores
+
+def _llama_batch_request(jd_text, job_role, candidates):
+    """One structured-output call for {id: sections}; returns the valid {id: score} entries."""
+    candidate_blocks = "\n".join(
+        f'<candidate id="{candidate_id}">\n{_candidate_text(sections)}\n</candidate>'
+        for candidate_id, sections in candidates.items()
+    )
+    prompt = LLAMA_BATCH_PROMPT.format(job_role=job_role, jd_text=jd_text, candidate_blocks=candidate_blocks)
+    reply = chat(prompt, format=BATCH_SCORE_SCHEMA)
+    scores = _parse_batch_scores(reply, set(candidates))
+    with _stats_lock:
+        BATCH_STATS["requests"] += 1
+        BATCH_STATS["candidates"] += len(candidates)
+        BATCH_STATS["invalid_entries"] += len(candidates) - len(scores)
+    print(f"DEBUG - LLaMA batch scored {len(scores)}/{len(candidates)} candidate(s)")
+    return scores
+
+def llama_similarity_batch(jd_text, sections_list, job_role, token_budget=LLM_RESUME_TOKEN_BUDGET,
+                           batch_size=LLM_BATCH_SIZE):
+    """LLaMA relevance scores for several resumes against one JD.
+
+    Candidates are packed `batch_size` at a time into structured-output calls.
+    Only the entries missing from or malformed in a reply are re-requested,
+    then scored one by one with llama_similarity as a last resort.
+    Returns one score per resume; None entries mean the LLM is unavailable.
+    """
+    if batch_size <= 1:
+        return [llama_similarity(jd_text, sections, job_role, token_budget) for sections in sections_list]
+
+    scores = [None] * len(sections_list)
+    pending = {}
+    for idx, sections in enumerate(sections_list):
+        sections = compact_sections(sections, jd_text, token_budget)
+        if not any(sections.get(k, '').strip() for k in ['skills', 'experience', 'projects']):
+            scores[idx] = 0.1  # same floor as llama_similarity for empty resumes
+        else:
+            pending[idx] = sections
+
+    def request(chunk):
+        # Ids are local to the request so the model only sees small integers
+        return _llama_batch_request(jd_text, job_role, {n: pending[idx] for n, idx in enumerate(chunk, start=1)})
+
+    # Chunks go out concurrently, one per free slot in the Ollama endpoint pool;
+    # each chunk's scores are kept as soon as it completes
+    with ThreadPoolExecutor(max_workers=pool_capacity()) as executor:
+        unavailable = False
+        for _ in range(1 + LLM_BATCH_RETRIES):
+            if not pending or unavailable:
+                break
+            order = list(pending)
+            futures = {
+                executor.submit(request, order[start:start + batch_size]): order[start:start + batch_size]
+                for start in range(0, len(order), batch_size)
+            }
+            for future in as_completed(futures):
+                if future.cancelled():
+                    continue
+                chunk = futures[future]
+                try:
+                    chunk_scores = future.result()
+                except LLMUnavailable as e:
+                    if not unavailable:
+                        print(f"WARNING - LLaMA unavailable, scoring without it: {str(e)}")
+                        unavailable = True
+                        # Chunks not started yet would fail the same way
+                        for other in futures:
+                            other.cancel()
+                    continue
+                for n, score in chunk_scores.items():
+                    scores[chunk[n - 1]] = score
+                    del pending[chunk[n - 1]]
+        if unavailable:
+            return scores
+
+        def fallback(idx):
+            with _stats_lock:
+                BATCH_STATS["fallbacks"] += 1
+            return llama_similarity(jd_text, pending[idx], job_role, token_budget=None)
+
+        for idx, score in zip(list(pending), list(executor.map(fallback, list(pending)))):
+            scores[idx] = score
+    return scores
+
 def dynamic_weights(sections):
     """Adjust weights based on section content."""
     w = BASE_WEIGHTS.copy()
@@ -238,49 +421,229 @@ def dynamic_weights(sections):
         w["projects"] = 0.0
     return w
 
-def weighted_score(sections, jd_text):
-    """Calculate final weighted score combining BERT, LLaMA, and keyword overlap."""
-    # Extract job role from raw JD first
-    job_role = extract_job_role(jd_text)
-    
-    # Preprocess JD text
-    processed_jd = preprocess_jd(jd_text)
-    
-    # BERT section scoring
-    weights = dynamic_weights(sections)
-    jd_emb = bert_model.encode(processed_jd, convert_to_tensor=True)
-    bert_total = 0.0
-    
-    for sec, text in sections.items():
-        if not text.strip() or weights[sec] == 0:
-            continue
-        emb = bert_model.encode(text, convert_to_tensor=True)
-        sim = util.pytorch_cos_sim(emb, jd_emb).item()
-        bert_total += weights[sec] * sim
-
-    # Keyword overlap scoring
-    full_text = " ".join(sections.values())
-    kw_overlap = keyword_overlap(processed_jd, full_text)
+def combine_scores(sections, section_sims, llama_score, kw_overlap, degraded=False, skill_score=None):
+    """Combine component scores into the final score dict.
 
-    # LLaMA scoring - now passing all sections and job role
-    llama_score = llama_similarity(processed_jd, sections, job_role)
+    `section_sims` maps each section to its BERT similarity with the JD, or None
+    for empty sections. A `llama_score` of None means the LLM was skipped; the
+    final score is then renormalized over the other components. `degraded`
+    marks scores where the LLM was wanted but unavailable. A `skill_score` of
+    None (the JD names no known skills) falls back to the keyword overlap.
+    """
+    weights = dynamic_weights(sections)
+    bert_total = sum(weights[sec] * sim for sec, sim in section_sims.items() if sim is not None)
+    skill_part = skill_score if skill_score is not None else kw_overlap
 
     # Final weighted combination
-    final_score = (
-        0.60 * bert_total +  # BERT semantic similarity
-        0.25 * llama_score + # LLaMA evaluation
-        0.15 * kw_overlap    # Keyword overlap
-    )
+    if llama_score is None:
+        final_score = (
+            SCORE_MIX["bert"] * bert_total +
+            SCORE_MIX["keyword"] * kw_overlap +
+            SCORE_MIX["skill"] * skill_part
+        ) / (SCORE_MIX["bert"] + SCORE_MIX["keyword"] + SCORE_MIX["skill"])
+    else:
+        final_score = (
+            SCORE_MIX["bert"] * bert_total +
+            SCORE_MIX["llama"] * llama_score +
+            SCORE_MIX["keyword"] * kw_overlap +
+            SCORE_MIX["skill"] * skill_part
+        )
 
     # Return all scores
-    scores = {
+    return {
         "bert_score": round(bert_total * 100, 2),
-        "llama_score": round(llama_score * 100, 2),
+        "llama_score": round(llama_score * 100, 2) if llama_score is not None else None,
         "keyword_overlap": round(kw_overlap * 100, 2),
-        "final_score": round(final_score * 100, 2)
+        "skill_overlap": round(skill_score * 100, 2) if skill_score is not None else None,
+        "final_score": round(final_score * 100, 2),
+        "degraded": degraded,
+        # Raw components so the final score can be recombined under other weights
+        "components": {
+            **{f"sim_{sec}": sim for sec, sim in section_sims.items()},
+            "llama_score": llama_score,
+            "keyword_overlap": kw_overlap,
+            "skill_overlap": skill_score
+        }
     }
-    
-    return scores
+
+def score_matrix(resume_sections, jd_texts, use_llm=True, llama_scores=None, resume_tokens=None):
+    """Score one or more resumes against a set of JDs in a single pass.
+
+    Every non-empty resume section and every processed JD is encoded exactly
+    once; similarities come from one section x JD matrix product. Known LLaMA
+    scores can be passed in `llama_scores` (resume x JD, None where unknown)
+    to skip those LLM calls, and precomputed resume token sets (e.g.
+    `DocumentAnalysis.tokens`) in `resume_tokens`. Returns a list (one per resume) of lists (one per
+    JD) of score dicts.
+    """
+    processed_jds = [preprocess_jd(text) for text in jd_texts]
+    job_roles = [extract_job_role(text) for text in jd_texts]
+    jd_keywords = [extract_keywords(text) for text in processed_jds]
+    jd_skills = [extract_skills(text) for text in processed_jds]
+
+    # Flatten all non-empty sections so they are encoded in one batch
+    section_keys = []
+    section_texts = []
+    for r_idx, sections in enumerate(resume_sections):
+        for sec, text in sections.items():
+            if text.strip():
+                section_keys.append((r_idx, sec))
+                section_texts.append(text)
+
+    sims = None
+    if section_texts and processed_jds:
+        # Cosine similarity of unit vectors; cached resume sections skip the encoder
+        sims = encode_cached(section_texts) @ encode_cached(processed_jds).T
+
+    section_sims = [[{sec: None for sec in BASE_WEIGHTS} for _ in jd_texts] for _ in resume_sections]
+    for row, (r_idx, sec) in enumerate(section_keys):
+        for j_idx in range(len(jd_texts)):
+            section_sims[r_idx][j_idx][sec] = float(sims[row, j_idx])
+
+    llama = [
+        [llama_scores[r_idx][j_idx] if llama_scores else None for j_idx in range(len(jd_texts))]
+        for r_idx in range(len(resume_sections))
+    ]
+    if use_llm:
+        # One batched LLaMA pass per JD over the resumes without a known score
+        for j_idx, processed_jd in enumerate(processed_jds):
+            missing = [r_idx for r_idx in range(len(resume_sections)) if llama[r_idx][j_idx] is None]
+            if missing:
+                batch = llama_similarity_batch(
+                    processed_jd, [resume_sections[r_idx] for r_idx in missing], job_roles[j_idx])
+                for r_idx, score in zip(missing, batch):
+                    llama[r_idx][j_idx] = score
+
+    versions = component_versions()
+    fingerprint = pipeline_fingerprint(versions)
+    results = []
+    for r_idx, sections in enumerate(resume_sections):
+        if resume_tokens is not None:
+            resume_keywords = resume_tokens[r_idx] - STOPWORDS
+        else:
+            resume_keywords = extract_keywords(" ".join(sections.values()))
+        # One automaton pass per resume, shared by every JD
+        resume_skills = extract_skills(" ".join(sections.values()))
+        row = []
+        for j_idx, processed_jd in enumerate(processed_jds):
+            kw_overlap = len(jd_keywords[j_idx] & resume_keywords) / max(len(jd_keywords[j_idx]), 1)
+            skill_score = skill_overlap(jd_skills[j_idx], resume_skills)
+            llama_score = llama[r_idx][j_idx]
+            degraded = use_llm and llama_score is None
+            scores = combine_scores(sections, section_sims[r_idx][j_idx], llama_score, kw_overlap, degraded,
+                                    skill_score)
+            scores["versions"] = versions
+            scores["fingerprint"] = fingerprint
+            row.append(scores)
+        results.append(row)
+    return results
+
+def weighted_score(sections, jd_text, llama_score=None, resume_tokens=None):
+    """Calculate final weighted score combining BERT, LLaMA, and keyword overlap.
+
+    Pass `llama_score` to reuse a known LLaMA evaluation (e.g. from a
+    near-duplicate resume) instead of calling the LLM.
+    """
+    return score_matrix(
+        [sections], [jd_text],
+        llama_scores=[[llama_score]],
+        resume_tokens=[resume_tokens] if resume_tokens is not None else None
+    )[0][0]
+
+def _normalized(weights):
+    """Scale a weight dict so its values sum to 1."""
+    total = sum(weights.values())
+    if total <= 0:
+        return dict(weights)
+    return {k: v / total for k, v in weights.items()}
+
+def rescore_components(components, weights=None, mix=None):
+    """Recompute final scores for stored score components in one vectorized pass.
+
+    `components` is a DataFrame as returned by `db_utils.load_score_components`.
+    Missing section similarities (empty sections) are NaN and follow the same
+    redistribution rules as `dynamic_weights`. Returns final scores (0-100).
+    """
+    weights = _normalized(weights or BASE_WEIGHTS)
+    mix = _normalized(mix or SCORE_MIX)
+
+    sims = {sec: components[f"sim_{sec}"].to_numpy(dtype=float) for sec in BASE_WEIGHTS}
+    has_exp = ~np.isnan(sims["experience"])
+    has_prj = ~np.isnan(sims["projects"])
+
+    section_weights = {sec: np.full(len(components), weights.get(sec, 0.0)) for sec in BASE_WEIGHTS}
+    # Same redistribution as dynamic_weights, applied row-wise
+    section_weights["experience"] = np.where(
+        has_exp, weights["experience"] + np.where(has_prj, 0.0, weights["projects"]), 0.0)
+    section_weights["projects"] = np.where(
+        has_prj, weights["projects"] + np.where(has_exp, 0.0, weights["experience"]), 0.0)
+
+    bert_total = sum(section_weights[sec] * np.nan_to_num(sims[sec]) for sec in BASE_WEIGHTS)
+    llama = components["llama_score"].to_numpy(dtype=float)
+    keyword = components["keyword_overlap"].to_numpy(dtype=float)
+    if "skill_overlap" in components:
+        skill = components["skill_overlap"].to_numpy(dtype=float)
+        # Rows without a skill score (older rows, JDs without known skills) use keywords
+        skill = np.where(np.isnan(skill), keyword, skill)
+    else:
+        skill = keyword
+    lexical = mix["keyword"] * keyword + mix.get("skill", 0.0) * skill
+    final_score = np.where(
+        np.isnan(llama),
+        # Rows scored without the LLM are renormalized over the other components
+        (mix["bert"] * bert_total + lexical) / max(mix["bert"] + mix["keyword"] + mix.get("skill", 0.0), 1e-9),
+        mix["bert"] * bert_total + mix["llama"] * np.nan_to_num(llama) + lexical
+    )
+    return pd.Series(np.round(final_score * 100, 2), index=components.index)
+
+def apply_llama_score(scores, llama_score):
+    """Return a copy of a score dict computed without LLaMA, with `llama_score` filled in."""
+    components = {**scores["components"], "llama_score": llama_score}
+    final_score = rescore_components(pd.DataFrame([components])).iloc[0]
+    return {
+        **scores,
+        "llama_score": round(llama_score * 100, 2),
+        "final_score": float(final_score),
+        "degraded": False,
+        "components": components
+    }
+
+# Bump a component's revision when its logic changes in a way that
+# component_versions can't see (e.g. a new similarity formula)
+COMPONENT_REVISIONS = {"bert": 1, "llama": 1, "keyword": 1, "skill": 1}
+
+def _digest(*parts):
+    return hashlib.sha1(json.dumps(parts, sort_keys=True, default=sorted).encode("utf-8")).hexdigest()[:12]
+
+def component_versions():
+    """Version stamp of every score component: a digest of everything its value depends on.
+
+    Resume parsing and JD preprocessing feed every component; on top of that
+    BERT depends on the embedding model, LLaMA on the model, prompts, context
+    size and compaction budget, and the overlaps on stopwords and the skill
+    taxonomy. Final-score weights are not included, since stored components
+    are recombined under any weight profile without re-scoring.
+    """
+    inputs = (SECTION_KEYWORDS, PDF_MAX_PAGES, PDF_MAX_CHARS, JD_HEADERS)
+    return {
+        "bert": _digest(COMPONENT_REVISIONS["bert"], inputs, EMBEDDING_MODEL),
+        "llama": _digest(COMPONENT_REVISIONS["llama"], inputs, OLLAMA_MODEL, LLAMA_PROMPT, LLAMA_BATCH_PROMPT,
+                         NUM_CTX, LLM_RESUME_TOKEN_BUDGET, EMBEDDING_MODEL),
+        "keyword": _digest(COMPONENT_REVISIONS["keyword"], inputs, STOPWORDS),
+        "skill": _digest(COMPONENT_REVISIONS["skill"], inputs, get_automaton().digest)
+    }
+
+def pipeline_fingerprint(versions=None):
+    """Single digest of all component versions, stamped on every score row."""
+    return _digest(versions or component_versions())
+
+def lexical_overlaps(sections, jd_text):
+    """(keyword overlap, skill overlap) of a resume against a JD, without BERT or the LLM."""
+    processed_jd = preprocess_jd(jd_text)
+    resume_text = " ".join(sections.values())
+    jd_keywords = extract_keywords(processed_jd)
+    kw_overlap = len(jd_keywords & extract_keywords(resume_text)) / max(len(jd_keywords), 1)
+    return kw_overlap, skill_overlap(extract_skills(processed_jd), extract_skills(resume_text))
 
 def save_detailed_scores(jd_name, resume_name, scores):
     """Save detailed scoring information to CSV."""
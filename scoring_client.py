@@ -0,0 +1,91 @@
+import os
+import json
+from urllib import request as urlrequest
+from urllib.parse import urlencode
+
+# When set, scoring and summaries go through the local scoring service
+# (python cli.py serve); otherwise they run in this process.
+SERVICE_URL = os.environ.get("SCORING_SERVICE_URL", "")
+REQUEST_TIMEOUT = 600
+
+class ScoringServiceError(Exception):
+    pass
+
+def _call(method, path, payload=None, service_url=None):
+    url = (service_url or SERVICE_URL).rstrip("/") + path
+    data = json.dumps(payload).encode("utf-8") if payload is not None else None
+    req = urlrequest.Request(url, data=data, method=method, headers={"Content-Type": "application/json"})
+    try:
+        with urlrequest.urlopen(req, timeout=REQUEST_TIMEOUT) as response:
+            return json.loads(response.read())
+    except urlrequest.HTTPError as e:
+        try:
+            message = json.loads(e.read()).get("error", str(e))
+        except ValueError:
+            message = str(e)
+        raise ScoringServiceError(f"{e.code}: {message}") from e
+    except OSError as e:
+        raise ScoringServiceError(f"Scoring service unreachable at {url}: {e}") from e
+
+def score_resumes(jd_text, resumes, use_llm=True, service_url=None, time_budget=None):
+    """Score resumes ({name, path|text, llama_score?}) against a JD.
+
+    With a `time_budget` (seconds), LLaMA refinement stops at the deadline and
+    unrefined rows come back flagged `degraded` (provisional).
+    """
+    if service_url or SERVICE_URL:
+        return _call("POST", "/score", {"jd_text": jd_text, "resumes": resumes, "use_llm": use_llm,
+                                        "time_budget": time_budget}, service_url)["results"]
+    if time_budget and use_llm:
+        from scoring_service import score_with_deadline
+        return score_with_deadline(jd_text, resumes, time_budget)
+    from scoring_service import score_batch
+    return score_batch(jd_text, resumes, use_llm)
+
+def match_resumes(jd_texts, resumes, use_llm=False, service_url=None):
+    """Score resumes against several JDs; each result has one score dict per JD."""
+    if service_url or SERVICE_URL:
+        return _call("POST", "/match", {"jd_texts": jd_texts, "resumes": resumes, "use_llm": use_llm},
+                     service_url)["results"]
+    from scoring_service import match_batch
+    return match_batch(jd_texts, resumes, use_llm)
+
+def summarize_resumes(jd_text, resumes, jd_name, service_url=None):
+    """Summarize resumes against a JD; returns [(name, summary)]."""
+    if service_url or SERVICE_URL:
+        results = _call("POST", "/summarize", {"jd_text": jd_text, "resumes": resumes, "jd_name": jd_name},
+                        service_url)["results"]
+    else:
+        from scoring_service import summarize
+        results = summarize(jd_text, resumes, jd_name)
+    return [(row["name"], row["summary"]) for row in results]
+
+def backfill_degraded(jd_name=None, limit=None, service_url=None):
+    """Re-score the LLM part of degraded rows; returns how many were fixed."""
+    if service_url or SERVICE_URL:
+        return _call("POST", "/backfill", {"jd_name": jd_name, "limit": limit}, service_url)["backfilled"]
+    from scoring_service import backfill_degraded as run_backfill
+    return run_backfill(jd_name, limit)
+
+def rescore_stale(jd_name=None, limit=None, use_llm=True, service_url=None):
+    """Re-score rows from an older pipeline version; returns how many were updated."""
+    if service_url or SERVICE_URL:
+        return _call("POST", "/rescore", {"jd_name": jd_name, "limit": limit, "use_llm": use_llm},
+                     service_url)["rescored"]
+    from scoring_service import rescore_stale as run_rescore
+    return run_rescore(jd_name, limit, use_llm)
+
+def get_rankings(jd_name, limit=50, offset=0, service_url=None):
+    if service_url or SERVICE_URL:
+        query = urlencode({"jd": jd_name, "limit": limit, "offset": offset})
+        return _call("GET", f"/rankings?{query}", service_url=service_url)["results"]
+    from scoring_service import rankings
+    return rankings(jd_name, limit, offset)
+
+def search_resumes(query, limit=20, match_all=False, service_url=None):
+    """BM25 keyword search over indexed resumes; returns [{resume, score, matched}]."""
+    if service_url or SERVICE_URL:
+        query_string = urlencode({"q": query, "limit": limit, "all": int(match_all)})
+        return _call("GET", f"/search?{query_string}", service_url=service_url)["results"]
+    from scoring_service import search_resumes as run_search
+    return run_search(query, limit, match_all)
@@ -0,0 +1,483 @@
+import os
+import json
+import time
+import queue
+import threading
+from collections import namedtuple
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from resume_parser import analyze_document, analyze_pdf
+from db_utils import UPLOAD_DIR
+
+JD_DIR = os.path.join(UPLOAD_DIR, "jds")
+
+SERVICE_HOST = "127.0.0.1"
+SERVICE_PORT = int(os.environ.get("SCORING_SERVICE_PORT", "8765"))
+
+# Coalescing: jobs arriving within BATCH_WINDOW seconds are scored together
+BATCH_WINDOW = 0.02
+MAX_BATCH_JOBS = 32
+# Backpressure: requests beyond these limits are rejected with 503 / 413
+MAX_PENDING_JOBS = 64
+MAX_RESUMES_PER_REQUEST = 500
+SUMMARY_CONCURRENCY = 1
+SUMMARY_WAIT = 30.0  # seconds to wait for a summary slot
+# Deadline scoring checks the budget between chunks of the cheap pass
+CHEAP_SCORE_CHUNK = 16
+
+ScoreJob = namedtuple("ScoreJob", ["jd_text", "resumes", "use_llm", "future"])
+
+_jobs = queue.Queue(maxsize=MAX_PENDING_JOBS)
+_summary_slots = threading.BoundedSemaphore(SUMMARY_CONCURRENCY)
+# One backfill at a time, so overlapping runs don't re-ask the LLM for the same rows
+_backfill_lock = threading.Lock()
+
+def _analyze_resume(resume):
+    if resume.get("text") is not None:
+        return analyze_document(resume["text"])
+    return analyze_pdf(resume["path"])
+
+def match_batch(jd_texts, resumes, use_llm=False, llama_scores=None, analyses=None):
+    """Score resumes against one or more JDs in a single pass.
+
+    Each resume is a dict with a `name` and either a `path` or `text`.
+    Already parsed resumes can pass their DocumentAnalysis in `analyses`.
+    Returns one dict per resume with name, email and a list of score dicts
+    in `jd_texts` order.
+    """
+    from scorer import score_matrix
+
+    if analyses is None:
+        analyses = [_analyze_resume(resume) for resume in resumes]
+    matrix = score_matrix(
+        [analysis.sections for analysis in analyses], jd_texts,
+        use_llm=use_llm,
+        llama_scores=llama_scores,
+        resume_tokens=[analysis.tokens for analysis in analyses]
+    )
+    return [
+        {"name": resume["name"], "email": analysis.email, "scores": row}
+        for resume, analysis, row in zip(resumes, analyses, matrix)
+    ]
+
+def score_batch(jd_text, resumes, use_llm=True, analyses=None):
+    """Score resumes against one JD; resumes may carry a known `llama_score` to reuse."""
+    results = match_batch(
+        [jd_text], resumes, use_llm,
+        llama_scores=[[resume.get("llama_score")] for resume in resumes],
+        analyses=analyses
+    )
+    for row in results:
+        row["scores"] = row["scores"][0]
+    return results
+
+def score_with_deadline(jd_text, resumes, time_budget):
+    """Score resumes within `time_budget` seconds, cheap components first.
+
+    BERT and keyword scores are computed for every resume, then LLaMA refines
+    rows in order of their provisional score for as long as the next call is
+    expected to finish before the deadline. Rows left without a LLaMA score are
+    flagged `degraded` (provisional) and can be completed by backfill_degraded.
+    Resumes the cheap pass does not reach before the deadline are left out of
+    the results, to be scored by a later run.
+    """
+    from scorer import llama_similarity_batch, preprocess_jd, extract_job_role, apply_llama_score, LLM_BATCH_SIZE
+
+    deadline = time.monotonic() + time_budget
+    results = []
+    for start in range(0, len(resumes), CHEAP_SCORE_CHUNK):
+        if results and time.monotonic() >= deadline:
+            print(f"WARNING - Time budget of {time_budget}s reached before "
+                  f"{len(resumes) - len(results)} resume(s) were scored")
+            break
+        results.extend(score_batch(jd_text, resumes[start:start + CHEAP_SCORE_CHUNK], use_llm=False))
+    pending = [i for i, row in enumerate(results) if row["scores"]["llama_score"] is None]
+    for i in pending:
+        results[i]["scores"]["degraded"] = True
+    # Refine the current leaders first: they decide the top of the ranking
+    pending.sort(key=lambda i: results[i]["scores"]["final_score"], reverse=True)
+
+    processed_jd = preprocess_jd(jd_text)
+    job_role = extract_job_role(jd_text)
+    call_seconds = []
+    for start in range(0, len(pending), LLM_BATCH_SIZE):
+        expected = sum(call_seconds) / len(call_seconds) if call_seconds else 0.0
+        if time.monotonic() + expected > deadline:
+            break
+        chunk = pending[start:start + LLM_BATCH_SIZE]
+        started = time.monotonic()
+        llama_scores = llama_similarity_batch(
+            processed_jd, [_analyze_resume(resumes[i]).sections for i in chunk], job_role)
+        call_seconds.append(time.monotonic() - started)
+        for i, llama_score in zip(chunk, llama_scores):
+            if llama_score is not None:
+                results[i]["scores"] = apply_llama_score(results[i]["scores"], llama_score)
+        if None in llama_scores:
+            break
+
+    provisional = sum(row["scores"]["degraded"] for row in results)
+    if provisional:
+        print(f"DEBUG - Time budget of {time_budget}s reached with {provisional} provisional score(s)")
+    return results
+
+def submit_score_job(jd_text, resumes, use_llm=True):
+    """Queue a scoring job for the batcher. Raises queue.Full when saturated."""
+    future = Future()
+    _jobs.put_nowait(ScoreJob(jd_text, resumes, use_llm, future))
+    return future
+
+def _batch_loop():
+    """Collect jobs for a short window and score those sharing a JD together."""
+    while True:
+        jobs = [_jobs.get()]
+        deadline = time.monotonic() + BATCH_WINDOW
+        while len(jobs) < MAX_BATCH_JOBS:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                jobs.append(_jobs.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        groups = {}
+        for job in jobs:
+            groups.setdefault((job.jd_text, job.use_llm), []).append(job)
+
+        for (jd_text, use_llm), group in groups.items():
+            try:
+                results = score_batch(jd_text, [r for job in group for r in job.resumes], use_llm)
+            except Exception as e:
+                print(f"ERROR - Batch scoring failed: {e}")
+                for job in group:
+                    job.future.set_exception(e)
+                continue
+            offset = 0
+            for job in group:
+                job.future.set_result(results[offset:offset + len(job.resumes)])
+                offset += len(job.resumes)
+
+def summarize(jd_text, resumes, jd_name):
+    from summarizer import summarize_resumes_with_jd
+
+    texts = [_analyze_resume(resume).text for resume in resumes]
+    names = [resume["name"] for resume in resumes]
+    return [
+        {"name": name, "summary": summary}
+        for name, summary in summarize_resumes_with_jd(texts, jd_text, names, jd_name)
+    ]
+
+def backfill_degraded(jd_name=None, limit=None):
+    """Re-run the LLM for rows scored while it was unavailable.
+
+    Stops at the first row the LLM still cannot score. Backfills in this
+    process run one at a time; a backfill started while another runs waits
+    for it and then only sees the rows still degraded. Returns the number of
+    rows backfilled.
+    """
+    with _backfill_lock:
+        return _backfill(jd_name, limit)
+
+def _backfill(jd_name, limit):
+    from scorer import llama_similarity, preprocess_jd, extract_job_role, rescore_components
+    from db_utils import load_degraded_scores, complete_backfill
+    from upload_store import resume_path
+
+    rows = load_degraded_scores(jd_name, limit)
+    jd_texts = {}
+    done = 0
+    for idx in rows.index:
+        row = rows.loc[idx]
+        if row["jd"] not in jd_texts:
+            with open(os.path.join(JD_DIR, row["jd"]), 'r', encoding='utf-8') as f:
+                jd_texts[row["jd"]] = f.read()
+        jd_text = jd_texts[row["jd"]]
+
+        sections = analyze_pdf(resume_path(row["resume"])).sections
+        llama_score = llama_similarity(preprocess_jd(jd_text), sections, extract_job_role(jd_text))
+        if llama_score is None:
+            break
+        components = rows.loc[[idx]].copy()
+        components["llama_score"] = llama_score
+        complete_backfill(row["jd"], row["resume"], llama_score, float(rescore_components(components).iloc[0]))
+        done += 1
+    return done
+
+def _refresh_components(jd_text, group, parts, use_llm=True, keep_failed_llama=True):
+    """Recompute the listed components of stored score rows against `jd_text`.
+
+    `group` holds one JD's rows as loaded by db_utils._load_components and
+    `parts` the set of components to recompute for each row. BERT uses the
+    embedding cache, so only texts never seen before are encoded. LLaMA is
+    only re-asked for rows that have a LLaMA score. If that fails, the old
+    score is kept (`keep_failed_llama`) or cleared and the row marked
+    degraded for backfill. Returns the updated rows and the row positions
+    whose LLaMA score is still outdated.
+    """
+    from scorer import score_matrix, lexical_overlaps, llama_similarity_batch, preprocess_jd, extract_job_role
+    from upload_store import resume_path
+    import pandas as pd
+
+    group = group.copy()
+    sections = {}
+
+    def resume_sections(i):
+        if i not in sections:
+            sections[i] = analyze_pdf(resume_path(group["resume"].iloc[i])).sections
+        return sections[i]
+
+    def put(i, column, value):
+        group.iloc[i, group.columns.get_loc(column)] = value
+
+    # BERT: one pass for the rows whose embedding inputs changed
+    bert_rows = [i for i, row_parts in enumerate(parts) if "bert" in row_parts]
+    if bert_rows:
+        matrix = score_matrix([resume_sections(i) for i in bert_rows], [jd_text], use_llm=False)
+        for i, row in zip(bert_rows, matrix):
+            for column, value in row[0]["components"].items():
+                if column.startswith("sim_"):
+                    put(i, column, value)
+
+    for i, row_parts in enumerate(parts):
+        if "keyword" in row_parts or "skill" in row_parts:
+            kw_overlap, skill_score = lexical_overlaps(resume_sections(i), jd_text)
+            put(i, "keyword_overlap", kw_overlap)
+            put(i, "skill_overlap", skill_score)
+
+    # LLaMA: only rows that have a score to refresh; unscored (degraded) rows are left to backfill
+    llama_pending = {i for i, row_parts in enumerate(parts)
+                     if "llama" in row_parts and pd.notna(group["llama_score"].iloc[i])}
+    if llama_pending and use_llm:
+        ordered = sorted(llama_pending)
+        llama_scores = llama_similarity_batch(
+            preprocess_jd(jd_text), [resume_sections(i) for i in ordered], extract_job_role(jd_text))
+        for i, llama_score in zip(ordered, llama_scores):
+            if llama_score is not None:
+                put(i, "llama_score", llama_score)
+                llama_pending.discard(i)
+    if not keep_failed_llama:
+        for i in llama_pending:
+            put(i, "llama_score", None)
+            put(i, "degraded", 1)
+        llama_pending = set()
+    return group, llama_pending
+
+def rescore_stale(jd_name=None, limit=None, use_llm=True):
+    """Bring rows scored by an older pipeline up to date, recomputing only what changed.
+
+    Each row's stored component versions are compared with the current ones.
+    BERT similarities are re-embedded only when the embedding inputs changed,
+    keyword and skill overlaps are recomputed without any model, and LLaMA is
+    re-asked only for rows that have a LLaMA score and whose LLaMA inputs
+    (model, prompt, budget) changed. Everything else is reused, and final
+    scores are recombined from the components. Returns the number of rows
+    brought up to date; rows whose LLaMA re-run fails (or is skipped with
+    `use_llm=False`) keep their old LLaMA version and stay stale.
+    """
+    from scorer import component_versions, pipeline_fingerprint, rescore_components
+    from db_utils import load_stale_components, save_rescored
+
+    versions = component_versions()
+    rows = load_stale_components(pipeline_fingerprint(versions), jd_name, limit)
+    updated = 0
+    for jd, group in rows.groupby("jd"):
+        if not os.path.exists(os.path.join(JD_DIR, jd)):
+            print(f"WARNING - Skipping {len(group)} stale row(s) of {jd}: the JD file is gone")
+            continue
+        with open(os.path.join(JD_DIR, jd), 'r', encoding='utf-8') as f:
+            jd_text = f.read()
+        row_versions = [json.loads(stamp) if stamp else {} for stamp in group["versions"]]
+        stale = [{part for part in versions if stamp.get(part) != versions[part]} for stamp in row_versions]
+        group, llama_pending = _refresh_components(jd_text, group, stale, use_llm)
+
+        # Rows whose LLaMA score could not be refreshed keep its old version
+        stamps = [
+            {**versions, "llama": row_versions[i].get("llama")} if i in llama_pending else versions
+            for i in range(len(group))
+        ]
+        group["versions"] = [json.dumps(stamp) for stamp in stamps]
+        group["fingerprint"] = [pipeline_fingerprint(stamp) for stamp in stamps]
+        group["score"] = rescore_components(group)
+        save_rescored(group)
+        updated += len(group) - len(llama_pending)
+    return updated
+
+def rescore_jd(jd_name, jd_text, parts, use_llm=True):
+    """Recompute `parts` of every stored score of an edited JD against its new text.
+
+    Resume-side embeddings come from the embedding cache, so only the new JD
+    is encoded. LLaMA scores that cannot be refreshed are cleared and the rows
+    flagged degraded, since they were given for the old text. Returns the
+    number of rows updated.
+    """
+    from scorer import component_versions, pipeline_fingerprint, rescore_components
+    from db_utils import load_jd_components, save_rescored
+
+    rows = load_jd_components(jd_name)
+    if rows.empty:
+        return 0
+    group, _ = _refresh_components(jd_text, rows, [set(parts)] * len(rows), use_llm, keep_failed_llama=False)
+    # Recomputed components are now current; the others keep their stamp
+    versions = component_versions()
+    stamps = [
+        {**(json.loads(stamp) if stamp else {}), **{part: versions[part] for part in parts}}
+        for stamp in group["versions"]
+    ]
+    group["versions"] = [json.dumps(stamp) for stamp in stamps]
+    group["fingerprint"] = [pipeline_fingerprint(stamp) for stamp in stamps]
+    group["score"] = rescore_components(group)
+    save_rescored(group)
+    return len(group)
+
+def search_resumes(query, limit=20, match_all=False):
+    from search_index import search
+
+    return [
+        {"resume": resume, "score": score, "matched": matched}
+        for resume, score, matched in search(query, limit, match_all)
+    ]
+
+def rankings(jd_name, limit=50, offset=0):
+    from db_utils import query_scores
+
+    df = query_scores(jd_name, limit=limit, offset=offset)
+    return json.loads(df.to_json(orient="records"))
+
+class ScoringRequestHandler(BaseHTTPRequestHandler):
+    """Batch JSON API: POST /score, /match, /summarize, /backfill, /rescore; GET /rankings, /search, /health."""
+
+    def _send(self, status, payload, headers=None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length", 0))
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = parse_qs(url.query)
+        if url.path == "/health":
+            from compaction import compaction_report
+            from llm_client import timing_report, pool_status
+            from scorer import BATCH_STATS
+            from summarizer import SUMMARY_STATS
+            from scorer import component_versions
+            self._send(200, {"status": "ok", "pending_jobs": _jobs.qsize(), "pipeline": component_versions(),
+                             "compaction": compaction_report(), "llm": timing_report(),
+                             "llm_batches": BATCH_STATS, "summaries": SUMMARY_STATS,
+                             "llm_pool": pool_status()})
+        elif url.path == "/rankings":
+            if "jd" not in params:
+                self._send(400, {"error": "jd is required"})
+                return
+            try:
+                limit, offset = int(params.get("limit", ["50"])[0]), int(params.get("offset", ["0"])[0])
+            except ValueError:
+                self._send(400, {"error": "limit and offset must be integers"})
+                return
+            self._send(200, {"results": rankings(params["jd"][0], limit=limit, offset=offset)})
+        elif url.path == "/search":
+            if not params.get("q"):
+                self._send(400, {"error": "q is required"})
+                return
+            try:
+                limit = int(params.get("limit", ["20"])[0])
+            except ValueError:
+                self._send(400, {"error": "limit must be an integer"})
+                return
+            self._send(200, {"results": search_resumes(
+                params["q"][0],
+                limit=limit,
+                match_all=params.get("all", ["0"])[0] in ("1", "true")
+            )})
+        else:
+            self._send(404, {"error": f"Unknown endpoint {url.path}"})
+
+    def do_POST(self):
+        try:
+            request = self._read_json()
+        except ValueError:
+            self._send(400, {"error": "Invalid JSON body"})
+            return
+
+        if self.path == "/rescore":
+            try:
+                self._send(200, {"rescored": rescore_stale(request.get("jd_name"), request.get("limit"),
+                                                           request.get("use_llm", True))})
+            except Exception as e:
+                print(f"ERROR - {self.path} failed: {e}")
+                self._send(500, {"error": str(e)})
+            return
+
+        if self.path == "/backfill":
+            try:
+                self._send(200, {"backfilled": backfill_degraded(request.get("jd_name"), request.get("limit"))})
+            except Exception as e:
+                print(f"ERROR - {self.path} failed: {e}")
+                self._send(500, {"error": str(e)})
+            return
+
+        resumes = request.get("resumes", [])
+        if not (request.get("jd_text") or request.get("jd_texts")) or not resumes:
+            self._send(400, {"error": "jd_text (or jd_texts) and resumes are required"})
+            return
+        if len(resumes) > MAX_RESUMES_PER_REQUEST:
+            self._send(413, {"error": f"At most {MAX_RESUMES_PER_REQUEST} resumes per request"})
+            return
+
+        try:
+            if self.path == "/score" and request.get("time_budget") and request.get("use_llm", True):
+                # Deadline runs are scheduled per request rather than coalesced
+                self._send(200, {"results": score_with_deadline(request["jd_text"], resumes, float(request["time_budget"]))})
+            elif self.path == "/score":
+                try:
+                    future = submit_score_job(request["jd_text"], resumes, request.get("use_llm", True))
+                except queue.Full:
+                    self._send(503, {"error": "Scoring queue is full"}, {"Retry-After": "1"})
+                    return
+                self._send(200, {"results": future.result()})
+            elif self.path == "/match":
+                self._send(200, {"results": match_batch(request["jd_texts"], resumes, request.get("use_llm", False))})
+            elif self.path == "/summarize":
+                if not _summary_slots.acquire(timeout=SUMMARY_WAIT):
+                    self._send(503, {"error": "Summarizer is busy"}, {"Retry-After": "5"})
+                    return
+                try:
+                    results = summarize(request["jd_text"], resumes, request.get("jd_name", "api"))
+                finally:
+                    _summary_slots.release()
+                self._send(200, {"results": results})
+            else:
+                self._send(404, {"error": f"Unknown endpoint {self.path}"})
+        except Exception as e:
+            print(f"ERROR - {self.path} failed: {e}")
+            self._send(500, {"error": str(e)})
+
+def serve(port=SERVICE_PORT):
+    """Run the scoring service on localhost with the models loaded up front."""
+    from scorer import get_bert_model
+    from llm_client import preload
+    from db_utils import init_db
+
+    init_db()
+    get_bert_model()  # keep the embedding model warm for the first request
+    threading.Thread(target=preload, daemon=True).start()
+    threading.Thread(target=_batch_loop, daemon=True).start()
+    server = ThreadingHTTPServer((SERVICE_HOST, port), ScoringRequestHandler)
+    server.daemon_threads = True
+    print(f"Scoring service listening on http://{SERVICE_HOST}:{port}")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    serve()
@@ -0,0 +1,168 @@
+import re
+import math
+import sqlite3
+from collections import Counter
+from datetime import datetime
+from db_utils import DB_PATH
+
+# BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Mentions inside the skills section count this many extra times
+SKILLS_BOOST = 1.0
+
+_TOKEN_RE = re.compile(r'\w+')
+
+def _stopwords():
+    from scorer import STOPWORDS
+    return STOPWORDS
+
+def tokenize(text):
+    """Lowercased word tokens without stopwords, in order."""
+    stopwords = _stopwords()
+    return [w for w in _TOKEN_RE.findall(text.lower()) if w not in stopwords]
+
+def term_frequencies(text, sections=None):
+    """Term weights for a resume: body counts plus a boost for the skills section."""
+    tf = Counter(tokenize(text))
+    if sections and sections.get("skills"):
+        for term, count in Counter(tokenize(sections["skills"])).items():
+            tf[term] += SKILLS_BOOST * count
+    return tf
+
+def index_resume(resume_name, text, sections=None, resume_hash=None):
+    """Add or replace a resume in the inverted index."""
+    tf = term_frequencies(text, sections)
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        conn.execute("DELETE FROM search_postings WHERE resume = ?", (resume_name,))
+        conn.execute(
+            "INSERT OR REPLACE INTO search_docs (resume, resume_hash, length, indexed_at) VALUES (?, ?, ?, ?)",
+            (resume_name, resume_hash, sum(tf.values()), datetime.now().isoformat())
+        )
+        conn.executemany(
+            "INSERT INTO search_postings (term, resume, tf) VALUES (?, ?, ?)",
+            [(term, resume_name, weight) for term, weight in tf.items()]
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+def remove_resume(resume_name):
+    """Drop a resume that no longer exists from the index."""
+    conn = sqlite3.connect(DB_PATH)
+    conn.execute("DELETE FROM search_postings WHERE resume = ?", (resume_name,))
+    conn.execute("DELETE FROM search_docs WHERE resume = ?", (resume_name,))
+    conn.commit()
+    conn.close()
+
+def indexed_resumes():
+    conn = sqlite3.connect(DB_PATH)
+    names = {row[0] for row in conn.execute("SELECT resume FROM search_docs")}
+    conn.close()
+    return names
+
+def indexed_hash(resume_name):
+    """Content hash the resume was last indexed with, or None if not indexed."""
+    conn = sqlite3.connect(DB_PATH)
+    row = conn.execute("SELECT resume_hash FROM search_docs WHERE resume = ?", (resume_name,)).fetchone()
+    conn.close()
+    return row[0] if row else None
+
+def search(query, limit=20, match_all=False, candidates=None):
+    """Rank indexed resumes against a free-text query with BM25.
+
+    With `match_all`, only resumes containing every query term are returned.
+    `candidates` optionally restricts the search to these resume names.
+    Returns [(resume, score, matched terms)] best first.
+    """
+    terms = sorted(set(tokenize(query)))
+    if not terms:
+        return []
+
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        doc_count, avg_length = conn.execute("SELECT COUNT(*), AVG(length) FROM search_docs").fetchone()
+        if not doc_count:
+            return []
+        placeholders = ",".join("?" for _ in terms)
+        doc_freqs = dict(conn.execute(
+            f"SELECT term, COUNT(*) FROM search_postings WHERE term IN ({placeholders}) GROUP BY term", terms
+        ).fetchall())
+        # Lucene-style idf, always positive
+        idf = {
+            term: math.log(1 + (doc_count - df + 0.5) / (df + 0.5))
+            for term, df in doc_freqs.items()
+        }
+        if not idf or (match_all and len(idf) < len(terms)):
+            return []
+
+        idf_rows = " UNION ALL ".join("SELECT ? AS term, ? AS idf" for _ in idf)
+        params = [value for item in idf.items() for value in item]
+        candidate_filter = ""
+        if candidates is not None:
+            candidates = list(candidates)
+            if not candidates:
+                return []
+            candidate_filter = f"AND p.resume IN ({','.join('?' for _ in candidates)})"
+        having = "HAVING COUNT(*) = ?" if match_all else ""
+        k1, b, avg_length = BM25_K1, BM25_B, float(avg_length or 1.0)
+        sql = f"""
+            WITH q AS ({idf_rows})
+            SELECT p.resume,
+                   SUM(q.idf * p.tf * ({k1} + 1) / (p.tf + {k1} * (1 - {b} + {b} * d.length / {avg_length}))) AS score,
+                   GROUP_CONCAT(p.term, ' ') AS matched
+            FROM q
+            JOIN search_postings p ON p.term = q.term
+            JOIN search_docs d ON d.resume = p.resume
+            WHERE 1 = 1 {candidate_filter}
+            GROUP BY p.resume
+            {having}
+            ORDER BY score DESC
+            LIMIT ?
+        """
+        params += candidates or []
+        if match_all:
+            params.append(len(terms))
+        params.append(limit)
+        rows = conn.execute(sql, params).fetchall()
+    finally:
+        conn.close()
+    return [(resume, round(score, 3), matched.split()) for resume, score, matched in rows]
+
+def prefilter(jd_text, resume_names, top_n):
+    """The `top_n` of `resume_names` that best match a JD's keywords, for scoring first.
+
+    Resumes that are not indexed are kept, since they can't be ranked.
+    """
+    from scorer import preprocess_jd
+
+    resume_names = list(resume_names)
+    conn = sqlite3.connect(DB_PATH)
+    indexed = {row[0] for row in conn.execute("SELECT resume FROM search_docs")}
+    conn.close()
+    ranked = [name for name, _, _ in search(preprocess_jd(jd_text), top_n, candidates=[
+        name for name in resume_names if name in indexed
+    ])]
+    return ranked + [name for name in resume_names if name not in indexed]
+
+def reindex(resumes):
+    """Sync the index with `resumes`, the full list of (name, path, resume_hash) entries.
+
+    Entries whose content changed are (re)indexed and indexed resumes missing
+    from the list are removed. Returns the count indexed.
+    """
+    from resume_parser import analyze_pdf
+
+    indexed = 0
+    seen = set()
+    for name, path, file_hash in resumes:
+        seen.add(name)
+        if file_hash is not None and indexed_hash(name) == file_hash:
+            continue
+        analysis = analyze_pdf(path)
+        index_resume(name, analysis.text, analysis.sections, file_hash)
+        indexed += 1
+    for name in indexed_resumes() - seen:
+        remove_resume(name)
+    return indexed
@@ -0,0 +1,267 @@
+import os
+import re
+import json
+import hashlib
+from collections import Counter, deque
+from db_utils import UPLOAD_DIR
+
+# Extra skills and aliases: {"canonical": ["alias", ...]} or
+# {"canonical": {"aliases": [...], "weight": 2.0}}, merged over DEFAULT_SKILLS
+SKILLS_FILE = os.path.join(UPLOAD_DIR, "skills.json")
+
+# Canonical skill -> aliases. Matching is case-insensitive on whole words,
+# so "java" does not match inside "javascript". Ambiguous short words
+# ("go", "r", "excel") are only matched in unambiguous forms.
+DEFAULT_SKILLS = {
+    # Languages
+    "python": ["python3"],
+    "java": [],
+    "javascript": ["js", "ecmascript", "es6"],
+    "typescript": [],
+    "c++": ["cpp", "c plus plus"],
+    "c#": ["csharp", "c sharp"],
+    "golang": ["go lang"],
+    "rust": [],
+    "scala": [],
+    "kotlin": [],
+    "swift": [],
+    "ruby": [],
+    "php": [],
+    "r programming": ["rstudio", "tidyverse", "ggplot2"],
+    "matlab": [],
+    "julia": [],
+    "sql": ["structured query language"],
+    "bash": ["shell scripting", "shell script", "zsh"],
+    "perl": [],
+    "sas": [],
+    # Data and ML
+    "machine learning": ["ml"],
+    "deep learning": [],
+    "artificial intelligence": ["ai"],
+    "natural language processing": ["nlp"],
+    "computer vision": ["image processing"],
+    "large language models": ["llm", "llms", "large language model"],
+    "generative ai": ["genai", "gen ai"],
+    "reinforcement learning": [],
+    "statistics": ["statistical analysis", "statistical modeling", "statistical modelling"],
+    "data analysis": ["data analytics", "analytics"],
+    "data visualization": ["data visualisation", "dataviz"],
+    "data engineering": [],
+    "data science": [],
+    "data modeling": ["data modelling"],
+    "data warehousing": ["data warehouse", "dwh"],
+    "etl": ["elt", "extract transform load", "data pipelines", "data pipeline"],
+    "feature engineering": [],
+    "a/b testing": ["ab testing", "a/b tests", "experimentation"],
+    "time series": ["time-series", "forecasting"],
+    "recommender systems": ["recommendation systems", "recommendation engine"],
+    "mlops": ["ml ops"],
+    "pandas": [],
+    "numpy": [],
+    "scipy": [],
+    "scikit-learn": ["sklearn", "scikit learn"],
+    "tensorflow": ["keras"],
+    "pytorch": ["torch"],
+    "xgboost": ["lightgbm", "catboost", "gradient boosting"],
+    "hugging face": ["huggingface", "transformers"],
+    "langchain": [],
+    "opencv": [],
+    "spacy": [],
+    "nltk": [],
+    "matplotlib": ["seaborn", "plotly"],
+    "jupyter": ["jupyter notebook", "ipython"],
+    "mlflow": [],
+    # Big data and streaming
+    "apache spark": ["spark", "pyspark", "spark sql"],
+    "hadoop": ["hdfs", "mapreduce"],
+    "hive": [],
+    "apache kafka": ["kafka"],
+    "apache airflow": ["airflow"],
+    "dbt": ["data build tool"],
+    "apache flink": ["flink"],
+    "databricks": [],
+    "snowflake": [],
+    "bigquery": ["big query"],
+    "redshift": ["amazon redshift"],
+    # Databases
+    "postgresql": ["postgres", "psql"],
+    "mysql": [],
+    "sqlite": [],
+    "oracle": ["oracle db", "pl/sql"],
+    "sql server": ["mssql", "microsoft sql server", "t-sql"],
+    "mongodb": ["mongo"],
+    "redis": [],
+    "cassandra": [],
+    "elasticsearch": ["elastic search", "opensearch", "elk"],
+    "dynamodb": [],
+    "nosql": [],
+    # Cloud and infrastructure
+    "amazon web services": ["aws", "ec2", "s3", "lambda", "sagemaker"],
+    "google cloud": ["gcp", "google cloud platform"],
+    "microsoft azure": ["azure"],
+    "docker": ["containers", "containerization"],
+    "kubernetes": ["k8s", "eks", "gke", "aks"],
+    "terraform": ["infrastructure as code", "iac"],
+    "ansible": [],
+    "linux": ["unix", "ubuntu"],
+    "ci/cd": ["cicd", "continuous integration", "continuous delivery", "continuous deployment"],
+    "jenkins": [],
+    "github actions": [],
+    "git": ["github", "gitlab", "bitbucket", "version control"],
+    "microservices": ["micro services", "microservice"],
+    "serverless": [],
+    "distributed systems": [],
+    "networking": ["tcp/ip"],
+    "cybersecurity": ["cyber security", "information security", "infosec"],
+    # Web and software engineering
+    "react": ["reactjs", "react.js"],
+    "angular": ["angularjs"],
+    "vue": ["vuejs", "vue.js"],
+    "node.js": ["nodejs", "node"],
+    "django": [],
+    "flask": [],
+    "fastapi": [],
+    "spring": ["spring boot"],
+    ".net": ["dotnet", "asp.net"],
+    "html": ["html5"],
+    "css": ["css3", "sass", "tailwind"],
+    "rest api": ["restful", "rest apis", "restful apis"],
+    "graphql": [],
+    "object-oriented programming": ["oop", "object oriented programming", "object oriented design"],
+    "data structures": ["algorithms", "data structures and algorithms", "dsa"],
+    "unit testing": ["pytest", "junit", "test automation", "tdd"],
+    "agile": ["scrum", "kanban", "jira"],
+    "system design": [],
+    "mobile development": ["android", "ios"],
+    # BI and analytics tools
+    "tableau": [],
+    "power bi": ["powerbi"],
+    "looker": [],
+    "microsoft excel": ["ms excel", "excel spreadsheets", "vba", "pivot tables"],
+    "google analytics": [],
+    "sap": [],
+    "salesforce": [],
+    # Business and soft skills
+    "project management": ["pmp"],
+    "product management": [],
+    "stakeholder management": ["stakeholder communication"],
+    "communication": ["communication skills"],
+    "leadership": ["team leadership"],
+    "problem solving": ["problem-solving"],
+    "business intelligence": ["bi"],
+}
+
+_automaton = None
+
+def load_taxonomy():
+    """Canonical skill -> (aliases, weight), DEFAULT_SKILLS merged with SKILLS_FILE."""
+    taxonomy = {skill: (aliases, 1.0) for skill, aliases in DEFAULT_SKILLS.items()}
+    if os.path.exists(SKILLS_FILE):
+        try:
+            with open(SKILLS_FILE, 'r', encoding='utf-8') as f:
+                extra = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"WARNING - Ignoring unreadable skills file {SKILLS_FILE}: {e}")
+            extra = {}
+        for skill, entry in extra.items():
+            if isinstance(entry, dict):
+                taxonomy[skill.lower()] = (entry.get("aliases", []), float(entry.get("weight", 1.0)))
+            else:
+                taxonomy[skill.lower()] = (entry, 1.0)
+    return taxonomy
+
+def _normalize(text):
+    return re.sub(r'\s+', ' ', text.lower())
+
+class SkillAutomaton:
+    """Aho-Corasick automaton over skill names and aliases.
+
+    `find` extracts every skill mention from a text in a single pass,
+    however many phrases the taxonomy holds.
+    """
+
+    def __init__(self, taxonomy):
+        self.weights = {skill: weight for skill, (_, weight) in taxonomy.items()}
+        # Identifies the taxonomy, for the skill component's version stamp
+        self.digest = hashlib.sha1(json.dumps(
+            sorted((skill, sorted(aliases), weight) for skill, (aliases, weight) in taxonomy.items())
+        ).encode("utf-8")).hexdigest()[:12]
+        self.goto = [{}]
+        self.fail = [0]
+        # Per state: (phrase length, canonical skill) for phrases ending there
+        self.outputs = [[]]
+        for skill, (aliases, _) in taxonomy.items():
+            for phrase in {skill, *aliases}:
+                phrase = _normalize(phrase).strip()
+                if phrase:
+                    self._add(phrase, skill)
+        self._link()
+
+    def _add(self, phrase, skill):
+        state = 0
+        for char in phrase:
+            if char not in self.goto[state]:
+                self.goto.append({})
+                self.fail.append(0)
+                self.outputs.append([])
+                self.goto[state][char] = len(self.goto) - 1
+            state = self.goto[state][char]
+        self.outputs[state].append((len(phrase), skill))
+
+    def _link(self):
+        # Breadth-first failure links; each state inherits its fallback's outputs
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self.goto[state].items():
+                queue.append(child)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(char, 0)
+                self.outputs[child] = self.outputs[child] + self.outputs[self.fail[child]]
+
+    def find(self, text):
+        """Counter of canonical skills mentioned in `text` as whole words."""
+        text = _normalize(text)
+        found = Counter()
+        state = 0
+        for end, char in enumerate(text):
+            while state and char not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(char, 0)
+            for length, skill in self.outputs[state]:
+                start = end - length + 1
+                if (start == 0 or not text[start - 1].isalnum()) and \
+                        (end + 1 == len(text) or not text[end + 1].isalnum()):
+                    found[skill] += 1
+        return found
+
+def get_automaton():
+    """Build the automaton from the taxonomy on first use."""
+    global _automaton
+    if _automaton is None:
+        _automaton = SkillAutomaton(load_taxonomy())
+    return _automaton
+
+def reload_taxonomy():
+    """Rebuild the automaton after SKILLS_FILE changed."""
+    global _automaton
+    _automaton = None
+    return get_automaton()
+
+def extract_skills(text):
+    """Canonical skills mentioned in `text`, with mention counts."""
+    return get_automaton().find(text)
+
+def skill_overlap(jd_skills, resume_skills):
+    """Weighted share of the JD's skills that the resume mentions.
+
+    Returns None when the JD names no known skills, so callers can fall back
+    to plain keyword overlap.
+    """
+    weights = get_automaton().weights
+    total = sum(weights.get(skill, 1.0) for skill in jd_skills)
+    if not total:
+        return None
+    return sum(weights.get(skill, 1.0) for skill in jd_skills if skill in resume_skills) / total
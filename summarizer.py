@@ -1,204 +1,198 @@
 import os
 import json
-import ollama
-from math import ceil
-from langchain_ollama import ChatOllama
 import shutil
 import re
-
-llm = ChatOllama(model='llama3.2')
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from llm_client import chat, LLMUnavailable, pool_capacity
+from compaction import compact_text
 
 SUMMARY_DIR = os.path.join("uploaded_data", "summaries")
 os.makedirs(SUMMARY_DIR, exist_ok=True)
 
+# Batched summaries generate far more tokens than a single score
+SUMMARY_TIMEOUT = 120.0
+SUMMARY_BATCH_SIZE = 3
+# Extra rounds for resumes missing from or malformed in a batched reply
+SUMMARY_RETRIES = 1
+
+SUMMARY_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "summaries": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "id": {"type": "integer"},
+                    "relevance": {"type": "string"},
+                    "skills": {
+                        "type": "array",
+                        "items": {
+                            "type": "object",
+                            "properties": {
+                                "skill": {"type": "string"},
+                                "explanation": {"type": "string"}
+                            },
+                            "required": ["skill", "explanation"]
+                        }
+                    }
+                },
+                "required": ["id", "relevance", "skills"]
+            }
+        }
+    },
+    "required": ["summaries"]
+}
+
+# Counters: LLM requests, and resumes that had to be requested again
+SUMMARY_STATS = {"requests": 0, "resumes": 0, "retried": 0}
+_stats_lock = threading.Lock()
+
 def clear_summaries():
     """Delete all existing summaries to force regeneration"""
     if os.path.exists(SUMMARY_DIR):
         shutil.rmtree(SUMMARY_DIR)
     os.makedirs(SUMMARY_DIR, exist_ok=True)
 
-def summarize_batch_with_ollama(jd_text, resume_batch, resume_names):
+def summarize_batch_with_ollama(jd_text, resume_batch, resume_ids):
+    """Request structured summaries for a batch of resumes; returns {id: summary}.
+
+    Only entries that pass validation are returned. LLMUnavailable
+    propagates so the caller can stop instead of retrying each resume.
+    """
     batch_prompts = ""
-    for idx, (resume_text, resume_name) in enumerate(zip(resume_batch, resume_names), start=1):
-        batch_prompts += f"\nRESUME_{idx}_START\n{resume_text}\nRESUME_{idx}_END\n"
+    for resume_text, resume_id in zip(resume_batch, resume_ids):
+        # Only the sentences most relevant to the JD, to keep the prompt short
+        resume_text = compact_text(resume_text, jd_text)
+        batch_prompts += f'\n<resume id="{resume_id}">\n{resume_text}\n</resume>\n'
 
     prompt = f"""
-You are an expert recruiter evaluating candidates. For EACH resume provided, you MUST generate a summary using the EXACT format below.
+You are an expert recruiter evaluating candidates. For EACH resume provided, write a short fit summary against the job description.
 
-For each resume, your response MUST start with [RESUME_SUMMARY_START] and end with [RESUME_SUMMARY_END].
-You MUST provide a summary for EVERY resume, maintaining the exact order they were provided in.
+For each resume return:
+- id: the resume id
+- relevance: 1-2 sentences stating if and how the candidate's background matches the job requirements. Focus on technical skills and experience alignment.
+- skills: up to 4 skills that SPECIFICALLY match JD requirements, each with a brief explanation of which JD requirement it matches. Return fewer (or none) if fewer match.
 
-Format for EACH resume:
-
-[RESUME_SUMMARY_START]
-📝 Relevance:
-<1-2 sentences stating if and how the candidate's background matches the job requirements. Focus on technical skills and experience alignment.>
-
-🔧 JD-Matched Skills:
-• <skill 1>: <brief explanation of how this skill matches a specific JD requirement>
-• <skill 2>: <brief explanation of how this skill matches a specific JD requirement>
-• <skill 3>: <brief explanation of how this skill matches a specific JD requirement>
-• <skill 4>: <brief explanation of how this skill matches a specific JD requirement>
-[RESUME_SUMMARY_END]
+Respond with JSON: {{"summaries": [{{"id": <resume id>, "relevance": "...", "skills": [{{"skill": "...", "explanation": "..."}}]}}]}}
 
 Job Description Key Requirements:
 {jd_text}
 
 {batch_prompts}
-
-Important Instructions:
-1. You MUST generate a summary for EACH resume in the same order they were provided
-2. Each summary MUST be wrapped in [RESUME_SUMMARY_START] and [RESUME_SUMMARY_END] markers
-3. Each summary MUST include ALL section emojis (📝, 🔧)
-4. For Relevance: Focus on technical skills and experience alignment with JD requirements
-5. For Skills: Only list skills that SPECIFICALLY match JD requirements
-6. If fewer than 4 relevant skills found, still list all matches but note "Limited relevant skills found"
-7. DO NOT skip any resumes
-8. DO NOT add any text between summaries
-9. You MUST generate exactly {len(resume_batch)} summaries, one for each resume
+You MUST return exactly one summary for each of the {len(resume_batch)} resume(s) above.
 """
 
+    reply = chat(prompt, timeout=SUMMARY_TIMEOUT, format=SUMMARY_SCHEMA)
+    summaries = parse_structured_summaries(reply, set(resume_ids))
+    with _stats_lock:
+        SUMMARY_STATS["requests"] += 1
+        SUMMARY_STATS["resumes"] += len(resume_ids)
+    return summaries
+
+def _valid_text(value):
+    return isinstance(value, str) and value.strip() != ""
+
+def parse_structured_summaries(reply, expected_ids):
+    """Validate a structured reply against SUMMARY_SCHEMA; returns {id: summary}."""
     try:
-        response = ollama.chat(
-            model="llama3.2",
-            messages=[{"role": "user", "content": prompt}]
-        )
-        return response['message']['content'].strip()
-    except Exception as e:
-        return f"Error: {e}"
-
-def parse_batch_summaries(batch_text):
-    """Parse the batch response into individual summaries using strict markers"""
-    summaries = []
-    
-    # Split by summary markers
-    parts = batch_text.split('[RESUME_SUMMARY_START]')
-    
-    # Process each part (skip the first as it's before any marker)
-    for part in parts[1:]:
-        if '[RESUME_SUMMARY_END]' in part:
-            summary = part.split('[RESUME_SUMMARY_END]')[0].strip()
-            if summary:
-                # Clean up any extra whitespace or newlines
-                summary = re.sub(r'\n\s*\n\s*\n+', '\n\n', summary)
-                summary = re.sub(r'^\s+', '', summary, flags=re.MULTILINE)
-                summaries.append(summary)
-    
+        entries = json.loads(reply).get("summaries", [])
+    except (ValueError, AttributeError):
+        return {}
+    if not isinstance(entries, list):
+        return {}
+
+    summaries = {}
+    for entry in entries:
+        if not isinstance(entry, dict) or entry.get("id") not in expected_ids or entry["id"] in summaries:
+            continue
+        skills = entry.get("skills")
+        if not _valid_text(entry.get("relevance")) or not isinstance(skills, list):
+            continue
+        summaries[entry["id"]] = {
+            "relevance": entry["relevance"].strip(),
+            "skills": [
+                {"skill": item["skill"].strip(), "explanation": item["explanation"].strip()}
+                for item in skills
+                if isinstance(item, dict) and _valid_text(item.get("skill")) and _valid_text(item.get("explanation"))
+            ]
+        }
     return summaries
 
-def format_summary(summary_text):
-    """Format the summary text for better display"""
-    # The summary should already be properly formatted from the LLM
-    # Just clean up any extra whitespace and ensure consistent newlines
-    summary_text = re.sub(r'\n\s*\n\s*\n+', '\n\n', summary_text)
-    summary_text = re.sub(r'^\s+', '', summary_text, flags=re.MULTILINE)
-    
-    # Ensure each section has proper spacing
-    sections = summary_text.split('\n\n')
-    formatted_sections = []
-    
-    for section in sections:
-        if section.strip():
-            if '📝 Relevance:' in section:
-                formatted_sections.append(section.strip())
-            elif '🔧 JD-Matched Skills:' in section:
-                # Ensure bullet points are properly formatted
-                lines = section.split('\n')
-                formatted_skills = [lines[0]]  # Add the header
-                for line in lines[1:]:
-                    if line.strip():
-                        if not line.strip().startswith('•'):
-                            line = f"• {line.strip()}"
-                        formatted_skills.append(line.strip())
-                formatted_sections.append('\n'.join(formatted_skills))
-    
-    return '\n\n'.join(formatted_sections)
+def format_summary(summary):
+    """Render a structured summary in the display format used by the app"""
+    lines = ["📝 Relevance:", summary["relevance"], "", "🔧 JD-Matched Skills:"]
+    for item in summary["skills"]:
+        lines.append(f"• {item['skill']}: {item['explanation']}")
+    if len(summary["skills"]) < 4:
+        lines.append("• Limited relevant skills found")
+    return re.sub(r'\n\s*\n\s*\n+', '\n\n', "\n".join(lines))
+
+def _summary_path(jd_file, resume_name):
+    return os.path.join(SUMMARY_DIR, f"{jd_file}_{resume_name}.txt".replace(" ", "_"))
 
 def summarize_resumes_with_jd(resume_texts, jd_text, resume_names, jd_file):
-    batch_size = 2  # Reduced batch size for better reliability
     all_summaries = []
-    
+
     # First, check for existing summaries and collect resumes that need processing
-    new_resume_texts = []
-    new_resume_names = []
-    processed_names = set()  # Keep track of processed resumes
-    
-    for resume_text, resume_name in zip(resume_texts, resume_names):
-        summary_filename = f"{jd_file}_{resume_name}.txt".replace(" ", "_")
-        summary_path = os.path.join(SUMMARY_DIR, summary_filename)
-        
+    pending = {}
+    for idx, (resume_text, resume_name) in enumerate(zip(resume_texts, resume_names), start=1):
+        summary_path = _summary_path(jd_file, resume_name)
         if os.path.exists(summary_path):
-            # Load existing summary
             with open(summary_path, 'r', encoding='utf-8') as f:
                 all_summaries.append((resume_name, f.read()))
-                processed_names.add(resume_name)
         else:
-            # Add to list for processing
-            new_resume_texts.append(resume_text)
-            new_resume_names.append(resume_name)
-    
-    # Process resumes in smaller batches
-    for i in range(0, len(new_resume_texts), batch_size):
-        batch_texts = new_resume_texts[i:i+batch_size]
-        batch_names = new_resume_names[i:i+batch_size]
-        
-        # Process the batch
-        batch_result = summarize_batch_with_ollama(jd_text, batch_texts, batch_names)
-        individual_summaries = parse_batch_summaries(batch_result)
-        
-        # Process each resume in the batch
-        for j, (text, name) in enumerate(zip(batch_texts, batch_names)):
-            if name in processed_names:
-                continue  # Skip if already processed
-                
-            # Try to get summary from batch result first
-            summary = individual_summaries[j] if j < len(individual_summaries) else None
-            
-            # If no summary from batch, process individually
-            if not summary:
-                print(f"Processing {name} individually...")
-                single_result = summarize_batch_with_ollama(jd_text, [text], [name])
-                single_summaries = parse_batch_summaries(single_result)
-                if single_summaries:
-                    summary = single_summaries[0]
-            
-            # If we have a summary, format and save it
-            if summary:
-                formatted_summary = format_summary(summary)
-                summary_filename = f"{jd_file}_{name}.txt".replace(" ", "_")
-                summary_path = os.path.join(SUMMARY_DIR, summary_filename)
-                with open(summary_path, 'w', encoding='utf-8') as f:
-                    f.write(formatted_summary)
-                all_summaries.append((name, formatted_summary))
-                processed_names.add(name)
-    
-    # Verify all resumes were processed
-    missing_resumes = set(resume_names) - processed_names
-    if missing_resumes:
-        print(f"Warning: Some resumes were not processed: {missing_resumes}")
-        # Process any missing resumes individually
-        for name in missing_resumes:
-            idx = resume_names.index(name)
-            text = resume_texts[idx]
-            print(f"Attempting to process missing resume: {name}")
-            single_result = summarize_batch_with_ollama(jd_text, [text], [name])
-            single_summaries = parse_batch_summaries(single_result)
-            if single_summaries:
-                formatted_summary = format_summary(single_summaries[0])
-                summary_filename = f"{jd_file}_{name}.txt".replace(" ", "_")
-                summary_path = os.path.join(SUMMARY_DIR, summary_filename)
-                with open(summary_path, 'w', encoding='utf-8') as f:
-                    f.write(formatted_summary)
-                all_summaries.append((name, formatted_summary))
-    
+            pending[idx] = resume_text
+
+    # Batched structured requests, spread over the Ollama endpoint pool;
+    # later rounds only re-request what is still missing
+    def request(batch_ids):
+        return summarize_batch_with_ollama(jd_text, [pending[idx] for idx in batch_ids], batch_ids)
+
+    unavailable = False
+    for attempt in range(1 + SUMMARY_RETRIES):
+        if not pending or unavailable:
+            break
+        if attempt:
+            with _stats_lock:
+                SUMMARY_STATS["retried"] += len(pending)
+            print(f"Re-requesting {len(pending)} missing summary(ies)")
+        ids = list(pending)
+        batches = [ids[i:i + SUMMARY_BATCH_SIZE] for i in range(0, len(ids), SUMMARY_BATCH_SIZE)]
+        with ThreadPoolExecutor(max_workers=pool_capacity()) as executor:
+            futures = [executor.submit(request, batch) for batch in batches]
+            # Save each batch as it completes, so a later failure doesn't lose it
+            for future in as_completed(futures):
+                if future.cancelled():
+                    continue
+                try:
+                    summaries = future.result()
+                except LLMUnavailable as e:
+                    if not unavailable:
+                        print(f"WARNING - Stopping summaries, LLM unavailable: {e}")
+                        unavailable = True
+                        for other in futures:
+                            other.cancel()
+                    continue
+                for idx, summary in summaries.items():
+                    name = resume_names[idx - 1]
+                    formatted_summary = format_summary(summary)
+                    with open(_summary_path(jd_file, name), 'w', encoding='utf-8') as f:
+                        f.write(formatted_summary)
+                    all_summaries.append((name, formatted_summary))
+                    del pending[idx]
+
+    if pending:
+        print(f"Warning: Some resumes were not processed: {[resume_names[idx - 1] for idx in pending]}")
+
     # Sort summaries to maintain original order
     all_summaries.sort(key=lambda x: resume_names.index(x[0]))
     return all_summaries
 
 # Keep the original single resume function for backward compatibility
 def summarize_resume_with_jd(resume_text, jd_text, resume_file, jd_file):
-    summary_filename = f"{jd_file}_{resume_file}.txt".replace(" ", "_")
-    summary_path = os.path.join(SUMMARY_DIR, summary_filename)
+    summary_path = _summary_path(jd_file, resume_file)
 
     if os.path.exists(summary_path):
         with open(summary_path, 'r', encoding='utf-8') as f:
@@ -0,0 +1,84 @@
+import os
+import hashlib
+import sqlite3
+from datetime import datetime
+from db_utils import DB_PATH, UPLOAD_DIR
+
+RESUME_DIR = os.path.join(UPLOAD_DIR, "resumes")
+STORE_DIR = os.path.join(UPLOAD_DIR, "store")
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+def blob_path(file_hash):
+    """Location of a stored file, sharded by the first two hex digits of its hash."""
+    return os.path.join(STORE_DIR, file_hash[:2], f"{file_hash}.pdf")
+
+def store_upload(name, data):
+    """Store an uploaded resume by content hash and map its name to that hash.
+
+    The file is written only if its content is not stored yet. Returns
+    (hash, changed) where `changed` is True if the name is new or now points
+    at different content.
+    """
+    file_hash = content_hash(data)
+    path = blob_path(file_hash)
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        row = conn.execute("SELECT hash FROM resume_names WHERE name = ?", (name,)).fetchone()
+        changed = row is None or row[0] != file_hash
+        now = datetime.now().isoformat()
+        conn.execute(
+            "INSERT OR IGNORE INTO resume_blobs (hash, size, created_at) VALUES (?, ?, ?)",
+            (file_hash, len(data), now)
+        )
+        if changed:
+            conn.execute(
+                "INSERT OR REPLACE INTO resume_names (name, hash, uploaded_at) VALUES (?, ?, ?)",
+                (name, file_hash, now)
+            )
+        conn.commit()
+    finally:
+        conn.close()
+    return file_hash, changed
+
+def resume_hash(name):
+    """Content hash a resume name maps to, or None for unknown/legacy files."""
+    conn = sqlite3.connect(DB_PATH)
+    row = conn.execute("SELECT hash FROM resume_names WHERE name = ?", (name,)).fetchone()
+    conn.close()
+    return row[0] if row else None
+
+def resume_path(name):
+    """Path of the current content for a resume name.
+
+    Falls back to the name-keyed file in RESUME_DIR for resumes uploaded
+    before the content-addressed store existed.
+    """
+    file_hash = resume_hash(name)
+    if file_hash and os.path.exists(blob_path(file_hash)):
+        return blob_path(file_hash)
+    return os.path.join(RESUME_DIR, name)
+
+def stored_resumes(names):
+    """Pipeline entries (name, path, resume_hash) for stored resume names."""
+    return [
+        {"name": name, "path": os.path.abspath(resume_path(name)), "resume_hash": resume_hash(name)}
+        for name in names
+    ]
+
+def list_resumes():
+    """All known resume names, from the store and legacy RESUME_DIR files."""
+    conn = sqlite3.connect(DB_PATH)
+    names = {row[0] for row in conn.execute("SELECT name FROM resume_names")}
+    conn.close()
+    if os.path.isdir(RESUME_DIR):
+        names.update(f for f in os.listdir(RESUME_DIR) if f.lower().endswith(".pdf"))
+    return sorted(names)
@@ -0,0 +1,172 @@
+import os
+import time
+import sqlite3
+from datetime import datetime
+from db_utils import DB_PATH, UPLOAD_DIR, init_db, delete_resumes
+
+RESUME_DIR = os.path.join(UPLOAD_DIR, "resumes")
+# Drop PDFs here to have them ingested; they are removed once stored
+INBOX_DIR = os.path.join(UPLOAD_DIR, "inbox")
+JD_DIR = os.path.join(UPLOAD_DIR, "jds")
+WATCH_DIRS = (RESUME_DIR, INBOX_DIR)
+
+POLL_SECONDS = 5.0
+# Niceness added to the watcher process so interactive scoring wins the CPU
+WATCH_NICE = 10
+WATCH_THREADS = 1
+PRESCORE_BATCH_SIZE = 8
+
+def _snapshot(dirs):
+    """path -> (size, mtime) for the PDFs in `dirs`."""
+    files = {}
+    for directory in dirs:
+        if not os.path.isdir(directory):
+            continue
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            if name.lower().endswith(".pdf") and os.path.isfile(path):
+                stat = os.stat(path)
+                files[path] = (stat.st_size, stat.st_mtime)
+    return files
+
+def _jd_names():
+    if not os.path.isdir(JD_DIR):
+        return []
+    return sorted(name for name in os.listdir(JD_DIR) if os.path.isfile(os.path.join(JD_DIR, name)))
+
+def ingest(path):
+    """Store, fingerprint and index one PDF. Returns (name, hash, changed)."""
+    from upload_store import store_upload, blob_path
+    from resume_parser import analyze_pdf
+    from dedup import has_fingerprint, register_resume
+    from search_index import index_resume, indexed_hash
+
+    name = os.path.basename(path)
+    with open(path, 'rb') as f:
+        file_hash, changed = store_upload(name, f.read())
+    analysis = analyze_pdf(blob_path(file_hash))
+    if changed or not has_fingerprint(name):
+        register_resume(name, analysis.text)
+    if changed or indexed_hash(name) != file_hash:
+        index_resume(name, analysis.text, analysis.sections, file_hash)
+    return name, file_hash, changed
+
+def _superseded(path):
+    """True for a RESUME_DIR file whose name already maps to content stored after it was written.
+
+    Legacy files stay in RESUME_DIR after a newer version is uploaded through
+    the UI; re-ingesting them would remap the name to the old bytes.
+    """
+    if os.path.dirname(path) != RESUME_DIR:
+        return False
+    conn = sqlite3.connect(DB_PATH)
+    row = conn.execute("SELECT uploaded_at FROM resume_names WHERE name = ?", (os.path.basename(path),)).fetchone()
+    conn.close()
+    return row is not None and datetime.fromisoformat(row[0]).timestamp() >= os.path.getmtime(path)
+
+def _forget(name):
+    """Unindex a deleted legacy file, unless the name lives on in the content store."""
+    from upload_store import resume_hash
+    from search_index import remove_resume
+
+    if resume_hash(name) is None:
+        remove_resume(name)
+
+def _drop_stale_scores(name, file_hash):
+    """Delete scores of an older version of a resume, for every JD.
+
+    Rows scored before content hashes were recorded cannot be told apart
+    from the current version, so they are dropped too.
+    """
+    conn = sqlite3.connect(DB_PATH)
+    stale = [row[0] for row in conn.execute(
+        "SELECT DISTINCT jd FROM scores WHERE resume = ? AND (resume_hash IS NULL OR resume_hash != ?)",
+        (name, file_hash)
+    )]
+    conn.close()
+    for jd_name in stale:
+        delete_resumes(jd_name, [name])
+
+def prescore(jd_names, resumes, use_llm=True):
+    """Score resumes against each JD, skipping pairs that are already scored."""
+    from pipeline import run_pipeline
+
+    scored = 0
+    for jd_name in jd_names:
+        with open(os.path.join(JD_DIR, jd_name), 'r', encoding='utf-8') as f:
+            jd_text = f.read()
+        try:
+            scored += run_pipeline(jd_name, jd_text, list(resumes), use_llm=use_llm,
+                                   batch_size=PRESCORE_BATCH_SIZE)
+        except Exception as e:
+            print(f"ERROR - Pre-scoring against {jd_name} failed: {e}")
+    return scored
+
+def _lower_priority():
+    if hasattr(os, "nice"):
+        os.nice(WATCH_NICE)
+    try:
+        import torch
+        torch.set_num_threads(WATCH_THREADS)
+    except ImportError:
+        pass
+
+def watch(use_llm=True, poll_seconds=POLL_SECONDS, once=False):
+    """Ingest new or changed resumes and pre-score them against every saved JD.
+
+    Files are picked up once their size and modification time are unchanged
+    between two polls, so half-copied PDFs are not parsed. A new JD is
+    pre-scored against every stored resume. With `once`, a single pass over
+    the current files is made and the number of rows scored is returned.
+    """
+    from upload_store import list_resumes, stored_resumes
+
+    init_db()
+    os.makedirs(INBOX_DIR, exist_ok=True)
+    _lower_priority()
+    seen = {}
+    pending = {} if not once else _snapshot(WATCH_DIRS)
+    known_jds = set()
+    total = 0
+    print(f"Watching {', '.join(WATCH_DIRS)} for resumes (every {poll_seconds:.0f}s)")
+    while True:
+        current = _snapshot(WATCH_DIRS)
+        # Settled: unchanged since the previous poll and not handled in this state yet
+        ready = [path for path, state in current.items() if pending.get(path) == state and seen.get(path) != state]
+        vanished = [path for path in pending if path not in current and os.path.dirname(path) == RESUME_DIR]
+        pending = current
+        for path in vanished:
+            _forget(os.path.basename(path))
+            seen.pop(path, None)
+
+        ingested = []
+        for path in ready:
+            if _superseded(path):
+                seen[path] = current[path]
+                continue
+            try:
+                name, file_hash, changed = ingest(path)
+            except Exception as e:
+                print(f"ERROR - Could not ingest {path}: {e}")
+                seen[path] = current[path]
+                continue
+            seen[path] = current[path]
+            if changed:
+                _drop_stale_scores(name, file_hash)
+            if os.path.dirname(path) == INBOX_DIR:
+                os.remove(path)
+                seen.pop(path, None)
+            ingested.append(name)
+
+        jd_names = _jd_names()
+        new_jds = [jd_name for jd_name in jd_names if jd_name not in known_jds]
+        known_jds.update(new_jds)
+        if ingested:
+            print(f"Ingested {len(ingested)} resume(s); pre-scoring against {len(jd_names)} JD(s)")
+            total += prescore([jd for jd in jd_names if jd not in new_jds], stored_resumes(ingested), use_llm)
+        if new_jds:
+            total += prescore(new_jds, stored_resumes(list_resumes()), use_llm)
+
+        if once:
+            return total
+        time.sleep(poll_seconds)
@@ -0,0 +1,205 @@
+import os
+import time
+import socket
+import sqlite3
+import threading
+import multiprocessing
+from datetime import datetime
+from db_utils import DB_PATH, UPLOAD_DIR, init_db, write_score_results
+
+JD_DIR = os.path.join(UPLOAD_DIR, "jds")
+
+# Leases expire unless renewed by the owning worker's heartbeat
+LEASE_SECONDS = 120
+HEARTBEAT_SECONDS = LEASE_SECONDS / 4
+SHARD_SIZE = 16
+MAX_ATTEMPTS = 3
+IDLE_POLL_SECONDS = 2.0
+
+def _connect():
+    return sqlite3.connect(DB_PATH, timeout=30, isolation_level=None)
+
+def enqueue_work(jd_name, resumes):
+    """Queue (JD, resume) pairs that have not been scored or queued yet.
+
+    `resumes` are dicts with name, path and optional resume_hash. Pairs that
+    finished or failed earlier, or whose content changed, are queued again.
+    Returns the number of newly queued items.
+    """
+    conn = _connect()
+    try:
+        scored = conn.execute("SELECT resume, resume_hash FROM scores WHERE jd = ?", (jd_name,)).fetchall()
+        scored_names = {name for name, _ in scored}
+        scored_hashes = {file_hash for _, file_hash in scored if file_hash}
+        now = datetime.now().isoformat()
+        conn.execute("BEGIN IMMEDIATE")
+        queued = 0
+        for resume in resumes:
+            if resume["name"] in scored_names or resume.get("resume_hash") in scored_hashes:
+                continue
+            # Re-queue finished or failed items, and items whose content changed
+            cursor = conn.execute(
+                """INSERT INTO work_items (jd, resume, resume_hash, path, created_at) VALUES (?, ?, ?, ?, ?)
+                   ON CONFLICT (jd, resume) DO UPDATE SET
+                       resume_hash = excluded.resume_hash, path = excluded.path, status = 'pending',
+                       attempts = 0, lease_owner = NULL, lease_expires = NULL, error = NULL,
+                       created_at = excluded.created_at, finished_at = NULL
+                   WHERE work_items.status IN ('done', 'failed')
+                      OR work_items.resume_hash IS NOT excluded.resume_hash""",
+                (jd_name, resume["name"], resume.get("resume_hash"), resume["path"], now)
+            )
+            queued += cursor.rowcount
+        conn.execute("COMMIT")
+        return queued
+    finally:
+        conn.close()
+
+def claim_shard(conn, owner, shard_size=SHARD_SIZE):
+    """Lease up to `shard_size` pending or expired items to `owner`."""
+    now = time.time()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        # Expired leases that used up their attempts will not be claimed again
+        conn.execute(
+            """UPDATE work_items SET status = 'failed', lease_owner = NULL,
+                   error = COALESCE(error, 'Lease expired')
+               WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?""",
+            (now, MAX_ATTEMPTS)
+        )
+        rows = conn.execute(
+            """SELECT id, jd, resume, resume_hash, path FROM work_items
+               WHERE attempts < ? AND (status = 'pending' OR (status = 'leased' AND lease_expires < ?))
+               ORDER BY jd, id LIMIT ?""",
+            (MAX_ATTEMPTS, now, shard_size)
+        ).fetchall()
+        if rows:
+            conn.execute(
+                f"""UPDATE work_items SET status = 'leased', lease_owner = ?, lease_expires = ?,
+                        attempts = attempts + 1
+                    WHERE id IN ({','.join('?' for _ in rows)})""",
+                [owner, now + LEASE_SECONDS] + [row[0] for row in rows]
+            )
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    return rows
+
+def _heartbeat(owner, stop):
+    """Extend the leases held by `owner` until `stop` is set."""
+    conn = _connect()
+    try:
+        while not stop.wait(HEARTBEAT_SECONDS):
+            conn.execute(
+                "UPDATE work_items SET lease_expires = ? WHERE status = 'leased' AND lease_owner = ?",
+                (time.time() + LEASE_SECONDS, owner)
+            )
+    finally:
+        conn.close()
+
+def _complete_shard(conn, owner, jd_name, items, results):
+    """Write results and mark items done in one transaction, if still leased by us.
+
+    Returns the number of items completed.
+    """
+    ids = [item[0] for item in items]
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        held = {row[0] for row in conn.execute(
+            f"SELECT id FROM work_items WHERE lease_owner = ? AND status = 'leased' AND id IN ({','.join('?' for _ in ids)})",
+            [owner] + ids
+        )}
+        kept = [(item, result) for item, result in zip(items, results) if item[0] in held]
+        write_score_results(conn, jd_name, [result for _, result in kept])
+        conn.executemany(
+            "UPDATE work_items SET status = 'done', finished_at = ?, error = NULL WHERE id = ?",
+            [(datetime.now().isoformat(), item[0]) for item, _ in kept]
+        )
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    return len(kept)
+
+def _fail_shard(conn, owner, items, error):
+    conn.executemany(
+        """UPDATE work_items SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,
+               lease_owner = NULL, error = ? WHERE id = ? AND status = 'leased' AND lease_owner = ?""",
+        [(MAX_ATTEMPTS, str(error), item[0], owner) for item in items]
+    )
+
+def _read_jd(jd_name, cache):
+    if jd_name not in cache:
+        with open(os.path.join(JD_DIR, jd_name), 'r', encoding='utf-8') as f:
+            cache[jd_name] = f.read()
+    return cache[jd_name]
+
+def worker_main(worker_index, num_workers, wait=False):
+    """Worker process: load the model once, then claim and score shards."""
+    try:
+        import torch
+        # Split the cores between workers instead of letting each one grab them all
+        torch.set_num_threads(max(1, (os.cpu_count() or 1) // num_workers))
+    except ImportError:
+        pass
+    from scorer import get_bert_model
+    from scoring_service import score_batch
+
+    get_bert_model()
+    owner = f"{socket.gethostname()}:{os.getpid()}:{worker_index}"
+    stop = threading.Event()
+    threading.Thread(target=_heartbeat, args=(owner, stop), daemon=True).start()
+
+    conn = _connect()
+    jd_cache = {}
+    done = 0
+    try:
+        while True:
+            items = claim_shard(conn, owner)
+            if not items:
+                if not wait:
+                    break
+                time.sleep(IDLE_POLL_SECONDS)
+                continue
+
+            by_jd = {}
+            for item in items:
+                by_jd.setdefault(item[1], []).append(item)
+            for jd_name, jd_items in by_jd.items():
+                try:
+                    results = score_batch(
+                        _read_jd(jd_name, jd_cache),
+                        [{"name": item[2], "path": item[4]} for item in jd_items]
+                    )
+                    for item, result in zip(jd_items, results):
+                        result["resume_hash"] = item[3]
+                    # Items whose lease expired meanwhile belong to another worker now
+                    done += _complete_shard(conn, owner, jd_name, jd_items, results)
+                except Exception as e:
+                    print(f"ERROR - Worker {owner} failed on {jd_name}: {e}")
+                    _fail_shard(conn, owner, jd_items, e)
+    finally:
+        stop.set()
+        conn.close()
+    return done
+
+def run_workers(num_workers=None, wait=False):
+    """Run a pool of scoring processes until the work queue is drained.
+
+    Returns (items scored, elapsed seconds).
+    """
+    init_db()
+    num_workers = num_workers or os.cpu_count() or 1
+    start = time.perf_counter()
+    # spawn: each worker gets a clean interpreter and its own copy of the model
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(num_workers) as pool:
+        counts = pool.starmap(worker_main, [(i, num_workers, wait) for i in range(num_workers)])
+    return sum(counts), time.perf_counter() - start
+
+def queue_status():
+    """Count work items by status."""
+    conn = _connect()
+    rows = conn.execute("SELECT status, COUNT(*) FROM work_items GROUP BY status").fetchall()
+    conn.close()
+    return dict(rows)